@@ -1,10 +1,27 @@
-from flask import Flask, request, redirect, url_for, flash, render_template, session
+from flask import (
+    Flask,
+    request,
+    redirect,
+    url_for,
+    flash,
+    render_template,
+    session,
+    jsonify,
+    Response,
+    stream_with_context,
+    send_file,
+    abort,
+    Request,
+)
 from flask_migrate import Migrate
 from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import safe_join
 from werkzeug.utils import secure_filename
-from datetime import datetime, date
+from datetime import datetime, date, timedelta, timezone
+import io
 import os
 import uuid
+import click
 from config import Config
 from models import (
     db,
@@ -12,6 +29,8 @@ from models import (
     Specialty,
     LaboratoryResult,
     RadiologyImaging,
+    RadiologyUpload,
+    DicomMetadata,
     Appointment,
     Patient,
     DemographicInfo,
@@ -26,6 +45,102 @@ from models import (
 )
 from utils.mail_helper import mail, init_mail, send_email
 from utils.token_holper import generate_token, load_token
+from utils.appointment_stats import (
+    TIME_WINDOWS,
+    appointment_stats,
+    time_window_filter,
+)
+from utils.availability import (
+    BLOCKING_STATUSES,
+    DEFAULT_DURATION_MINUTES,
+    MAX_DURATION_MINUTES,
+    REPEAT_UNITS,
+    expand_series,
+    free_slots,
+    has_conflict,
+    load_schedule,
+    plan_series,
+)
+from utils.ical_feed import (
+    feed_validators,
+    feed_window_start,
+    generate_calendar,
+    new_feed_secret,
+)
+from utils.dashboard_cache import dashboard_cache, init_dashboard_cache, snapshot
+from utils.lab_stats import (
+    LAB_DATE_WINDOWS,
+    lab_date_filter,
+    doctor_lab_results,
+    lab_result_stats,
+    lab_search_filter,
+)
+from utils.dicom_index import available_modalities, index_dicom, index_pending_dicom
+from utils.image_derivatives import (
+    DERIVATIVE_SIZES,
+    dzi_descriptor,
+    ensure_derivative,
+    ensure_tile,
+    generate_derivatives,
+    image_size,
+    is_tileable,
+)
+from utils.lab_alerts import acknowledge_alert, open_critical_alerts
+from utils.lab_import import (
+    IMPORT_FORMATS,
+    detect_format,
+    import_lab_results,
+)
+from utils.lab_trends import (
+    DEFAULT_ROLLING_WINDOW,
+    DEFAULT_TREND_POINTS,
+    DOWNSAMPLE_METHODS,
+    MAX_TREND_POINTS,
+    downsample,
+    rolling_mean,
+    series_arrays,
+    slope_per_day,
+)
+from utils.lab_values import (
+    backfill_result_values,
+    backfill_statuses,
+    lab_series,
+    parse_result_value,
+    status_is_derived,
+)
+from utils.name_search import init_name_search, reindex_search, search_filter, search_rank
+from utils.pagination import keyset_paginate
+from utils.radiology_batch import MAX_BATCH_FILES, save_batch
+from utils.radiology_storage import (
+    content_etag,
+    release_blob,
+    store_blob,
+    upload_path,
+)
+from utils.reference_ranges import classify_result
+from utils.resumable_upload import (
+    CHUNK_CONTENT_TYPE,
+    TUS_EXTENSIONS,
+    TUS_VERSION,
+    UploadError,
+    append_chunk,
+    create_upload,
+    discard_upload,
+    finish_upload,
+    parse_metadata,
+    upload_offset,
+)
+from utils.upload_reclaimer import file_reclaimer, init_file_reclaimer, reclaim_orphans
+from utils.schema_helper import schema_supports
+from utils.patient_stats import (
+    AGE_GROUPS,
+    age_group_filter,
+    attach_activity_counts,
+    attach_recent_records,
+    escape_like,
+    patient_demographics,
+    patient_name_filter,
+)
 import re
 
 app = Flask(__name__)
@@ -35,6 +150,9 @@ app.config.from_object(Config)
 migrate = Migrate(app, db)
 db.init_app(app)
 init_mail(app)
+init_dashboard_cache(app)
+init_file_reclaimer(app)
+init_name_search(app)
 
 # File upload configuration
 UPLOAD_FOLDER = "static/uploads/radiology"
@@ -45,56 +163,73 @@ app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
 app.config["MAX_CONTENT_LENGTH"] = MAX_FILE_SIZE
 
 
+class UploadRequest(Request):
+    """Lets batch uploads carry many files, each still capped at MAX_FILE_SIZE"""
+
+    @property
+    def max_content_length(self):
+        if self.endpoint == "add_radiology_batch":
+            return MAX_FILE_SIZE * MAX_BATCH_FILES
+        return super().max_content_length
+
+
+app.request_class = UploadRequest
+
+# Listing page sizes
+PATIENTS_PER_PAGE = 50
+APPOINTMENTS_PER_PAGE = 50
+LAB_RESULTS_PER_PAGE = 50
+RADIOLOGY_PER_PAGE = 50
+
+
 def allowed_file(filename):
     """Check if file extension is allowed"""
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-def generate_unique_filename(filename):
-    """Generate unique filename to prevent conflicts"""
-    if filename == "":
-        return None
-
-    # Get file extension
-    file_ext = ""
+def file_extension(filename):
+    """Lower-cased extension of an upload, including the dot"""
     if "." in filename:
-        file_ext = "." + filename.rsplit(".", 1)[1].lower()
+        return "." + filename.rsplit(".", 1)[1].lower()
+    return ""
 
-    # Generate unique filename using UUID
-    unique_filename = str(uuid.uuid4()) + file_ext
-    return unique_filename
 
+def save_uploaded_file(file):
+    """Store an uploaded file by content and return its content key.
 
-def save_uploaded_file(file, patient_id):
-    """Save uploaded file and return filename"""
+    Identical uploads share one blob: the bytes are hashed before anything
+    is written, and a duplicate only gains a reference. The blob's reference
+    is counted in the current transaction.
+    """
     if file and allowed_file(file.filename):
-        # Generate unique filename
-        filename = generate_unique_filename(file.filename)
-        if filename:
-            # Create patient-specific subdirectory
-            patient_dir = os.path.join(
-                app.config["UPLOAD_FOLDER"], f"patient_{patient_id}"
-            )
-            os.makedirs(patient_dir, exist_ok=True)
+        content_key, created = store_blob(file.stream, file_extension(file.filename))
 
-            # Save file
-            filepath = os.path.join(patient_dir, filename)
-            file.save(filepath)
-            return f"patient_{patient_id}/{filename}"
+        # Render list and preview sizes now so pages never pull the original
+        if created:
+            generate_derivatives(content_key)
+        return content_key
     return None
 
 
 def delete_image_file(image_filename):
-    """Delete image file from filesystem"""
+    """Delete an unreferenced image and its derivatives in the background.
+
+    Call after committing the release_blob() that returned True for it.
+    """
     if image_filename:
-        try:
-            filepath = os.path.join(app.config["UPLOAD_FOLDER"], image_filename)
-            if os.path.exists(filepath):
-                os.remove(filepath)
-                return True
-        except Exception as e:
-            print(f"Error deleting file: {e}")
-    return False
+        file_reclaimer.schedule(image_filename)
+
+
+def parse_duration(value, errors):
+    """Parse an appointment length in minutes, recording problems in errors"""
+    if not value:
+        return DEFAULT_DURATION_MINUTES
+    if not value.isdigit() or not 5 <= int(value) <= MAX_DURATION_MINUTES:
+        errors.append(
+            f"Duration must be between 5 and {MAX_DURATION_MINUTES} minutes"
+        )
+        return DEFAULT_DURATION_MINUTES
+    return int(value)
 
 
 def validate_email(email):
@@ -452,38 +587,56 @@ def dashboard():
         flash("Doctor not found. Please log in again.", "error")
         return redirect(url_for("logout"))
 
+    # Widgets are served from the per-doctor cache; commits touching this
+    # doctor's lab results, appointments or patients invalidate the entry
+    widgets = dashboard_cache.get_or_load(
+        doctor_id, lambda: load_dashboard_widgets(doctor_id)
+    )
+
+    # Critical alerts are read fresh on every visit; the partial index keeps
+    # this a small lookup
     try:
-        # Get recent lab results for this doctor's patients
-        # First check if both tables exist and have the right schema
-        inspector = db.inspect(db.engine)
-        tables = inspector.get_table_names()
-
-        if "laboratory_result" in tables and "patient" in tables:
-            # Check if patient table has email column
-            patient_columns = [col["name"] for col in inspector.get_columns("patient")]
-            if "email" in patient_columns:
-                lab_results = (
-                    db.session.query(LaboratoryResult, Patient)
-                    .join(Patient, LaboratoryResult.patient_id == Patient.id)
-                    .filter(Patient.doctor_id == doctor_id)
-                    .order_by(LaboratoryResult.date.desc())
-                    .limit(10)
-                    .all()
-                )
-            else:
-                print("Patient table missing email column - skipping lab results query")
-                lab_results = []
+        critical_alerts, more_alerts = open_critical_alerts(doctor_id)
+    except Exception as e:
+        print(f"Error fetching critical alerts: {e}")
+        critical_alerts, more_alerts = [], False
+
+    return render_template(
+        "dashboard.html",
+        lab_results=widgets["lab_results"],
+        appointments=widgets["appointments"],
+        critical_alerts=critical_alerts,
+        more_alerts=more_alerts,
+        doctor=doctor,
+    )
+
+
+def load_dashboard_widgets(doctor_id):
+    """Query the dashboard tables and snapshot them for the cache"""
+    try:
+        # Get recent lab results for this doctor's patients. The schema check
+        # is cached after the first request, so this is the only query here.
+        if schema_supports("dashboard_lab_results"):
+            lab_results = (
+                db.session.query(LaboratoryResult, Patient)
+                .join(Patient, LaboratoryResult.patient_id == Patient.id)
+                .filter(Patient.doctor_id == doctor_id)
+                .order_by(LaboratoryResult.date.desc())
+                .limit(10)
+                .all()
+            )
         else:
-            print(f"Missing tables - available: {tables}")
             lab_results = []
     except Exception as e:
         print(f"Error fetching lab results: {e}")
         lab_results = []
 
     try:
-        # Get upcoming appointments for this doctor
+        # Get upcoming appointments for this doctor, with patients loaded
+        # in the same query for the table's name column
         appointments = (
             Appointment.query.filter_by(doctor_id=doctor_id)
+            .options(db.joinedload(Appointment.patient))
             .order_by(Appointment.date.desc())
             .limit(10)
             .all()
@@ -492,12 +645,34 @@ def dashboard():
         print(f"Error fetching appointments: {e}")
         appointments = []
 
-    return render_template(
-        "dashboard.html",
-        lab_results=lab_results,
-        appointments=appointments,
-        doctor=doctor,
-    )
+    return {
+        "lab_results": [
+            (
+                snapshot(lab_result, "id", "test_name", "result", "date"),
+                snapshot(patient, "id", "first_name", "last_name"),
+            )
+            for lab_result, patient in lab_results
+        ],
+        "appointments": [
+            snapshot(
+                appointment,
+                "id",
+                "date",
+                "status",
+                patient=("id", "first_name", "last_name"),
+            )
+            for appointment in appointments
+        ],
+    }
+
+
+@app.route("/dashboard/cache_stats")
+def dashboard_cache_stats():
+    """Report dashboard cache hit/miss counters for this worker process"""
+    if not session.get("logged_in"):
+        return jsonify({"error": "Authentication required"}), 401
+
+    return jsonify(dashboard_cache.stats())
 
 
 # Patients routes
@@ -510,75 +685,67 @@ def view_all_patients():
 
     doctor_id = session.get("doctor_id")
 
+    # Get search and filter parameters
+    search_name = request.args.get("search", "").strip()
+    gender_filter = request.args.get("gender", "").strip().lower()
+    age_filter = request.args.get("age_group", "").strip()
+    filters = {
+        "search": search_name,
+        "gender": gender_filter,
+        "age_group": age_filter,
+    }
+
     try:
-        # Get all patients for this doctor with their demographic info
-        patients_query = Patient.query.filter_by(doctor_id=doctor_id).order_by(
-            Patient.last_name, Patient.first_name
-        )
-        patients = patients_query.all()
-
-        # Get patient statistics
-        total_patients = len(patients)
-        male_patients = sum(1 for p in patients if p.gender == GenderEnum.MALE)
-        female_patients = sum(1 for p in patients if p.gender == GenderEnum.FEMALE)
-        other_patients = total_patients - male_patients - female_patients
-
-        # Calculate age groups
-        current_date = date.today()
-        age_groups = {"0-18": 0, "19-35": 0, "36-50": 0, "51-65": 0, "65+": 0}
-
-        for patient in patients:
-            if patient.date_of_birth:
-                age = (current_date - patient.date_of_birth).days // 365
-                if age <= 18:
-                    age_groups["0-18"] += 1
-                elif age <= 35:
-                    age_groups["19-35"] += 1
-                elif age <= 50:
-                    age_groups["36-50"] += 1
-                elif age <= 65:
-                    age_groups["51-65"] += 1
-                else:
-                    age_groups["65+"] += 1
-
-        # Get appointment, lab result, and medical history counts for each patient
-        for patient in patients:
-            patient.appointment_count = Appointment.query.filter_by(
-                patient_id=patient.id
-            ).count()
-            patient.lab_result_count = LaboratoryResult.query.filter_by(
-                patient_id=patient.id
-            ).count()
-            patient.radiology_result_count = RadiologyImaging.query.filter_by(
-                patient_id=patient.id
-            ).count()
-            patient.medical_history_count = MedicalHistory.query.filter_by(
-                patient_id=patient.id
-            ).count()
-
-            # Get recent medical histories with allergy information
-            patient.recent_medical_histories = (
-                db.session.query(MedicalHistory, Allergy)
-                .join(Allergy, MedicalHistory.allergy_id == Allergy.id)
-                .filter(MedicalHistory.patient_id == patient.id)
-                .order_by(MedicalHistory.date.desc())
-                .limit(3)
-                .all()
+        # Build filtered query for this doctor's patients
+        patients_query = Patient.query.filter(Patient.doctor_id == doctor_id)
+
+        if search_name:
+            patients_query = patients_query.filter(patient_name_filter(search_name))
+
+        if gender_filter in {g.value for g in GenderEnum}:
+            patients_query = patients_query.filter(
+                Patient.gender == GenderEnum(gender_filter)
             )
 
-        # Calculate patients with medical history
-        patients_with_history = sum(1 for p in patients if p.medical_history_count > 0)
+        if age_filter in AGE_GROUPS:
+            patients_query = patients_query.filter(age_group_filter(age_filter))
 
-        stats = {
-            "total_patients": total_patients,
-            "male_patients": male_patients,
-            "female_patients": female_patients,
-            "other_patients": other_patients,
-            "age_groups": age_groups,
-            "patients_with_history": patients_with_history,
-        }
+        # Fetch only the requested page, seeking on (last_name, first_name, id)
+        sort_columns = [Patient.last_name, Patient.first_name, Patient.id]
+        try:
+            page = keyset_paginate(
+                patients_query,
+                sort_columns,
+                per_page=PATIENTS_PER_PAGE,
+                after=request.args.get("after"),
+                before=request.args.get("before"),
+            )
+        except ValueError:
+            flash("Invalid page link. Showing the first page.", "warning")
+            page = keyset_paginate(
+                patients_query, sort_columns, per_page=PATIENTS_PER_PAGE
+            )
+        patients = page.items
+
+        # Get appointment, lab result, radiology and medical history counts
+        # for the patients on this page in one grouped query
+        attach_activity_counts(patients)
 
-        return render_template("patients.html", patients=patients, stats=stats)
+        # Get the three most recent medical histories (with allergy), lab
+        # results and imaging for every patient on the page
+        attach_recent_records(patients, limit=3)
+
+        # Statistics cover all of the doctor's patients, not just this page
+        stats = patient_demographics(doctor_id)
+
+        return render_template(
+            "patients.html",
+            patients=patients,
+            page=page,
+            stats=stats,
+            filters=filters,
+            age_groups=AGE_GROUPS,
+        )
 
     except Exception as e:
         flash(f"Error loading patients: {str(e)}", "error")
@@ -888,10 +1055,21 @@ def delete_patient(patient_id):
         # Delete medical history
         MedicalHistory.query.filter_by(patient_id=patient.id).delete()
 
+        # Radiology records go with the patient; drop their image references
+        orphaned_files = [
+            imaging.image_filename
+            for imaging in patient.radiology_imaging
+            if imaging.image_filename and release_blob(imaging.image_filename)
+        ]
+
         # Delete patient
         db.session.delete(patient)
         db.session.commit()
 
+        # Remove the images nothing else references, off the request path
+        for image_filename in orphaned_files:
+            delete_image_file(image_filename)
+
         flash(
             f"Patient {patient_name} and all related records deleted successfully!",
             "success",
@@ -914,48 +1092,69 @@ def view_appointments():
 
     doctor_id = session.get("doctor_id")
 
+    # Get search and filter parameters
+    search_name = request.args.get("search", "").strip()
+    status_filter = request.args.get("status", "").strip().lower()
+    time_filter = request.args.get("time", "").strip().lower()
+    filters = {
+        "search": search_name,
+        "status": status_filter,
+        "time": time_filter,
+    }
+
     try:
-        # Get all appointments for this doctor
-        appointments = (
-            Appointment.query.filter_by(doctor_id=doctor_id)
+        # Build filtered query for this doctor's appointments
+        appointments_query = (
+            Appointment.query.filter(Appointment.doctor_id == doctor_id)
             .join(Patient)
-            .order_by(Appointment.date.desc())
-            .all()
+            .options(db.contains_eager(Appointment.patient))
         )
 
-        # Get statistics
-        total_appointments = len(appointments)
-        upcoming_appointments = len(
-            [a for a in appointments if a.date > datetime.now()]
-        )
-        completed_appointments = len(
-            [a for a in appointments if a.status == AppointmentStatusEnum.COMPLETED]
-        )
+        if search_name:
+            appointments_query = appointments_query.filter(
+                patient_name_filter(search_name)
+            )
 
-        # Get appointments by status
-        scheduled = len(
-            [a for a in appointments if a.status == AppointmentStatusEnum.SCHEDULED]
-        )
-        cancelled = len(
-            [a for a in appointments if a.status == AppointmentStatusEnum.CANCELLED]
-        )
-        no_show = len(
-            [a for a in appointments if a.status == AppointmentStatusEnum.NO_SHOW]
-        )
+        if status_filter in {e.value for e in AppointmentStatusEnum}:
+            appointments_query = appointments_query.filter(
+                Appointment.status == AppointmentStatusEnum(status_filter)
+            )
 
-        stats = {
-            "total_appointments": total_appointments,
-            "upcoming_appointments": upcoming_appointments,
-            "completed_appointments": completed_appointments,
-            "scheduled_appointments": scheduled,
-            "cancelled_appointments": cancelled,
-            "no_show_appointments": no_show,
-        }
+        if time_filter in TIME_WINDOWS:
+            appointments_query = appointments_query.filter(
+                time_window_filter(time_filter)
+            )
+
+        # Fetch only the requested page, newest first
+        sort_columns = [Appointment.date, Appointment.id]
+        try:
+            page = keyset_paginate(
+                appointments_query,
+                sort_columns,
+                per_page=APPOINTMENTS_PER_PAGE,
+                after=request.args.get("after"),
+                before=request.args.get("before"),
+                descending=True,
+            )
+        except ValueError:
+            flash("Invalid page link. Showing the first page.", "warning")
+            page = keyset_paginate(
+                appointments_query,
+                sort_columns,
+                per_page=APPOINTMENTS_PER_PAGE,
+                descending=True,
+            )
+
+        # Statistics cover all of the doctor's appointments, not just this page
+        stats = appointment_stats(doctor_id)
 
         return render_template(
             "appointments.html",
-            appointments=appointments,
+            appointments=page.items,
+            page=page,
             stats=stats,
+            filters=filters,
+            time_windows=TIME_WINDOWS,
             datetime=datetime,
         )
 
@@ -986,6 +1185,7 @@ def schedule_appointment():
                 .replace("-", "_")
             )
             notes = request.form.get("notes", "").strip()
+            duration = request.form.get("duration_minutes", "").strip()
 
             # Validation
             errors = []
@@ -995,6 +1195,26 @@ def schedule_appointment():
                 errors.append("Appointment date is required")
             if not appointment_time:
                 errors.append("Appointment time is required")
+            duration_minutes = parse_duration(duration, errors)
+
+            # Optional recurrence: every N days/weeks until a date
+            repeat_every = request.form.get("repeat_every", "").strip()
+            repeat_unit = request.form.get("repeat_unit", "weeks").strip().lower()
+            repeat_until = request.form.get("repeat_until", "").strip()
+            if repeat_every:
+                if not repeat_every.isdigit() or int(repeat_every) < 1:
+                    errors.append("Repeat interval must be a positive number")
+                if repeat_unit not in REPEAT_UNITS:
+                    errors.append("Invalid repeat unit")
+                if not repeat_until:
+                    errors.append("Repeat end date is required for a series")
+                else:
+                    try:
+                        repeat_until = datetime.strptime(
+                            repeat_until, "%Y-%m-%d"
+                        ).date()
+                    except ValueError:
+                        errors.append("Invalid repeat end date")
 
             # Check if patient belongs to this doctor
             if patient_id:
@@ -1018,13 +1238,36 @@ def schedule_appointment():
                 f"{appointment_date} {appointment_time}", "%Y-%m-%d %H:%M"
             )
 
-            # Check for existing appointment at same time
-            existing_appointment = Appointment.query.filter_by(
-                doctor_id=doctor_id, date=appointment_datetime
-            ).first()
+            if repeat_every:
+                try:
+                    starts = expand_series(
+                        appointment_datetime,
+                        int(repeat_every),
+                        repeat_unit,
+                        repeat_until,
+                    )
+                except ValueError as e:
+                    flash(str(e), "error")
+                    patients = (
+                        Patient.query.filter_by(doctor_id=doctor_id)
+                        .order_by(Patient.last_name)
+                        .all()
+                    )
+                    return render_template(
+                        "schedule_appointment.html", patients=patients
+                    )
+                return schedule_appointment_series(
+                    doctor_id,
+                    patient,
+                    starts,
+                    duration_minutes,
+                    AppointmentTypeEnum(appointment_type) if appointment_type else None,
+                    notes if notes else None,
+                )
 
-            if existing_appointment:
-                flash("You already have an appointment at this date and time.", "error")
+            # Check for overlapping appointments
+            if has_conflict(doctor_id, appointment_datetime, duration_minutes):
+                flash("You already have an appointment during this time.", "error")
                 patients = (
                     Patient.query.filter_by(doctor_id=doctor_id)
                     .order_by(Patient.last_name)
@@ -1037,6 +1280,7 @@ def schedule_appointment():
                 patient_id=int(patient_id),
                 doctor_id=doctor_id,
                 date=appointment_datetime,
+                duration_minutes=duration_minutes,
                 status=AppointmentStatusEnum.SCHEDULED,
                 appointment_type=(
                     AppointmentTypeEnum(appointment_type) if appointment_type else None
@@ -1081,6 +1325,158 @@ def schedule_appointment():
     )
 
 
+def schedule_appointment_series(
+    doctor_id, patient, starts, duration_minutes, appointment_type, notes
+):
+    """Book every conflict-free occurrence of a series in one transaction"""
+    accepted, skipped = [], []
+    if starts:
+        accepted, skipped = plan_series(doctor_id, starts, duration_minutes)
+
+    if not accepted:
+        flash("No occurrences of this series could be scheduled.", "error")
+        for start in skipped:
+            flash(f'Conflict: {start.strftime("%Y-%m-%d at %H:%M")}', "warning")
+        patients = (
+            Patient.query.filter_by(doctor_id=doctor_id)
+            .order_by(Patient.last_name)
+            .all()
+        )
+        return render_template("schedule_appointment.html", patients=patients)
+
+    # One multi-row INSERT for the whole series
+    series_id = str(uuid.uuid4())
+    db.session.execute(
+        db.insert(Appointment),
+        [
+            {
+                "patient_id": patient.id,
+                "doctor_id": doctor_id,
+                "date": start,
+                "duration_minutes": duration_minutes,
+                "status": AppointmentStatusEnum.SCHEDULED,
+                "appointment_type": appointment_type,
+                "notes": notes,
+                "series_id": series_id,
+            }
+            for start in accepted
+        ],
+    )
+    db.session.commit()
+
+    flash(
+        f"{len(accepted)} appointments scheduled for "
+        f"{patient.first_name} {patient.last_name}!",
+        "success",
+    )
+    flash(
+        f'From {accepted[0].strftime("%Y-%m-%d")} to '
+        f'{accepted[-1].strftime("%Y-%m-%d")} at {accepted[0].strftime("%H:%M")}',
+        "info",
+    )
+    if skipped:
+        flash(
+            "Skipped because of conflicts: "
+            + ", ".join(start.strftime("%Y-%m-%d %H:%M") for start in skipped),
+            "warning",
+        )
+    return redirect(url_for("view_appointments"))
+
+
+@app.route("/api/availability")
+def appointment_availability():
+    """Free slots and busy intervals for the logged-in doctor as JSON"""
+    if not session.get("logged_in"):
+        return jsonify({"error": "Authentication required"}), 401
+
+    doctor_id = session.get("doctor_id")
+
+    try:
+        first_day = datetime.strptime(
+            request.args.get("start", date.today().isoformat()), "%Y-%m-%d"
+        ).date()
+        last_day = datetime.strptime(
+            request.args.get("end", first_day.isoformat()), "%Y-%m-%d"
+        ).date()
+        duration_minutes = int(
+            request.args.get("duration", DEFAULT_DURATION_MINUTES)
+        )
+    except ValueError:
+        return jsonify({"error": "Invalid start, end or duration"}), 400
+
+    if last_day < first_day or (last_day - first_day).days > 31:
+        return jsonify({"error": "Date range must span 0 to 31 days"}), 400
+    if not 5 <= duration_minutes <= MAX_DURATION_MINUTES:
+        return jsonify({"error": "Invalid duration"}), 400
+
+    window_start = datetime.combine(first_day, datetime.min.time())
+    window_end = datetime.combine(last_day, datetime.min.time()) + timedelta(days=1)
+    schedule = load_schedule(doctor_id, window_start, window_end)
+
+    slots = free_slots(
+        schedule,
+        first_day,
+        last_day,
+        duration_minutes,
+        app.config["CLINIC_OPEN_HOUR"],
+        app.config["CLINIC_CLOSE_HOUR"],
+        not_before=datetime.now(),
+    )
+
+    return jsonify(
+        {
+            "start": first_day.isoformat(),
+            "end": last_day.isoformat(),
+            "duration_minutes": duration_minutes,
+            "busy": [
+                {"start": start.isoformat(), "end": end.isoformat()}
+                for start, end in schedule.busy(window_start, window_end)
+            ],
+            "free_slots": [slot.isoformat() for slot in slots],
+        }
+    )
+
+
+@app.route("/calendar/<token>.ics")
+def calendar_feed(token):
+    """Tokenized iCalendar feed of a doctor's appointments for calendar clients"""
+    # Calendar clients keep polling the same URL, so the link lives until the
+    # doctor regenerates it
+    doctor = Doctor.query.filter_by(calendar_feed_secret=token).first()
+    if not doctor:
+        return "Invalid calendar link.", 404
+    doctor_id = doctor.id
+
+    since = feed_window_start()
+    etag, last_modified = feed_validators(doctor_id, since)
+    if last_modified:
+        # updated_at is stored as naive UTC; HTTP dates have 1s resolution
+        last_modified = last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains(etag)
+    else:
+        not_modified = bool(
+            last_modified
+            and request.if_modified_since
+            and last_modified <= request.if_modified_since
+        )
+
+    if not_modified:
+        response = Response(status=304)
+    else:
+        response = Response(
+            stream_with_context(generate_calendar(doctor_id, since, request.host)),
+            mimetype="text/calendar",
+        )
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.max_age = 300
+    return response
+
+
 @app.route("/view_appointment/<int:appointment_id>")
 def view_appointment(appointment_id):
     """View a specific appointment"""
@@ -1144,6 +1540,7 @@ def edit_appointment(appointment_id):
                 .replace("-", "_")
             )
             notes = request.form.get("notes", "").strip()
+            duration = request.form.get("duration_minutes", "").strip()
 
             # Validation
             errors = []
@@ -1153,6 +1550,11 @@ def edit_appointment(appointment_id):
                 errors.append("Appointment time is required")
             if not status:
                 errors.append("Status is required")
+            duration_minutes = (
+                parse_duration(duration, errors)
+                if duration
+                else appointment.duration_minutes
+            )
 
             if errors:
                 for error in errors:
@@ -1174,18 +1576,16 @@ def edit_appointment(appointment_id):
                 f"{appointment_date} {appointment_time}", "%Y-%m-%d %H:%M"
             )
 
-            # Check for existing appointment at same time (excluding current appointment)
-            existing_appointment = (
-                Appointment.query.filter_by(
-                    doctor_id=doctor_id, date=appointment_datetime
-                )
-                .filter(Appointment.id != appointment_id)
-                .first()
-            )
-
-            if existing_appointment:
+            # Check for overlapping appointments (excluding current appointment)
+            new_status = AppointmentStatusEnum(status)
+            if new_status in BLOCKING_STATUSES and has_conflict(
+                doctor_id,
+                appointment_datetime,
+                duration_minutes,
+                exclude_id=appointment_id,
+            ):
                 flash(
-                    "You already have another appointment at this date and time.",
+                    "You already have another appointment during this time.",
                     "error",
                 )
                 patients = (
@@ -1202,9 +1602,8 @@ def edit_appointment(appointment_id):
 
             # Update appointment
             appointment.date = appointment_datetime
-            appointment.status = (
-                AppointmentStatusEnum(status) if status else appointment.status
-            )
+            appointment.duration_minutes = duration_minutes
+            appointment.status = new_status
             appointment.appointment_type = (
                 AppointmentTypeEnum(appointment_type)
                 if appointment_type
@@ -1296,35 +1695,75 @@ def view_lab_results():
 
     doctor_id = session.get("doctor_id")
 
+    # Get search and filter parameters
+    search = request.args.get("search", "").strip()
+    test_filter = request.args.get("test", "").strip()
+    date_filter = request.args.get("date", "").strip().lower()
+    filters = {
+        "search": search,
+        "test": test_filter,
+        "date": date_filter,
+    }
+
     try:
-        # Get all lab results for patients of this doctor
-        lab_results_query = (
-            db.session.query(LaboratoryResult, Patient)
-            .join(Patient, LaboratoryResult.patient_id == Patient.id)
-            .filter(Patient.doctor_id == doctor_id)
-            .order_by(LaboratoryResult.date.desc())
-        )
+        # Build filtered query for lab results of this doctor's patients.
+        # STRAIGHT_JOIN keeps laboratory_result as the driving table on MySQL,
+        # so a page is read newest first off ix_lab_result_date_id, checking
+        # each row's patient by primary key, and the scan stops once the page
+        # is full; otherwise MySQL starts from the doctor's patients and sorts
+        # all of their results on every page.
+        lab_results_query = doctor_lab_results(
+            doctor_id, LaboratoryResult, Patient
+        ).prefix_with("STRAIGHT_JOIN", dialect="mysql")
+
+        if search:
+            lab_results_query = lab_results_query.filter(lab_search_filter(search))
+
+        if test_filter:
+            lab_results_query = lab_results_query.filter(
+                LaboratoryResult.test_name == test_filter
+            )
 
-        lab_results = lab_results_query.all()
+        if date_filter in LAB_DATE_WINDOWS:
+            lab_results_query = lab_results_query.filter(lab_date_filter(date_filter))
 
-        # Get statistics
-        total_results = len(lab_results)
-        recent_results = len(
-            [lr for lr, p in lab_results if (datetime.now() - lr.date).days <= 7]
-        )
+        # Fetch only the requested page, newest first
+        sort_columns = [LaboratoryResult.date, LaboratoryResult.id]
 
-        # Get unique test types
-        test_types = set([lr.test_name for lr, p in lab_results])
+        def sort_key(row):
+            return row[0].date, row[0].id
 
-        stats = {
-            "total_results": total_results,
-            "recent_results": recent_results,
-            "test_types_count": len(test_types),
-            "test_types": sorted(list(test_types)),
-        }
+        try:
+            page = keyset_paginate(
+                lab_results_query,
+                sort_columns,
+                per_page=LAB_RESULTS_PER_PAGE,
+                after=request.args.get("after"),
+                before=request.args.get("before"),
+                descending=True,
+                key=sort_key,
+            )
+        except ValueError:
+            flash("Invalid page link. Showing the first page.", "warning")
+            page = keyset_paginate(
+                lab_results_query,
+                sort_columns,
+                per_page=LAB_RESULTS_PER_PAGE,
+                descending=True,
+                key=sort_key,
+            )
+
+        # Statistics cover all of the doctor's lab results, not just this page
+        stats = lab_result_stats(doctor_id)
 
         return render_template(
-            "lab_results.html", lab_results=lab_results, stats=stats, datetime=datetime
+            "lab_results.html",
+            lab_results=page.items,
+            page=page,
+            stats=stats,
+            filters=filters,
+            date_windows=LAB_DATE_WINDOWS,
+            datetime=datetime,
         )
 
     except Exception as e:
@@ -1333,6 +1772,110 @@ def view_lab_results():
         return redirect(url_for("dashboard"))
 
 
+@app.route("/api/patients/<int:patient_id>/lab_trend")
+def lab_trend(patient_id):
+    """History of one lab test for a patient as JSON, downsampled for charts"""
+    if not session.get("logged_in"):
+        return jsonify({"error": "Authentication required"}), 401
+
+    doctor_id = session.get("doctor_id")
+    patient = Patient.query.filter_by(id=patient_id, doctor_id=doctor_id).first()
+    if not patient:
+        return jsonify({"error": "Patient not found"}), 404
+
+    test_name = request.args.get("test", "").strip()
+    method = request.args.get("method", "lttb").strip().lower()
+    try:
+        max_points = int(request.args.get("points", DEFAULT_TREND_POINTS))
+        window = int(request.args.get("window", DEFAULT_ROLLING_WINDOW))
+        since = request.args.get("since", "").strip()
+        since = datetime.strptime(since, "%Y-%m-%d") if since else None
+    except ValueError:
+        return jsonify({"error": "Invalid points, window or since"}), 400
+
+    if not test_name:
+        return jsonify({"error": "A test name is required"}), 400
+    if method not in DOWNSAMPLE_METHODS:
+        return jsonify({"error": "Invalid downsampling method"}), 400
+    if not 3 <= max_points <= MAX_TREND_POINTS or window < 1:
+        return jsonify({"error": "Invalid points or window"}), 400
+
+    points = lab_series(patient_id, test_name, since)
+    unit = (
+        db.session.query(LaboratoryResult.unit)
+        .filter(
+            LaboratoryResult.patient_id == patient_id,
+            LaboratoryResult.test_name == test_name,
+        )
+        .order_by(LaboratoryResult.date.desc())
+        .limit(1)
+        .scalar()
+    )
+
+    x, y = series_arrays(points)
+    # Statistics come from the full series; only the output is thinned out
+    smoothed = rolling_mean(y, window)
+    keep = downsample(x, y, max_points, method)
+
+    return jsonify(
+        {
+            "patient_id": patient_id,
+            "test_name": test_name,
+            "unit": unit,
+            "method": method,
+            "total_points": len(points),
+            "returned_points": len(keep),
+            "rolling_window": window,
+            "slope_per_day": slope_per_day(x, y),
+            "points": [
+                {
+                    "date": points[i][0].isoformat(),
+                    "value": points[i][1],
+                    "rolling_mean": round(float(smoothed[i]), 4),
+                }
+                for i in keep.tolist()
+            ],
+        }
+    )
+
+
+@app.route("/import_lab_results", methods=["GET", "POST"])
+def import_lab_results_upload():
+    """Bulk import lab results from a CSV or HL7 file"""
+    if not session.get("logged_in"):
+        flash("Please log in to access this page.", "error")
+        return redirect(url_for("login"))
+
+    doctor_id = session.get("doctor_id")
+    report = None
+
+    if request.method == "POST":
+        upload = request.files.get("file")
+        file_format = request.form.get("format", "").strip().lower()
+
+        if not upload or not upload.filename:
+            flash("Please choose a file to import", "error")
+            return render_template("import_lab_results.html", report=None)
+
+        if file_format not in IMPORT_FORMATS:
+            file_format = detect_format(upload.filename)
+
+        try:
+            # Decode the upload lazily; rows are parsed as they are read
+            lines = io.TextIOWrapper(upload.stream, encoding="utf-8-sig", newline="")
+            report = import_lab_results(lines, file_format, doctor_id=doctor_id)
+            flash(
+                f"Imported {report.imported} lab results "
+                f"({report.rejected} rejected) in {report.elapsed:.1f}s",
+                "success" if not report.rejected else "warning",
+            )
+        except Exception as e:
+            db.session.rollback()
+            flash(f"Error importing lab results: {str(e)}", "error")
+
+    return render_template("import_lab_results.html", report=report)
+
+
 @app.route("/add_lab_result", methods=["GET", "POST"])
 def add_lab_result():
     # Check if user is logged in
@@ -1402,15 +1945,23 @@ def add_lab_result():
                     )
                     return render_template("add_lab_result.html", patients=patients)
 
+            # Derive the status from the reference range unless one was chosen
+            result_value = parse_result_value(result)
+            if status:
+                status = LabResultStatusEnum(status)
+            else:
+                status = classify_result(result_value, reference_range, test_name, unit)
+
             # Create new lab result
             new_lab_result = LaboratoryResult(
                 patient_id=int(patient_id),
                 test_name=test_name,
                 date=test_datetime,
                 result=result,
+                result_value=result_value,
                 unit=unit if unit else None,
                 reference_range=reference_range if reference_range else None,
-                status=LabResultStatusEnum(status) if status else None,
+                status=status,
                 notes=notes if notes else None,
             )
 
@@ -1499,15 +2050,27 @@ def edit_lab_result(lab_result_id):
             if errors:
                 for error in errors:
                     flash(error, "error")
-                return render_template("edit_lab_result.html", lab_result=lab_result)
+                return render_template(
+                    "edit_lab_result.html",
+                    lab_result=lab_result,
+                    status_is_derived=status_is_derived(lab_result),
+                )
 
             # Update lab result
             lab_result.test_name = test_name
             lab_result.result = result
+            lab_result.result_value = parse_result_value(result)
             lab_result.date = test_date
             lab_result.unit = unit
             lab_result.reference_range = reference_range
-            lab_result.status = LabResultStatusEnum(status) if status else None
+            # Derive the status from the reference range unless one was chosen
+            lab_result.status = (
+                LabResultStatusEnum(status)
+                if status
+                else classify_result(
+                    lab_result.result_value, reference_range, test_name, unit
+                )
+            )
             lab_result.notes = notes if notes else None
 
             db.session.commit()
@@ -1518,13 +2081,42 @@ def edit_lab_result(lab_result_id):
             return redirect(url_for("view_lab_results"))
 
         # GET request - show edit form
-        return render_template("edit_lab_result.html", lab_result=lab_result)
+        return render_template(
+            "edit_lab_result.html",
+            lab_result=lab_result,
+            status_is_derived=status_is_derived(lab_result),
+        )
 
     except Exception as e:
         db.session.rollback()
         flash(f"Error updating lab result: {str(e)}", "error")
 
-    return render_template("edit_lab_result.html", lab_result=lab_result)
+    return render_template(
+        "edit_lab_result.html",
+        lab_result=lab_result,
+        status_is_derived=status_is_derived(lab_result),
+    )
+
+
+@app.route("/acknowledge_lab_result/<int:lab_result_id>", methods=["POST"])
+def acknowledge_lab_result(lab_result_id):
+    """Acknowledge a critical lab result so it leaves the alert queue"""
+    if not session.get("logged_in"):
+        flash("Please log in to access this page.", "error")
+        return redirect(url_for("login"))
+
+    doctor_id = session.get("doctor_id")
+
+    try:
+        if acknowledge_alert(lab_result_id, doctor_id):
+            flash("Critical result acknowledged.", "success")
+        else:
+            flash("Alert not found or already acknowledged.", "error")
+    except Exception as e:
+        db.session.rollback()
+        flash(f"Error acknowledging lab result: {str(e)}", "error")
+
+    return redirect(url_for("dashboard"))
 
 
 @app.route("/delete_lab_result/<int:lab_result_id>", methods=["POST"])
@@ -1719,7 +2311,36 @@ def doctor_profile():
         flash("Doctor profile not found.", "error")
         return redirect(url_for("dashboard"))
 
-    return render_template("doctor_profile.html", doctor=doctor)
+    if not doctor.calendar_feed_secret:
+        doctor.calendar_feed_secret = new_feed_secret()
+        db.session.commit()
+    calendar_feed_url = url_for(
+        "calendar_feed", token=doctor.calendar_feed_secret, _external=True
+    )
+    return render_template(
+        "doctor_profile.html", doctor=doctor, calendar_feed_url=calendar_feed_url
+    )
+
+
+@app.route("/regenerate_calendar_feed", methods=["POST"])
+def regenerate_calendar_feed():
+    """Replace the calendar feed link; the old one stops working at once"""
+    if "logged_in" not in session:
+        return redirect(url_for("login"))
+
+    try:
+        doctor = Doctor.query.get(session["doctor_id"])
+        doctor.calendar_feed_secret = new_feed_secret()
+        db.session.commit()
+        flash(
+            "Calendar link regenerated. Subscribe again with the new link; "
+            "the old one no longer works.",
+            "success",
+        )
+    except Exception as e:
+        db.session.rollback()
+        flash(f"Error regenerating calendar link: {str(e)}", "error")
+    return redirect(url_for("doctor_profile"))
 
 
 @app.route("/add_doctor", methods=["GET", "POST"])
@@ -2007,7 +2628,7 @@ def add_radiology_imaging():
             # Handle file upload if present
             image_filename = None
             if image_file and image_file.filename != "":
-                image_filename = save_uploaded_file(image_file, int(patient_id))
+                image_filename = save_uploaded_file(image_file)
                 if not image_filename:
                     errors.append("Failed to save uploaded image")
                     for error in errors:
@@ -2028,6 +2649,8 @@ def add_radiology_imaging():
                 date=imaging_datetime,
                 image_filename=image_filename,
             )
+            # DICOM uploads get their header tags indexed for searching
+            index_dicom(new_imaging)
 
             db.session.add(new_imaging)
             db.session.commit()
@@ -2055,6 +2678,251 @@ def add_radiology_imaging():
     )
 
 
+@app.route("/add_radiology_batch", methods=["GET", "POST"])
+def add_radiology_batch():
+    """Upload a whole study of images for one patient in one post"""
+    if not session.get("logged_in"):
+        flash("Please log in to access this page.", "error")
+        return redirect(url_for("login"))
+
+    doctor_id = session.get("doctor_id")
+    patients = (
+        Patient.query.filter_by(doctor_id=doctor_id).order_by(Patient.last_name).all()
+    )
+    report = None
+
+    if request.method == "POST":
+        patient_id = request.form.get("patient_id", "").strip()
+        imaging_name = request.form.get("imaging_name", "").strip()
+        imaging_date = request.form.get("imaging_date", "").strip()
+        uploads = [
+            upload
+            for upload in request.files.getlist("image_files")
+            if upload and upload.filename
+        ]
+
+        # Validation
+        errors = []
+        patient = None
+        if patient_id:
+            patient = Patient.query.filter_by(id=patient_id, doctor_id=doctor_id).first()
+        if not patient:
+            errors.append("Please select a patient")
+        try:
+            imaging_datetime = datetime.strptime(imaging_date, "%Y-%m-%dT%H:%M")
+        except ValueError:
+            errors.append("Imaging date is required")
+        if not uploads:
+            errors.append("Please choose at least one image")
+        elif len(uploads) > MAX_BATCH_FILES:
+            errors.append(f"At most {MAX_BATCH_FILES} files can be uploaded at once")
+
+        # Unsupported types are reported per file rather than failing the batch
+        accepted = [upload for upload in uploads if allowed_file(upload.filename)]
+        unsupported = [
+            upload.filename for upload in uploads if not allowed_file(upload.filename)
+        ]
+        if errors:
+            for error in errors:
+                flash(error, "error")
+            return render_template(
+                "add_radiology_batch.html",
+                patients=patients,
+                report=None,
+                max_files=MAX_BATCH_FILES,
+            )
+
+        try:
+            report = save_batch(
+                app,
+                patient.id,
+                imaging_name,
+                imaging_datetime,
+                accepted,
+                max_size=MAX_FILE_SIZE,
+            )
+            for filename in unsupported:
+                report.add(filename, error="Unsupported file type")
+            flash(
+                f"Added {report.saved} images for {patient.first_name} "
+                f"{patient.last_name} ({report.failed} failed) "
+                f"in {report.elapsed:.1f}s",
+                "success" if not report.failed else "warning",
+            )
+        except Exception as e:
+            db.session.rollback()
+            flash(f"Error uploading radiology images: {str(e)}", "error")
+
+    return render_template(
+        "add_radiology_batch.html",
+        patients=patients,
+        report=report,
+        max_files=MAX_BATCH_FILES,
+    )
+
+
+def tus_response(status=204, headers=None, error=None):
+    """Resumable upload response carrying the protocol version header"""
+    if error:
+        response = jsonify({"error": error})
+        response.status_code = status
+    else:
+        response = Response(status=status)
+    response.headers["Tus-Resumable"] = TUS_VERSION
+    for name, value in (headers or {}).items():
+        response.headers[name] = str(value)
+    return response
+
+
+@app.route("/radiology_uploads", methods=["OPTIONS", "POST"])
+def create_radiology_upload():
+    """Start a resumable upload of one large radiology image.
+
+    Speaks the tus 1.0 core protocol with the creation and termination
+    extensions. Upload-Metadata carries filename, patient_id, imaging_name
+    and imaging_date; the record is created when the last chunk arrives.
+    """
+    max_size = app.config["RADIOLOGY_UPLOAD_MAX_SIZE"]
+    if request.method == "OPTIONS":
+        return tus_response(
+            204,
+            {
+                "Tus-Version": TUS_VERSION,
+                "Tus-Extension": TUS_EXTENSIONS,
+                "Tus-Max-Size": max_size,
+            },
+        )
+
+    if not session.get("logged_in"):
+        return tus_response(401, error="Authentication required")
+    if request.headers.get("Tus-Resumable") != TUS_VERSION:
+        return tus_response(
+            412, {"Tus-Version": TUS_VERSION}, error="Unsupported protocol version"
+        )
+
+    doctor_id = session.get("doctor_id")
+    try:
+        upload_length = int(request.headers.get("Upload-Length", ""))
+    except ValueError:
+        return tus_response(400, error="Invalid Upload-Length")
+    try:
+        metadata = parse_metadata(request.headers.get("Upload-Metadata"))
+    except UploadError as e:
+        return tus_response(400, error=str(e))
+
+    if upload_length > max_size:
+        return tus_response(413, {"Tus-Max-Size": max_size}, error="File too large")
+
+    # Validation
+    errors = []
+    filename = metadata.get("filename", "")
+    imaging_name = metadata.get("imaging_name", "").strip()
+    patient = Patient.query.filter_by(
+        id=metadata.get("patient_id"), doctor_id=doctor_id
+    ).first()
+    if upload_length <= 0:
+        errors.append("File is empty")
+    if not allowed_file(filename):
+        errors.append(
+            "Invalid file type. Allowed formats: PNG, JPG, JPEG, GIF, BMP, TIFF, DCM, DICOM"
+        )
+    if not patient:
+        errors.append("Invalid patient selection")
+    if not imaging_name:
+        errors.append("Imaging name is required")
+    try:
+        imaging_datetime = datetime.strptime(
+            metadata.get("imaging_date", ""), "%Y-%m-%dT%H:%M"
+        )
+    except ValueError:
+        errors.append("Invalid date format")
+    if errors:
+        return tus_response(400, error="; ".join(errors))
+
+    try:
+        upload = create_upload(
+            doctor_id,
+            patient.id,
+            imaging_name[:100],
+            imaging_datetime,
+            filename,
+            upload_length,
+        )
+    except Exception as e:
+        db.session.rollback()
+        return tus_response(500, error=f"Error starting upload: {str(e)}")
+
+    return tus_response(
+        201,
+        {
+            "Location": url_for("radiology_upload", upload_id=upload.id),
+            "Upload-Offset": 0,
+        },
+    )
+
+
+@app.route("/radiology_uploads/<upload_id>", methods=["HEAD", "PATCH", "DELETE"])
+def radiology_upload(upload_id):
+    """Report, append to or cancel a resumable upload"""
+    if not session.get("logged_in"):
+        return tus_response(401, error="Authentication required")
+    if request.headers.get("Tus-Resumable") != TUS_VERSION:
+        return tus_response(
+            412, {"Tus-Version": TUS_VERSION}, error="Unsupported protocol version"
+        )
+
+    doctor_id = session.get("doctor_id")
+    upload = RadiologyUpload.query.filter_by(id=upload_id, doctor_id=doctor_id).first()
+    if not upload:
+        return tus_response(404, error="Upload not found")
+
+    if request.method == "HEAD":
+        # Clients resume from this offset after an interruption
+        return tus_response(
+            200,
+            {
+                "Upload-Offset": upload_offset(upload.id),
+                "Upload-Length": upload.upload_length,
+                "Cache-Control": "no-store",
+            },
+        )
+
+    if request.method == "DELETE":
+        discard_upload(upload)
+        return tus_response(204)
+
+    if request.mimetype != CHUNK_CONTENT_TYPE:
+        return tus_response(415, error=f"Content-Type must be {CHUNK_CONTENT_TYPE}")
+    try:
+        offset = int(request.headers.get("Upload-Offset", ""))
+    except ValueError:
+        return tus_response(400, error="Invalid Upload-Offset")
+    length = request.content_length
+    if length is None:
+        return tus_response(411, error="Content-Length is required")
+    if offset + length > upload.upload_length:
+        return tus_response(400, error="Chunk would exceed Upload-Length")
+
+    try:
+        new_offset = append_chunk(upload, offset, request.stream, length)
+    except UploadError as e:
+        return tus_response(
+            409, {"Upload-Offset": upload_offset(upload.id)}, error=str(e)
+        )
+
+    headers = {"Upload-Offset": new_offset}
+    if new_offset == upload.upload_length:
+        try:
+            imaging = finish_upload(upload)
+        except UploadError as e:
+            return tus_response(422, error=str(e))
+        except Exception as e:
+            db.session.rollback()
+            return tus_response(500, error=f"Error saving upload: {str(e)}")
+        headers["Radiology-Imaging-Id"] = imaging.id
+    return tus_response(204, headers)
+
+
 @app.route("/view_radiology_imaging")
 def view_radiology_imaging():
     """View all radiology imaging records"""
@@ -2067,34 +2935,116 @@ def view_radiology_imaging():
     # Get search parameters
     search_patient = request.args.get("search_patient", "").strip()
     search_imaging = request.args.get("search_imaging", "").strip()
-
-    # Build query
+    filters = {
+        "search_patient": search_patient,
+        "search_imaging": search_imaging,
+        "modality": request.args.get("modality", "").strip().upper(),
+        "study_from": request.args.get("study_from", "").strip(),
+        "study_to": request.args.get("study_to", "").strip(),
+        "description": request.args.get("description", "").strip(),
+    }
+
+    # Name searches go through the trigram index and are ranked by relevance
+    relevance = None
+    if search_patient:
+        relevance = search_rank("patient", search_patient)
+    if search_imaging:
+        rank = search_rank("imaging", search_imaging)
+        relevance = rank if relevance is None else relevance + rank
+    columns = [RadiologyImaging]
+    if relevance is not None:
+        relevance = relevance.label("relevance")
+        columns.append(relevance)
+
+    # Build query; patients and DICOM metadata load in the same statement
     query = (
-        db.session.query(RadiologyImaging)
+        db.session.query(*columns)
         .join(Patient)
+        .outerjoin(DicomMetadata)
+        .options(
+            db.contains_eager(RadiologyImaging.patient),
+            db.contains_eager(RadiologyImaging.dicom_metadata),
+        )
         .filter(Patient.doctor_id == doctor_id)
     )
 
     # Apply filters
     if search_patient:
+        query = query.filter(search_filter("patient", search_patient))
+
+    if search_imaging:
+        query = query.filter(search_filter("imaging", search_imaging))
+
+    # DICOM filters read the indexed header table, never the files
+    if filters["modality"]:
+        query = query.filter(DicomMetadata.modality == filters["modality"])
+
+    for key in ("study_from", "study_to"):
+        if not filters[key]:
+            continue
+        try:
+            study_date = datetime.strptime(filters[key], "%Y-%m-%d").date()
+        except ValueError:
+            flash("Invalid study date", "error")
+            filters[key] = ""
+            continue
+        if key == "study_from":
+            query = query.filter(DicomMetadata.study_date >= study_date)
+        else:
+            query = query.filter(DicomMetadata.study_date <= study_date)
+
+    if filters["description"]:
+        pattern = f"%{escape_like(filters['description'])}%"
         query = query.filter(
             db.or_(
-                Patient.first_name.ilike(f"%{search_patient}%"),
-                Patient.last_name.ilike(f"%{search_patient}%"),
+                DicomMetadata.study_description.ilike(pattern, escape="\\"),
+                DicomMetadata.series_description.ilike(pattern, escape="\\"),
+                DicomMetadata.body_part.ilike(pattern, escape="\\"),
             )
         )
 
-    if search_imaging:
-        query = query.filter(RadiologyImaging.name.ilike(f"%{search_imaging}%"))
+    # Fetch only the requested page: best matches first, then newest
+    sort_columns = [RadiologyImaging.date, RadiologyImaging.id]
+    if relevance is not None:
+        sort_columns.insert(0, relevance)
 
-    # Execute query and order results
-    radiology_imaging = query.order_by(RadiologyImaging.date.desc()).all()
+    def sort_key(row):
+        if relevance is None:
+            return row.date, row.id
+        return row.relevance, row[0].date, row[0].id
+
+    try:
+        page = keyset_paginate(
+            query,
+            sort_columns,
+            per_page=RADIOLOGY_PER_PAGE,
+            after=request.args.get("after"),
+            before=request.args.get("before"),
+            descending=True,
+            key=sort_key,
+        )
+    except ValueError:
+        flash("Invalid page link. Showing the first page.", "warning")
+        page = keyset_paginate(
+            query,
+            sort_columns,
+            per_page=RADIOLOGY_PER_PAGE,
+            descending=True,
+            key=sort_key,
+        )
+
+    radiology_imaging = (
+        page.items if relevance is None else [row[0] for row in page.items]
+    )
 
     return render_template(
         "view_radiology_imaging.html",
         radiology_imaging=radiology_imaging,
+        page=page,
         search_patient=search_patient,
         search_imaging=search_imaging,
+        filters=filters,
+        modalities=available_modalities(doctor_id),
     )
 
 
@@ -2161,15 +3111,24 @@ def edit_radiology_imaging(imaging_id):
                     )
 
             # Handle image replacement if new file uploaded
+            replaced_filename = None
             if image_file and image_file.filename != "":
                 # Save new image
-                new_image_filename = save_uploaded_file(image_file, imaging.patient_id)
+                new_image_filename = save_uploaded_file(image_file)
                 if new_image_filename:
-                    # Delete old image if it exists
-                    if imaging.image_filename:
-                        delete_image_file(imaging.image_filename)
+                    # Drop this record's reference to the old image
+                    if (
+                        imaging.image_filename
+                        and imaging.image_filename != new_image_filename
+                        and release_blob(imaging.image_filename)
+                    ):
+                        replaced_filename = imaging.image_filename
+                    elif imaging.image_filename == new_image_filename:
+                        # Same bytes re-uploaded; keep a single reference
+                        release_blob(new_image_filename)
                     # Update with new image filename
                     imaging.image_filename = new_image_filename
+                    index_dicom(imaging)
                 else:
                     flash("Failed to save uploaded image", "error")
                     return render_template(
@@ -2182,6 +3141,10 @@ def edit_radiology_imaging(imaging_id):
 
             db.session.commit()
 
+            # Remove the old image once nothing references it any more
+            if replaced_filename:
+                delete_image_file(replaced_filename)
+
             flash(
                 f"Radiology imaging updated: {imaging_name}",
                 "success",
@@ -2222,11 +3185,13 @@ def delete_radiology_imaging(imaging_id):
         imaging_name = imaging.name
         image_filename = imaging.image_filename
 
+        # Images are shared between identical uploads; only drop a reference
+        orphaned = bool(image_filename) and release_blob(image_filename)
         db.session.delete(imaging)
         db.session.commit()
 
-        # Delete associated image file if it exists
-        if image_filename:
+        # Delete the image file once nothing references it any more
+        if orphaned:
             delete_image_file(image_filename)
 
         flash(
@@ -2241,6 +3206,24 @@ def delete_radiology_imaging(imaging_id):
     return redirect(url_for("view_radiology_imaging"))
 
 
+def doctor_owns_image(doctor_id, filename):
+    """Whether one of the doctor's radiology records points at this file.
+
+    Images are addressed by content, so ownership comes from the records
+    pointing at the file rather than from the path.
+    """
+    owned = (
+        db.session.query(RadiologyImaging.id)
+        .join(Patient)
+        .filter(
+            RadiologyImaging.image_filename == filename,
+            Patient.doctor_id == doctor_id,
+        )
+        .first()
+    )
+    return owned is not None
+
+
 @app.route("/radiology_image/<path:filename>")
 def radiology_image(filename):
     """Serve radiology images securely"""
@@ -2248,36 +3231,210 @@ def radiology_image(filename):
         flash("Please log in to access this page.", "error")
         return redirect(url_for("login"))
 
-    doctor_id = session.get("doctor_id")
+    if not doctor_owns_image(session.get("doctor_id"), filename):
+        flash("Access denied to this image.", "error")
+        return redirect(url_for("view_radiology_imaging"))
 
-    # Extract patient ID from filename path (format: patient_X/filename.ext)
-    try:
-        if "/" in filename:
-            patient_folder, image_name = filename.split("/", 1)
-            patient_id = int(patient_folder.replace("patient_", ""))
+    if safe_join(app.config["UPLOAD_FOLDER"], filename) is None:
+        flash("Invalid image path.", "error")
+        return redirect(url_for("view_radiology_imaging"))
 
-            # Verify that this patient belongs to the logged-in doctor
-            patient = Patient.query.filter_by(
-                id=patient_id, doctor_id=doctor_id
-            ).first()
-            if not patient:
-                flash("Access denied to this image.", "error")
-                return redirect(url_for("view_radiology_imaging"))
+    # Serve a downsized derivative when asked for one; formats Pillow cannot
+    # decode (e.g. DICOM) fall back to the original
+    size = request.args.get("size", "")
+    if size in DERIVATIVE_SIZES:
+        derivative = ensure_derivative(filename, size)
+        if derivative:
+            return send_radiology_file(
+                derivative, content_etag(filename, size), mimetype="image/webp"
+            )
 
-            # Serve the file
-            from flask import send_from_directory
+    # Serve the file
+    path = upload_path(filename)
+    if not os.path.exists(path):
+        abort(404)
+    return send_radiology_file(path, content_etag(filename))
 
-            return send_from_directory(
-                os.path.join(app.config["UPLOAD_FOLDER"], patient_folder), image_name
-            )
-        else:
-            flash("Invalid image path.", "error")
-            return redirect(url_for("view_radiology_imaging"))
 
-    except (ValueError, IndexError):
-        flash("Invalid image path.", "error")
+@app.route("/radiology_viewer/<int:imaging_id>")
+def radiology_viewer(imaging_id):
+    """Pan and zoom viewer; large images load tile by tile"""
+    if not session.get("logged_in"):
+        flash("Please log in to access this page.", "error")
+        return redirect(url_for("login"))
+
+    doctor_id = session.get("doctor_id")
+    imaging = (
+        db.session.query(RadiologyImaging)
+        .join(Patient)
+        .filter(RadiologyImaging.id == imaging_id, Patient.doctor_id == doctor_id)
+        .first()
+    )
+    if not imaging or not imaging.image_filename:
+        flash("Radiology image not found or access denied.", "error")
         return redirect(url_for("view_radiology_imaging"))
 
+    tiled = is_tileable(image_size(imaging.image_filename))
+    return render_template("radiology_viewer.html", imaging=imaging, tiled=tiled)
+
+
+@app.route("/radiology_tiles/<path:filename>.dzi")
+def radiology_tile_descriptor(filename):
+    """Deep Zoom descriptor of a large radiology image"""
+    if not session.get("logged_in"):
+        flash("Please log in to access this page.", "error")
+        return redirect(url_for("login"))
+
+    if not doctor_owns_image(session.get("doctor_id"), filename):
+        abort(404)
+    if safe_join(app.config["UPLOAD_FOLDER"], filename) is None:
+        abort(404)
+
+    size = image_size(filename)
+    if not is_tileable(size):
+        abort(404)
+
+    response = Response(dzi_descriptor(size), mimetype="application/xml")
+    response.cache_control.private = True
+    response.cache_control.max_age = app.config["RADIOLOGY_IMAGE_MAX_AGE"]
+    return response
+
+
+@app.route(
+    "/radiology_tiles/<path:filename>_files/<int:level>/<int:column>_<int:row>.webp"
+)
+def radiology_tile(filename, level, column, row):
+    """One tile of a large image's pyramid, built on first request"""
+    if not session.get("logged_in"):
+        flash("Please log in to access this page.", "error")
+        return redirect(url_for("login"))
+
+    if not doctor_owns_image(session.get("doctor_id"), filename):
+        abort(404)
+    if safe_join(app.config["UPLOAD_FOLDER"], filename) is None:
+        abort(404)
+
+    tile = ensure_tile(filename, level, column, row)
+    if not tile:
+        abort(404)
+    return send_radiology_file(
+        tile,
+        content_etag(filename, f"{level}-{column}-{row}"),
+        mimetype="image/webp",
+    )
+
+
+def send_radiology_file(path, etag=None, mimetype=None):
+    """Send an image with validators, byte ranges and private caching.
+
+    send_file answers If-None-Match / If-Modified-Since with 304 and Range
+    with 206 from a stat() alone. Content-addressed files carry their hash as
+    a strong ETag and never change, so browsers may keep them for the full
+    lifetime; legacy uploads fall back to an mtime/size ETag.
+    """
+    response = send_file(
+        os.path.abspath(path),
+        mimetype=mimetype,
+        conditional=True,
+        etag=etag or True,
+        max_age=app.config["RADIOLOGY_IMAGE_MAX_AGE"],
+    )
+    # Advertise ranges up front so interrupted downloads can resume
+    response.accept_ranges = "bytes"
+    # Patient images must never sit in shared proxy caches
+    response.cache_control.public = False
+    response.cache_control.private = True
+    if etag:
+        response.cache_control.immutable = True
+    return response
+
+
+@app.cli.command("backfill-lab-values")
+@click.option(
+    "--recompute",
+    is_flag=True,
+    help="Re-parse results that already have a value and correct them.",
+)
+def backfill_lab_values_command(recompute):
+    """Parse numeric values for lab results recorded before result_value existed"""
+    filled = backfill_result_values(recompute=recompute)
+    action = "Updated" if recompute else "Filled"
+    print(f"{action} numeric values for {filled} lab results")
+
+
+@app.cli.command("import-lab-results")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "file_format", type=click.Choice(IMPORT_FORMATS))
+@click.option("--doctor-id", type=int, help="Only match this doctor's patients")
+@click.option("--batch-size", type=int, default=1000, show_default=True)
+def import_lab_results_command(path, file_format, doctor_id, batch_size):
+    """Stream lab results from a CSV or HL7 file into the database"""
+    with open(path, encoding="utf-8-sig", newline="") as lines:
+        report = import_lab_results(
+            lines,
+            file_format or detect_format(path),
+            doctor_id=doctor_id,
+            batch_size=batch_size,
+        )
+
+    print(
+        f"Imported {report.imported} lab results, rejected {report.rejected} "
+        f"in {report.elapsed:.2f}s ({report.rows_per_second} rows/s)"
+    )
+    for line_number, reason in report.rejected_rows:
+        print(f"  line {line_number}: {reason}")
+    if report.rejected > len(report.rejected_rows):
+        print(f"  ... and {report.rejected - len(report.rejected_rows)} more")
+
+
+@app.cli.command("classify-lab-results")
+@click.option(
+    "--recompute",
+    is_flag=True,
+    help="Also re-derive NORMAL/LOW/HIGH/CRITICAL statuses, including hand-set ones.",
+)
+def classify_lab_results_command(recompute):
+    """Derive missing lab result statuses from their reference ranges"""
+    classified = backfill_statuses(recompute=recompute)
+    print(f"Classified {classified} lab results")
+
+
+@app.cli.command("index-dicom")
+def index_dicom_command():
+    """Index the headers of DICOM uploads that have no metadata yet"""
+    indexed = index_pending_dicom()
+    print(f"Indexed {indexed} DICOM headers")
+
+
+@app.cli.command("reclaim-uploads")
+@click.option(
+    "--min-age",
+    default=60,
+    show_default=True,
+    help="Leave files younger than this many minutes alone.",
+)
+@click.option("--dry-run", is_flag=True, help="Report orphans without deleting.")
+def reclaim_uploads_command(min_age, dry_run):
+    """Delete radiology files that no record references any more"""
+    report = reclaim_orphans(min_age_seconds=min_age * 60, dry_run=dry_run)
+    action = "Found" if dry_run else "Removed"
+    print(
+        f"{action} {report['orphans']} orphaned files, "
+        f"{report['bytes_reclaimed']} bytes reclaimed in {report['seconds']}s"
+    )
+    if report.get("uploads_expired"):
+        print(f"Expired {report['uploads_expired']} abandoned resumable uploads")
+
+
+@app.cli.command("reindex-search")
+def reindex_search_command():
+    """Rebuild the trigram index behind patient and imaging name searches"""
+    counts = reindex_search()
+    print(
+        f"Indexed {counts['patient']} patients and "
+        f"{counts['imaging']} radiology records"
+    )
+
 
 if __name__ == "__main__":
     app.run(debug=True)
@@ -11,6 +11,22 @@ class Config:
     SECRET_KEY = os.getenv("SECRET_KEY")
     SECURITY_PASSWORD_SALT = os.getenv("SECURITY_PASSWORD_SALT")
 
+    # Per-doctor dashboard widget cache
+    DASHBOARD_CACHE_TTL = int(os.getenv("DASHBOARD_CACHE_TTL", 60))
+    DASHBOARD_CACHE_SIZE = int(os.getenv("DASHBOARD_CACHE_SIZE", 256))
+
+    # Opening hours used when listing free appointment slots
+    CLINIC_OPEN_HOUR = int(os.getenv("CLINIC_OPEN_HOUR", 8))
+    CLINIC_CLOSE_HOUR = int(os.getenv("CLINIC_CLOSE_HOUR", 18))
+
+    # Browser cache lifetime for radiology images (sent as Cache-Control: private)
+    RADIOLOGY_IMAGE_MAX_AGE = int(os.getenv("RADIOLOGY_IMAGE_MAX_AGE", 86400))
+
+    # Resumable radiology uploads: largest accepted file, in bytes
+    RADIOLOGY_UPLOAD_MAX_SIZE = int(
+        os.getenv("RADIOLOGY_UPLOAD_MAX_SIZE", 2 * 1024 * 1024 * 1024)
+    )
+
     # SMTP config (example: Gmail – for dev/testing use an app password)
     MAIL_SERVER = os.getenv("MAIL_SERVER")
     MAIL_PORT = os.getenv("MAIL_PORT")
@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 import enum
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import Enum
@@ -27,6 +27,8 @@ class Doctor(db.Model):
     email_confirmed = db.Column(db.Boolean, default=False, nullable=False)
     email_confirmed_at = db.Column(db.DateTime)
     password = db.Column(db.String(200), nullable=False)
+    # Random secret in the iCalendar feed URL; replacing it revokes the link
+    calendar_feed_secret = db.Column(db.String(64), nullable=True, unique=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
@@ -111,6 +113,13 @@ class LabResultStatusEnum(enum.Enum):
 class Patient(db.Model):
     __tablename__ = "patient"
 
+    __table_args__ = (
+        # Keyset pagination of a doctor's patient list
+        db.Index(
+            "ix_patient_doctor_name", "doctor_id", "last_name", "first_name", "id"
+        ),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     first_name = db.Column(db.String(100), nullable=False, index=True)
     last_name = db.Column(db.String(100), nullable=False, index=True)
@@ -124,7 +133,11 @@ class Patient(db.Model):
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
     )
 
-    doctor_id = db.Column(db.Integer, db.ForeignKey("doctor.id"), nullable=False)
+    # active_history: the dashboard cache needs the previous owner on reassignment
+    doctor_id = db.column_property(
+        db.Column(db.Integer, db.ForeignKey("doctor.id"), nullable=False),
+        active_history=True,
+    )
     doctor = db.relationship("Doctor", back_populates="patients")
 
     # One-to-one
@@ -190,19 +203,30 @@ class Appointment(db.Model):
     __tablename__ = "appointment"
 
     __table_args__ = (
-        db.UniqueConstraint("doctor_id", "date", name="uq_appointment_doctor_date"),
+        # Range scans of a doctor's calendar; overlap checks live in
+        # utils/availability.py now that appointments have durations
+        db.Index("ix_appointment_doctor_date", "doctor_id", "date"),
     )
 
     id = db.Column(db.Integer, primary_key=True)
     patient_id = db.Column(db.Integer, db.ForeignKey("patient.id"), nullable=False)
-    doctor_id = db.Column(db.Integer, db.ForeignKey("doctor.id"), nullable=False)
+    # active_history: the dashboard cache needs the previous owner on reassignment
+    doctor_id = db.column_property(
+        db.Column(db.Integer, db.ForeignKey("doctor.id"), nullable=False),
+        active_history=True,
+    )
     appointment_type = db.Column(Enum(AppointmentTypeEnum, name="appointment_type_enum"), nullable=True)
     date = db.Column(db.DateTime, nullable=False, index=True)
+    duration_minutes = db.Column(
+        db.Integer, nullable=False, default=30, server_default="30"
+    )
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
     )
     notes = db.Column(db.Text, nullable=True)
+    # Shared by every occurrence of a recurring series
+    series_id = db.Column(db.String(36), nullable=True, index=True)
     status = db.Column(
         Enum(AppointmentStatusEnum, name="appointment_status_enum"),
         nullable=False,
@@ -212,6 +236,10 @@ class Appointment(db.Model):
     patient = db.relationship("Patient", back_populates="appointments")
     doctor = db.relationship("Doctor", back_populates="appointments")
 
+    @property
+    def end(self):
+        return self.date + timedelta(minutes=self.duration_minutes or 30)
+
     def __repr__(self):
         return f"<Appointment id={self.id} on {self.date:%Y-%m-%d %H:%M}>"
 
@@ -291,12 +319,42 @@ class Allergy(db.Model):
 
 class LaboratoryResult(db.Model):
     __tablename__ = "laboratory_result"
+    __table_args__ = (
+        # Per-patient results newest first (patient page, trends)
+        db.Index("ix_lab_result_patient_date", "patient_id", "date", "id"),
+        # The doctor-wide lab results list walks this newest first and stops
+        # once a page is full, instead of sorting every result per page
+        db.Index("ix_lab_result_date_id", "date", "id"),
+        # Per-patient, per-test time series (see utils/lab_values.py)
+        db.Index("ix_lab_result_patient_test_date", "patient_id", "test_name", "date"),
+        # Open critical-result alerts. Partial where the backend supports it
+        # (SQLite, PostgreSQL), so it holds only unacknowledged critical rows;
+        # on MySQL the leading (status, acknowledged_at) columns narrow the
+        # scan instead.
+        db.Index(
+            "ix_lab_result_open_critical",
+            "status",
+            "acknowledged_at",
+            "patient_id",
+            "date",
+            sqlite_where=db.text("status = 'CRITICAL' AND acknowledged_at IS NULL"),
+            postgresql_where=db.text(
+                "status = 'CRITICAL' AND acknowledged_at IS NULL"
+            ),
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    patient_id = db.Column(db.Integer, db.ForeignKey("patient.id"), nullable=False)
+    # active_history: the dashboard cache needs the previous owner on reassignment
+    patient_id = db.column_property(
+        db.Column(db.Integer, db.ForeignKey("patient.id"), nullable=False),
+        active_history=True,
+    )
     test_name = db.Column(db.String(100), nullable=False)
     date = db.Column(db.DateTime, nullable=False, index=True)
     result = db.Column(db.String(200), nullable=False)
+    # Numeric reading parsed from result on write; NULL for text results
+    result_value = db.Column(db.Float, nullable=True)
     unit = db.Column(db.String(50), nullable=True)
     reference_range = db.Column(db.String(100), nullable=True)
     status = db.Column(Enum(LabResultStatusEnum, name="lab_status_enum"), nullable=True)
@@ -305,6 +363,8 @@ class LaboratoryResult(db.Model):
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
     )
     notes = db.Column(db.Text, nullable=True)
+    # Set when the doctor acknowledges a critical result
+    acknowledged_at = db.Column(db.DateTime, nullable=True)
 
     patient = db.relationship("Patient", back_populates="laboratory_results")
 
@@ -319,18 +379,141 @@ class RadiologyImaging(db.Model):
     patient_id = db.Column(db.Integer, db.ForeignKey("patient.id"), nullable=False)
     name = db.Column(db.String(100), nullable=False)
     date = db.Column(db.DateTime, nullable=False, index=True)
-    image_filename = db.Column(db.String(255), nullable=True)  # Store uploaded image filename
+    # Content key of the stored blob (see RadiologyBlob); uploads made before
+    # deduplication keep their patient_<id>/<uuid>.<ext> path
+    image_filename = db.Column(db.String(255), nullable=True, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
     )
 
     patient = db.relationship("Patient", back_populates="radiology_imaging")
+    dicom_metadata = db.relationship(
+        "DicomMetadata",
+        back_populates="imaging",
+        cascade="all, delete-orphan",
+        uselist=False,
+        lazy=True,
+    )
 
     def __repr__(self):
         return f"<RadiologyImaging id={self.id} name={self.name}>"
 
 
+class DicomMetadata(db.Model):
+    """Header tags of an uploaded DICOM file, indexed for searching studies"""
+
+    __tablename__ = "dicom_metadata"
+    __table_args__ = (
+        db.Index("ix_dicom_metadata_modality_date", "modality", "study_date"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    radiology_imaging_id = db.Column(
+        db.Integer, db.ForeignKey("radiology_imaging.id"), nullable=False, unique=True
+    )
+    modality = db.Column(db.String(16), nullable=True)
+    body_part = db.Column(db.String(64), nullable=True, index=True)
+    study_date = db.Column(db.Date, nullable=True, index=True)
+    study_description = db.Column(db.String(255), nullable=True)
+    series_description = db.Column(db.String(255), nullable=True)
+    study_instance_uid = db.Column(db.String(64), nullable=True, index=True)
+    series_instance_uid = db.Column(db.String(64), nullable=True)
+    rows = db.Column(db.Integer, nullable=True)
+    columns = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    imaging = db.relationship("RadiologyImaging", back_populates="dicom_metadata")
+
+    def __repr__(self):
+        return f"<DicomMetadata imaging={self.radiology_imaging_id} {self.modality}>"
+
+
+class RadiologyBlob(db.Model):
+    """A deduplicated upload, stored once under its SHA-256 content key"""
+
+    __tablename__ = "radiology_blob"
+
+    content_key = db.Column(db.String(255), primary_key=True)
+    size_bytes = db.Column(db.BigInteger, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=1)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<RadiologyBlob {self.content_key} refs={self.ref_count}>"
+
+
+class RadiologyUpload(db.Model):
+    """A resumable upload still in progress (see utils/resumable_upload.py).
+
+    The bytes received so far live in resumable/<id>.part under the upload
+    folder; the file size is the acknowledged offset. The row becomes a
+    RadiologyImaging record once the last chunk arrives.
+    """
+
+    __tablename__ = "radiology_upload"
+
+    id = db.Column(db.String(32), primary_key=True)
+    doctor_id = db.Column(
+        db.Integer, db.ForeignKey("doctor.id", ondelete="CASCADE"), nullable=False
+    )
+    patient_id = db.Column(
+        db.Integer,
+        db.ForeignKey("patient.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    name = db.Column(db.String(100), nullable=False)
+    date = db.Column(db.DateTime, nullable=False)
+    filename = db.Column(db.String(255), nullable=False)
+    upload_length = db.Column(db.BigInteger, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    # Bumped by every chunk; stale uploads are expired from this
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, nullable=False, index=True
+    )
+
+    def __repr__(self):
+        return f"<RadiologyUpload {self.id} {self.filename}>"
+
+
+class SearchTrigram(db.Model):
+    """Trigram index over searchable names (see utils/name_search.py).
+
+    One row per distinct three-character gram of a patient's full name or an
+    imaging record's name, so substring searches become index lookups.
+    """
+
+    __tablename__ = "search_trigram"
+    __table_args__ = (
+        db.Index("ix_search_trigram_entity", "entity_id", "entity"),
+    )
+
+    entity = db.Column(db.String(20), primary_key=True)
+    gram = db.Column(db.String(3), primary_key=True)
+    entity_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+
+    def __repr__(self):
+        return f"<SearchTrigram {self.entity}:{self.entity_id} {self.gram!r}>"
+
+
+class SearchDocument(db.Model):
+    """Normalised text of each searchable name (see utils/name_search.py).
+
+    Trigram candidates are confirmed against this, so matches stay case and
+    accent insensitive on every database.
+    """
+
+    __tablename__ = "search_document"
+
+    entity = db.Column(db.String(20), primary_key=True)
+    entity_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    text = db.Column(db.String(255), nullable=False)
+
+    def __repr__(self):
+        return f"<SearchDocument {self.entity}:{self.entity_id} {self.text!r}>"
+
+
 class Prescription(db.Model):
     __tablename__ = "prescription"
 
@@ -0,0 +1,94 @@
+import os
+import sys
+from datetime import date
+
+import pytest
+
+# Point the app at a throwaway in-memory database before it is imported
+os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("SECURITY_PASSWORD_SALT", "test-salt")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event  # noqa: E402
+
+from app import app as flask_app  # noqa: E402
+from models import db, Doctor, Patient  # noqa: E402
+from utils.dashboard_cache import dashboard_cache  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path):
+    flask_app.config.update(TESTING=True, UPLOAD_FOLDER=str(tmp_path / "uploads"))
+    with flask_app.app_context():
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture(autouse=True)
+def empty_dashboard_cache():
+    """The cache is module level and doctor ids repeat across test databases"""
+    dashboard_cache.clear()
+    dashboard_cache.hits = dashboard_cache.misses = dashboard_cache.invalidations = 0
+    yield
+    dashboard_cache.clear()
+
+
+@pytest.fixture
+def doctor(app):
+    doctor = Doctor(
+        last_name="House",
+        username="house",
+        email="house@example.com",
+        password="x",
+        email_confirmed=True,
+    )
+    db.session.add(doctor)
+    db.session.commit()
+    return doctor
+
+
+@pytest.fixture
+def make_patients(doctor):
+    def make(count, **fields):
+        patients = [
+            Patient(
+                first_name=f"First{i}",
+                last_name=f"Last{i}",
+                date_of_birth=date(1980, 1, 1),
+                doctor_id=doctor.id,
+                **fields,
+            )
+            for i in range(count)
+        ]
+        db.session.add_all(patients)
+        db.session.commit()
+        return patients
+
+    return make
+
+
+@pytest.fixture
+def count_queries(app):
+    """Collects the SQL statements run while the test body executes"""
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(db.engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def client(app, doctor):
+    """Test client logged in as ``doctor``"""
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["logged_in"] = True
+        session["doctor_id"] = doctor.id
+        session["doctor_name"] = f"Dr. {doctor.last_name}"
+    return client
@@ -0,0 +1,75 @@
+from datetime import datetime
+
+from models import db, Appointment, AppointmentStatusEnum, Doctor
+from utils.appointment_stats import appointment_stats, time_window_filter
+
+NOW = datetime(2025, 3, 10, 12)
+
+
+def _book(doctor_id, patient_id, when, status):
+    db.session.add(
+        Appointment(
+            patient_id=patient_id, doctor_id=doctor_id, date=when, status=status
+        )
+    )
+
+
+def test_stats_aggregate_statuses_in_one_query(doctor, make_patients, count_queries):
+    doctor_id = doctor.id
+    patient_id = make_patients(1)[0].id
+    other = Doctor(
+        last_name="Wilson", username="wilson", email="w@example.com", password="x"
+    )
+    db.session.add(other)
+    db.session.flush()
+
+    past, future = datetime(2025, 3, 1, 9), datetime(2025, 3, 20, 9)
+    _book(doctor_id, patient_id, past, AppointmentStatusEnum.COMPLETED)
+    _book(doctor_id, patient_id, past, AppointmentStatusEnum.COMPLETED)
+    _book(doctor_id, patient_id, past, AppointmentStatusEnum.NO_SHOW)
+    _book(doctor_id, patient_id, future, AppointmentStatusEnum.SCHEDULED)
+    _book(doctor_id, patient_id, future, AppointmentStatusEnum.CANCELLED)
+    # Another doctor's diary is not counted
+    _book(other.id, patient_id, future, AppointmentStatusEnum.SCHEDULED)
+    db.session.commit()
+
+    count_queries.clear()
+    stats = appointment_stats(doctor_id, now=NOW)
+
+    assert len(count_queries) == 1
+    assert stats == {
+        "total_appointments": 5,
+        "upcoming_appointments": 2,
+        "completed_appointments": 2,
+        "scheduled_appointments": 1,
+        "cancelled_appointments": 1,
+        "no_show_appointments": 1,
+    }
+
+
+def test_stats_without_appointments_are_zero(doctor):
+    stats = appointment_stats(doctor.id, now=NOW)
+    assert set(stats.values()) == {0}
+
+
+def test_time_windows(doctor, make_patients):
+    patient_id = make_patients(1)[0].id
+    for when in (
+        datetime(2025, 3, 9, 9),
+        datetime(2025, 3, 10, 8),
+        datetime(2025, 3, 10, 15),
+        datetime(2025, 3, 15, 9),
+        datetime(2025, 4, 5, 9),
+    ):
+        _book(doctor.id, patient_id, when, AppointmentStatusEnum.SCHEDULED)
+    db.session.commit()
+
+    def days(window):
+        query = Appointment.query.filter(time_window_filter(window, now=NOW))
+        return sorted((a.date.month, a.date.day) for a in query)
+
+    assert days("past") == [(3, 9), (3, 10)]
+    assert days("today") == [(3, 10), (3, 10)]
+    assert days("week") == [(3, 10), (3, 15)]
+    assert days("month") == [(3, 10), (3, 15), (4, 5)]
+    assert days("upcoming") == [(3, 10), (3, 15), (4, 5)]
@@ -0,0 +1,74 @@
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.dialects import mysql
+from sqlalchemy.orm import Session
+
+from models import Appointment
+from utils.availability import (
+    MAX_SERIES_OCCURRENCES,
+    count_occurrences,
+    expand_series,
+    has_conflict,
+    plan_series,
+)
+
+
+def test_expand_series_weekly():
+    starts = expand_series(datetime(2025, 1, 6, 10), 1, "weeks", date(2025, 2, 3))
+    assert starts == [datetime(2025, 1, d, 10) for d in (6, 13, 20, 27)] + [
+        datetime(2025, 2, 3, 10)
+    ]
+    assert count_occurrences(datetime(2025, 1, 6, 10), 1, "weeks", date(2025, 2, 3)) == 5
+
+
+def test_expand_series_ending_before_start_is_empty():
+    assert expand_series(datetime(2025, 1, 6, 10), 1, "days", date(2025, 1, 5)) == []
+
+
+def test_expand_series_rejects_series_over_the_cap():
+    with pytest.raises(ValueError, match="365 occurrences"):
+        expand_series(datetime(2025, 1, 1, 9), 1, "days", date(2025, 12, 31))
+
+
+def test_long_series_is_rejected_not_truncated(client, make_patients):
+    patient = make_patients(1)[0]
+    response = client.post(
+        "/schedule_appointment",
+        data={
+            "patient_id": patient.id,
+            "appointment_date": "2025-01-01",
+            "appointment_time": "09:00",
+            "repeat_every": "1",
+            "repeat_unit": "days",
+            "repeat_until": "2025-12-31",
+        },
+    )
+
+    assert response.status_code == 200
+    assert f"at most {MAX_SERIES_OCCURRENCES}" in response.get_data(as_text=True)
+    assert Appointment.query.count() == 0
+
+
+def test_booking_checks_read_appointments_with_a_locking_read(doctor):
+    """A plain SELECT would read a stale snapshot under REPEATABLE READ"""
+    doctor_id = doctor.id
+    reads = []
+
+    def record(orm_execute_state):
+        if orm_execute_state.is_select:
+            sql = str(orm_execute_state.statement.compile(dialect=mysql.dialect()))
+            if "FROM appointment" in sql:
+                reads.append(sql)
+
+    event.listen(Session, "do_orm_execute", record)
+    try:
+        start = datetime(2025, 1, 6, 10)
+        has_conflict(doctor_id, start, 30)
+        plan_series(doctor_id, [start, datetime(2025, 1, 13, 10)], 30)
+    finally:
+        event.remove(Session, "do_orm_execute", record)
+
+    assert len(reads) == 2
+    assert all(sql.rstrip().endswith("LOCK IN SHARE MODE") for sql in reads)
@@ -0,0 +1,59 @@
+from datetime import datetime
+
+from models import db, Appointment, Doctor
+from utils.dashboard_cache import dashboard_cache
+
+
+def _other_doctor():
+    doctor = Doctor(
+        last_name="Wilson",
+        username="wilson",
+        email="wilson@example.com",
+        password="x",
+        email_confirmed=True,
+    )
+    db.session.add(doctor)
+    db.session.commit()
+    return doctor
+
+
+def test_reassigned_patient_invalidates_both_doctors(doctor, make_patients):
+    other = _other_doctor()
+    patient = make_patients(1)[0]
+    dashboard_cache.get_or_load(doctor.id, lambda: "house")
+    dashboard_cache.get_or_load(other.id, lambda: "wilson")
+
+    patient.doctor_id = other.id
+    db.session.commit()
+
+    assert dashboard_cache.get(doctor.id) is None
+    assert dashboard_cache.get(other.id) is None
+
+
+def test_reassigned_appointment_invalidates_both_doctors(doctor, make_patients):
+    other = _other_doctor()
+    patient = make_patients(1)[0]
+    appointment = Appointment(
+        patient_id=patient.id, doctor_id=doctor.id, date=datetime(2025, 1, 1, 9)
+    )
+    db.session.add(appointment)
+    db.session.commit()
+    dashboard_cache.get_or_load(doctor.id, lambda: "house")
+    dashboard_cache.get_or_load(other.id, lambda: "wilson")
+
+    appointment.doctor_id = other.id
+    db.session.commit()
+
+    assert dashboard_cache.get(doctor.id) is None
+    assert dashboard_cache.get(other.id) is None
+
+
+def test_unrelated_edit_keeps_other_doctor_cached(doctor, make_patients):
+    other = _other_doctor()
+    patient = make_patients(1)[0]
+    dashboard_cache.get_or_load(other.id, lambda: "wilson")
+
+    patient.first_name = "Renamed"
+    db.session.commit()
+
+    assert dashboard_cache.get(other.id) == "wilson"
@@ -0,0 +1,87 @@
+import io
+import struct
+from datetime import datetime
+
+import pytest
+
+from models import db, DicomMetadata, RadiologyImaging
+from utils.dicom_header import DicomHeaderError, parse_header
+from utils.dicom_index import index_dicom
+from utils.radiology_storage import store_blob
+
+
+def _element(group, number, vr, value):
+    if vr in (b"SQ", b"OB"):
+        return struct.pack("<HH2sHI", group, number, vr, 0, len(value)) + value
+    return struct.pack("<HH2sH", group, number, vr, len(value)) + value
+
+
+def _undefined(group, number):
+    return struct.pack("<HH2sHI", group, number, b"SQ", 0, 0xFFFFFFFF)
+
+
+def _item():
+    return struct.pack("<HHI", 0xFFFE, 0xE000, 0xFFFFFFFF)
+
+
+def _delimiter(number):
+    return struct.pack("<HHI", 0xFFFE, number, 0)
+
+
+def _file(dataset):
+    meta = _element(0x0002, 0x0010, b"UI", b"1.2.840.10008.1.2.1\x00")
+    return b"\0" * 128 + b"DICM" + meta + dataset
+
+
+def _nested(depth):
+    opening = (_undefined(0x0008, 0x1115) + _item()) * depth
+    closing = (_delimiter(0xE00D) + _delimiter(0xE0DD)) * depth
+    return opening + closing
+
+
+def test_nested_sequences_are_skipped():
+    buffer = _file(_nested(2) + _element(0x0008, 0x0060, b"CS", b"CT"))
+    assert parse_header(buffer) == {"modality": "CT"}
+
+
+def test_deep_nesting_does_not_recurse():
+    buffer = _file(_nested(5000) + _element(0x0008, 0x0060, b"CS", b"MR"))
+    assert parse_header(buffer) == {"modality": "MR"}
+
+
+def test_unterminated_nesting_is_a_header_error():
+    with pytest.raises(DicomHeaderError):
+        parse_header(_file(_undefined(0x0008, 0x1115) + _item() * 3))
+
+
+def test_editing_an_indexed_study_with_another_dicom(client, make_patients):
+    patient_id = make_patients(1)[0].id
+    ct = _file(_element(0x0008, 0x0060, b"CS", b"CT"))
+    mr = _file(_element(0x0008, 0x0060, b"CS", b"MR"))
+
+    content_key, _ = store_blob(io.BytesIO(ct), ".dcm")
+    imaging = RadiologyImaging(
+        patient_id=patient_id,
+        name="Head",
+        date=datetime(2026, 1, 1),
+        image_filename=content_key,
+    )
+    assert index_dicom(imaging)
+    db.session.add(imaging)
+    db.session.commit()
+    imaging_id = imaging.id
+
+    client.post(
+        f"/edit_radiology_imaging/{imaging_id}",
+        data={
+            "imaging_name": "Head",
+            "imaging_date": "2026-01-01",
+            "image_file": (io.BytesIO(mr), "second.dcm"),
+        },
+        content_type="multipart/form-data",
+    )
+
+    db.session.expire_all()
+    metadata = DicomMetadata.query.filter_by(radiology_imaging_id=imaging_id).one()
+    assert metadata.modality == "MR"
+    assert db.session.get(RadiologyImaging, imaging_id).image_filename != content_key
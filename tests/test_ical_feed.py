@@ -0,0 +1,70 @@
+import re
+from datetime import datetime
+
+from models import db, Appointment, Doctor
+from utils import ical_feed
+from utils.ical_feed import generate_calendar
+
+
+def test_feed_pages_through_every_appointment(
+    monkeypatch, doctor, make_patients, count_queries
+):
+    monkeypatch.setattr(ical_feed, "FEED_BATCH_SIZE", 3)
+    patient = make_patients(1)[0]
+    # Several appointments share a start time, so paging must also seek on id
+    dates = [datetime(2025, 1, 1 + i // 3, 9) for i in range(10)]
+    appointments = [
+        Appointment(patient_id=patient.id, doctor_id=doctor.id, date=d)
+        for d in dates
+    ]
+    db.session.add_all(appointments)
+    db.session.commit()
+    expected = [a.id for a in sorted(appointments, key=lambda a: (a.date, a.id))]
+
+    doctor_id = doctor.id
+    count_queries.clear()
+    body = "".join(generate_calendar(doctor_id, datetime(2024, 1, 1), "ehr.test"))
+
+    uids = [int(uid) for uid in re.findall(r"UID:appointment-(\d+)@", body)]
+    assert uids == expected
+    assert body.startswith("BEGIN:VCALENDAR") and body.endswith("END:VCALENDAR\r\n")
+    # Four batches of at most three rows
+    assert len(count_queries) == 4
+
+
+def _feed_url(client):
+    client.get("/doctor_profile")
+    doctor_secret = db.session.execute(
+        db.select(Doctor.calendar_feed_secret)
+    ).scalar_one()
+    return f"/calendar/{doctor_secret}.ics"
+
+
+def test_regenerating_the_feed_link_revokes_the_old_one(client, doctor):
+    old_url = _feed_url(client)
+    assert client.get(old_url).status_code == 200
+
+    client.post("/regenerate_calendar_feed")
+    new_url = _feed_url(client)
+
+    assert new_url != old_url
+    assert client.get(old_url).status_code == 404
+    assert client.get(new_url).status_code == 200
+
+
+def test_feed_etag_changes_when_a_patient_is_renamed(client, doctor, make_patients):
+    patient = make_patients(1)[0]
+    db.session.add(
+        Appointment(patient_id=patient.id, doctor_id=doctor.id, date=datetime.now())
+    )
+    db.session.commit()
+    url = _feed_url(client)
+    etag = client.get(url).headers["ETag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    patient.last_name = "Renamed"
+    db.session.commit()
+
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert "Renamed" in response.get_data(as_text=True)
@@ -0,0 +1,129 @@
+import os
+from datetime import date, datetime
+
+from PIL import Image
+
+from models import db, Doctor, Patient, RadiologyImaging
+from utils import image_derivatives
+from utils.image_derivatives import (
+    TILE_OVERLAP,
+    TILE_SIZE,
+    delete_derivatives,
+    derivatives_failed,
+    dzi_descriptor,
+    ensure_derivative,
+    ensure_tile,
+    generate_derivatives,
+    max_level,
+)
+
+
+def _write(app, name, data=None, size=None):
+    path = os.path.join(app.config["UPLOAD_FOLDER"], name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if size:
+        Image.new("RGB", size, "gray").save(path, "PNG")
+    else:
+        with open(path, "wb") as handle:
+            handle.write(data)
+    return name
+
+
+def test_thumbnail_is_rendered(app):
+    name = _write(app, "scan.png", size=(600, 400))
+    path = ensure_derivative(name, "thumb")
+    with Image.open(path) as thumb:
+        assert max(thumb.size) == 256
+
+
+def test_undecodable_image_is_not_retried(app, monkeypatch):
+    name = _write(app, "study.dcm", data=b"\0" * 128 + b"DICM" + b"\0" * 64)
+
+    assert ensure_derivative(name, "thumb") is None
+    assert derivatives_failed(name)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("the image should not be opened again")
+
+    monkeypatch.setattr(image_derivatives.Image, "open", fail)
+    assert ensure_derivative(name, "preview") is None
+    assert generate_derivatives(name) is False
+    assert image_derivatives.ensure_tile(name, 0, 0, 0) is None
+
+    delete_derivatives(name)
+    assert not derivatives_failed(name)
+
+
+def test_decompression_bomb_is_a_failure_not_an_error(app, monkeypatch):
+    name = _write(app, "huge.png", size=(300, 300))
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 100)
+
+    assert generate_derivatives(name) is False
+    assert derivatives_failed(name)
+    assert image_derivatives.image_size(name) is None
+
+
+def _tile_size(name, level, column, row):
+    path = ensure_tile(name, level, column, row)
+    assert path, (level, column, row)
+    with Image.open(path) as tile:
+        return tile.size
+
+
+def test_tile_pyramid_levels_and_edges(app):
+    name = _write(app, "big.png", size=(1501, 701))
+    assert max_level((1501, 701)) == 11
+    assert 'Width="1501" Height="701"' in dzi_descriptor((1501, 701))
+
+    edge = TILE_SIZE + TILE_OVERLAP
+    # Full resolution: interior tiles overlap their neighbours on both sides
+    assert _tile_size(name, 11, 0, 0) == (edge, edge)
+    assert _tile_size(name, 11, 1, 1) == (edge + TILE_OVERLAP, edge + TILE_OVERLAP)
+    assert _tile_size(name, 11, 5, 2) == (1501 - 5 * TILE_SIZE + TILE_OVERLAP, 190)
+    # Each level halves the one above, rounding up: 751 x 351
+    assert _tile_size(name, 10, 2, 1) == (751 - 2 * TILE_SIZE + TILE_OVERLAP, 96)
+    assert _tile_size(name, 0, 0, 0) == (1, 1)
+
+    assert ensure_tile(name, 11, 6, 0) is None
+    assert ensure_tile(name, 12, 0, 0) is None
+
+
+def test_small_images_are_not_tiled(app):
+    name = _write(app, "small.png", size=(800, 600))
+    assert ensure_tile(name, 0, 0, 0) is None
+
+
+def test_tiles_of_another_doctors_image_are_404(client, app, doctor):
+    other = Doctor(
+        last_name="Wilson", username="wilson", email="w@example.com", password="x"
+    )
+    db.session.add(other)
+    db.session.flush()
+    patient = Patient(
+        first_name="Ann",
+        last_name="Other",
+        date_of_birth=date(1980, 1, 1),
+        doctor_id=other.id,
+    )
+    db.session.add(patient)
+    db.session.flush()
+    name = _write(app, f"patient_{patient.id}/big.png", size=(1500, 700))
+    db.session.add(
+        RadiologyImaging(
+            patient_id=patient.id,
+            name="Big",
+            date=datetime(2025, 1, 1),
+            image_filename=name,
+        )
+    )
+    db.session.commit()
+
+    urls = (f"/radiology_tiles/{name}.dzi", f"/radiology_tiles/{name}_files/0/0_0.webp")
+    for url in urls:
+        assert client.get(url).status_code == 404, url
+
+    # The same URLs serve the owning doctor
+    patient.doctor_id = doctor.id
+    db.session.commit()
+    for url in urls:
+        assert client.get(url).status_code == 200, url
@@ -0,0 +1,55 @@
+from datetime import datetime
+
+from models import db, Doctor, LaboratoryResult, LabResultStatusEnum
+from utils.lab_alerts import acknowledge_alert, open_critical_alerts
+
+ALERTS_HEADING = b"Critical Results Awaiting Review"
+
+
+def _critical_result(patient_id):
+    result = LaboratoryResult(
+        patient_id=patient_id,
+        test_name="Potassium",
+        date=datetime(2025, 1, 1),
+        result="7.1",
+        status=LabResultStatusEnum.CRITICAL,
+    )
+    db.session.add(result)
+    db.session.commit()
+    return result.id
+
+
+def test_acknowledging_clears_the_dashboard_alert(client, doctor, make_patients):
+    doctor_id = doctor.id
+    result_id = _critical_result(make_patients(1)[0].id)
+    assert ALERTS_HEADING in client.get("/dashboard").data
+
+    response = client.post(f"/acknowledge_lab_result/{result_id}")
+    assert response.status_code == 302
+
+    assert open_critical_alerts(doctor_id) == ([], False)
+    assert ALERTS_HEADING not in client.get("/dashboard").data
+    assert db.session.get(LaboratoryResult, result_id).acknowledged_at is not None
+
+
+def test_only_the_owning_doctor_can_acknowledge_once(doctor, make_patients):
+    doctor_id = doctor.id
+    result_id = _critical_result(make_patients(1)[0].id)
+    other = Doctor(
+        last_name="Wilson", username="wilson", email="w@example.com", password="x"
+    )
+    db.session.add(other)
+    db.session.commit()
+
+    assert not acknowledge_alert(result_id, other.id)
+    assert acknowledge_alert(result_id, doctor_id)
+    assert not acknowledge_alert(result_id, doctor_id)
+
+
+def test_more_flag_when_alerts_exceed_the_limit(doctor, make_patients):
+    patient_id = make_patients(1)[0].id
+    for _ in range(3):
+        _critical_result(patient_id)
+
+    alerts, more = open_critical_alerts(doctor.id, limit=2)
+    assert len(alerts) == 2 and more
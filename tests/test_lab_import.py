@@ -0,0 +1,76 @@
+from datetime import datetime
+
+import pytest
+
+from models import db, Doctor, LaboratoryResult, Patient
+from utils.lab_import import _parse_date, import_lab_results
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("2024-01-01 12:30", datetime(2024, 1, 1, 12, 30)),
+        ("2024-01-01", datetime(2024, 1, 1)),
+        ("20240101120000", datetime(2024, 1, 1, 12)),
+        ("20240101120000.1234", datetime(2024, 1, 1, 12)),
+        ("20240101120000+0200", datetime(2024, 1, 1, 12)),
+        ("20240101120000-0500", datetime(2024, 1, 1, 12)),
+        ("20240101120000.12-0500", datetime(2024, 1, 1, 12)),
+        ("202401011200-0330", datetime(2024, 1, 1, 12)),
+        ("2024-01-01T12:00:00-05:00", datetime(2024, 1, 1, 12)),
+        ("2024-01-01T12:00:00Z", datetime(2024, 1, 1, 12)),
+        ("yesterday", None),
+    ],
+)
+def test_parse_date(value, expected):
+    assert _parse_date(value) == expected
+
+
+def test_shared_email_is_rejected_without_a_doctor(doctor, make_patients):
+    mine = make_patients(1, email="family@example.com")[0]
+    other = Doctor(
+        last_name="Wilson",
+        username="wilson",
+        email="wilson@example.com",
+        password="x",
+        email_confirmed=True,
+    )
+    db.session.add(other)
+    db.session.flush()
+    db.session.add(
+        Patient(
+            first_name="Other",
+            last_name="Patient",
+            email="Family@example.com",
+            doctor_id=other.id,
+        )
+    )
+    db.session.commit()
+    lines = [
+        "email,test_name,date,result\n",
+        "family@example.com,Potassium,2024-01-01,4.0\n",
+        f"{mine.id},Sodium,2024-01-01,140\n",
+    ]
+
+    report = import_lab_results(lines)
+    assert report.imported == 1
+    assert report.rejected == 1
+    assert "matches several patients" in report.rejected_rows[0][1]
+
+    report = import_lab_results(lines, doctor_id=doctor.id)
+    assert report.imported == 2
+    assert LaboratoryResult.query.filter_by(patient_id=mine.id).count() == 3
+
+
+def test_hl7_negative_offset_is_imported(make_patients):
+    patient = make_patients(1)[0]
+    lines = [
+        f"PID|1||{patient.id}\n",
+        "OBR|1||||||20240101120000-0500\n",
+        "OBX|1|NM|K^Potassium||4.2|mmol/L|3.5-5.0|N\n",
+    ]
+
+    report = import_lab_results(lines, file_format="hl7")
+
+    assert report.imported == 1
+    assert LaboratoryResult.query.one().date == datetime(2024, 1, 1, 12)
@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta
+
+from models import db, LaboratoryResult
+from utils.lab_stats import lab_result_stats
+
+
+def test_lab_result_stats_counts_recent_by_date(make_patients):
+    patients = make_patients(2)
+    now = datetime(2025, 6, 15, 12)
+    for i, days_ago in enumerate((0, 3, 6, 8, 30, 400)):
+        db.session.add(
+            LaboratoryResult(
+                patient_id=patients[i % 2].id,
+                test_name=("Potassium", "Sodium")[i % 2],
+                date=now - timedelta(days=days_ago),
+                result="4.0",
+            )
+        )
+    db.session.commit()
+
+    stats = lab_result_stats(patients[0].doctor_id, now=now)
+
+    assert stats["total_results"] == 6
+    assert stats["recent_results"] == 3
+    assert stats["test_types"] == ["Potassium", "Sodium"]
+
+
+def test_lab_result_stats_empty(doctor):
+    stats = lab_result_stats(doctor.id)
+    assert stats["total_results"] == 0
+    assert stats["recent_results"] == 0
+    assert stats["test_types"] == []
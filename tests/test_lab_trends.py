@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from utils.lab_trends import downsample, lttb, minmax, rolling_mean, slope_per_day
+
+DAY = 86400.0
+
+
+def _series(n=1000, seed=7):
+    rng = np.random.default_rng(seed)
+    x = np.arange(n) * DAY
+    y = np.sin(np.arange(n) / 40.0) + rng.normal(0, 0.1, n)
+    return x, y
+
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+def test_downsampling_keeps_endpoints_and_spikes(method):
+    x, y = _series()
+    y[317] = 25.0
+    y[702] = -25.0
+
+    keep = downsample(x, y, 100, method)
+
+    assert keep[0] == 0 and keep[-1] == len(x) - 1
+    assert {317, 702} <= set(keep.tolist())
+    assert np.all(np.diff(keep) > 0)
+    assert len(keep) <= 100
+
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+def test_downsampling_keeps_the_global_extremes(method):
+    x, y = _series()
+    keep = set(downsample(x, y, 100, method).tolist())
+    assert {int(np.argmax(y)), int(np.argmin(y))} <= keep
+
+
+def test_short_series_are_returned_whole():
+    x, y = _series(20)
+    assert lttb(x, y, 50).tolist() == list(range(20))
+    assert minmax(x, y, 50).tolist() == list(range(20))
+
+
+def test_rolling_mean_and_slope():
+    x = np.arange(5) * DAY
+    y = np.array([1.0, 3.0, 5.0, 7.0, 9.0])
+    assert rolling_mean(y, 2).tolist() == [1.0, 2.0, 4.0, 6.0, 8.0]
+    assert slope_per_day(x, y) == pytest.approx(2.0)
+    assert slope_per_day(x[:1], y[:1]) is None
@@ -0,0 +1,50 @@
+from datetime import datetime
+
+import pytest
+
+from models import db, LaboratoryResult
+from utils.lab_values import backfill_result_values, parse_result_value
+
+
+@pytest.mark.parametrize(
+    "result, value",
+    [
+        ("4.5", 4.5),
+        ("4.5 mmol/L", 4.5),
+        ("<0.5", 0.5),
+        (">= 1,000", 1000.0),
+        ("12%", 12.0),
+        ("-.5", -0.5),
+        ("1e5", 100000.0),
+        ("2.5E+3 cells/uL", 2500.0),
+        ("3e-2 mg", 0.03),
+        ("1,200e3", 1200000.0),
+        ("5 Eq", 5.0),
+        ("120/80", None),
+        ("Positive", None),
+        ("", None),
+        ("e5", None),
+        ("1e999", None),
+        ("-1e999", None),
+    ],
+)
+def test_parse_result_value(result, value):
+    assert parse_result_value(result) == value
+
+
+def test_recompute_corrects_values_parsed_before(make_patients):
+    patient = make_patients(1)[0]
+    row = LaboratoryResult(
+        patient_id=patient.id,
+        test_name="WBC",
+        date=datetime(2025, 1, 1),
+        result="1e5",
+        result_value=1.0,
+    )
+    db.session.add(row)
+    db.session.commit()
+
+    assert backfill_result_values() == 0
+    assert backfill_result_values(recompute=True) == 1
+    assert db.session.get(LaboratoryResult, row.id).result_value == 100000.0
+    assert backfill_result_values(recompute=True) == 0
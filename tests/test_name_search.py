@@ -0,0 +1,67 @@
+from datetime import datetime
+
+from models import db, Patient, RadiologyImaging, SearchDocument, SearchTrigram
+from utils.name_search import search_filter, search_rank
+
+
+def _matches(entity, model, term):
+    return {row.id for row in model.query.filter(search_filter(entity, term))}
+
+
+def _indexed(entity):
+    return {
+        entity_id
+        for (entity_id,) in db.session.query(SearchDocument.entity_id).filter_by(
+            entity=entity
+        )
+    }
+
+
+def test_search_ignores_accents(make_patients):
+    (patient,) = make_patients(1)
+    patient.first_name, patient.last_name = "José", "Álvarez"
+    db.session.commit()
+
+    for term in ("jose alv", "ÁLVAREZ", "JOSÉ", "é"):
+        assert _matches("patient", Patient, term) == {patient.id}, term
+    assert _matches("patient", Patient, "josex") == set()
+
+
+def test_accented_matches_rank_like_unaccented_ones(make_patients):
+    accented, weaker = make_patients(2)
+    accented.first_name, accented.last_name = "José", "Álvarez"
+    weaker.first_name, weaker.last_name = "Ana", "Mejose"
+    db.session.commit()
+
+    rank = search_rank("patient", "jose").label("rank")
+    ranked = (
+        db.session.query(Patient.id, rank)
+        .filter(search_filter("patient", "jose"))
+        .order_by(rank.desc())
+        .all()
+    )
+    assert ranked == [(accented.id, 2), (weaker.id, 0)]
+
+
+def test_bulk_statements_keep_the_index(make_patients):
+    patient_id = make_patients(1)[0].id
+    db.session.execute(
+        db.insert(RadiologyImaging),
+        [
+            {"patient_id": patient_id, "name": name, "date": datetime(2026, 1, 1)}
+            for name in ("Chest X-ray", "Knee MRI")
+        ],
+    )
+    db.session.commit()
+    knee = RadiologyImaging.query.filter_by(name="Knee MRI").one()
+    assert _matches("imaging", RadiologyImaging, "knee") == {knee.id}
+
+    RadiologyImaging.query.filter_by(id=knee.id).update({"name": "Ankle MRI"})
+    db.session.commit()
+    assert _matches("imaging", RadiologyImaging, "knee") == set()
+    assert _matches("imaging", RadiologyImaging, "ankle") == {knee.id}
+
+    RadiologyImaging.query.filter_by(patient_id=patient_id).delete()
+    db.session.commit()
+    assert _indexed("imaging") == set()
+    assert not SearchTrigram.query.filter_by(entity="imaging").count()
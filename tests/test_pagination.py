@@ -0,0 +1,39 @@
+from models import db, Patient
+from utils.pagination import keyset_paginate
+
+SORT_COLUMNS = [Patient.last_name, Patient.first_name, Patient.id]
+
+
+def _page(per_page, **cursors):
+    return keyset_paginate(Patient.query, SORT_COLUMNS, per_page=per_page, **cursors)
+
+
+def test_paging_across_duplicate_sort_keys(make_patients):
+    # Every patient has the same name, so only the id breaks ties
+    patients = make_patients(7)
+    for patient in patients:
+        patient.first_name, patient.last_name = "Ann", "Smith"
+    db.session.commit()
+    expected = [patient.id for patient in patients]
+
+    seen = []
+    page = _page(3)
+    seen += [p.id for p in page.items]
+    while page.has_next:
+        page = _page(3, after=page.next_cursor)
+        seen += [p.id for p in page.items]
+    assert seen == expected
+
+    # The last page links back to the one before it
+    back = _page(3, before=page.prev_cursor)
+    assert [p.id for p in back.items] == expected[3:6]
+    assert back.has_next and back.has_prev
+
+
+def test_first_and_last_pages_have_no_outward_cursors(make_patients):
+    make_patients(4)
+    first = _page(2)
+    assert first.has_next and not first.has_prev
+
+    last = _page(2, after=first.next_cursor)
+    assert not last.has_next and last.has_prev
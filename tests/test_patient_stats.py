@@ -0,0 +1,190 @@
+from datetime import date, datetime, timedelta
+
+from models import (
+    db,
+    Allergy,
+    Appointment,
+    LaboratoryResult,
+    MedicalHistory,
+    Patient,
+)
+from utils.patient_stats import (
+    AGE_GROUPS,
+    age_group_filter,
+    attach_activity_counts,
+    latest_per_patient,
+    patient_demographics,
+)
+
+
+def _load(patients):
+    # Fresh rows, as the patients page has them, so only the counts query runs
+    ids = [p.id for p in patients]
+    return Patient.query.filter(Patient.id.in_(ids)).order_by(Patient.id).all()
+
+
+def test_activity_counts_use_one_query(make_patients, doctor, count_queries):
+    patients = make_patients(25)
+    for i, patient in enumerate(patients):
+        for k in range(i % 3):
+            db.session.add(
+                Appointment(
+                    patient_id=patient.id,
+                    doctor_id=doctor.id,
+                    date=datetime(2025, 1, 1 + k, 9 + i % 8),
+                )
+            )
+        db.session.add(
+            LaboratoryResult(
+                patient_id=patient.id,
+                test_name="Potassium",
+                date=datetime(2025, 1, 1),
+                result="4.2",
+            )
+        )
+    db.session.commit()
+
+    patients = _load(patients)
+    count_queries.clear()
+    attach_activity_counts(patients)
+
+    assert len(count_queries) == 1
+    for i, patient in enumerate(patients):
+        assert patient.appointment_count == i % 3
+        assert patient.lab_result_count == 1
+        assert patient.radiology_result_count == 0
+        assert patient.medical_history_count == 0
+
+
+def test_activity_counts_query_count_does_not_grow(make_patients, count_queries):
+    few = _load(make_patients(3))
+    count_queries.clear()
+    attach_activity_counts(few)
+    few_queries = len(count_queries)
+
+    many = _load(make_patients(200))
+    count_queries.clear()
+    attach_activity_counts(many)
+
+    assert len(count_queries) == few_queries == 1
+
+
+def _add_records(patients, doctor_id):
+    for i, patient in enumerate(patients):
+        db.session.add(
+            Appointment(
+                patient_id=patient.id,
+                doctor_id=doctor_id,
+                date=datetime(2025, 1, 1 + i % 28, 9),
+            )
+        )
+        db.session.add(
+            LaboratoryResult(
+                patient_id=patient.id,
+                test_name="Potassium",
+                date=datetime(2025, 1, 1),
+                result="4.2",
+            )
+        )
+    db.session.commit()
+
+
+def test_patients_page_query_count_is_constant(
+    client, doctor, make_patients, count_queries
+):
+    doctor_id = doctor.id
+    _add_records(make_patients(5), doctor_id)
+    count_queries.clear()
+    assert client.get("/patients").status_code == 200
+    few_queries = len(count_queries)
+
+    _add_records(make_patients(120), doctor_id)
+    count_queries.clear()
+    assert client.get("/patients").status_code == 200
+
+    assert len(count_queries) == few_queries
+
+
+def test_activity_counts_empty(app, count_queries):
+    assert attach_activity_counts([]) == []
+    assert count_queries == []
+
+
+def test_latest_per_patient_keeps_the_newest_rows(make_patients):
+    first, second, empty = make_patients(3)
+    for patient, days in ((first, (3, 1, 5, 2, 5)), (second, (7,))):
+        for day in days:
+            db.session.add(
+                LaboratoryResult(
+                    patient_id=patient.id,
+                    test_name=f"Day {day}",
+                    date=datetime(2025, 1, day),
+                    result="1",
+                )
+            )
+    db.session.commit()
+
+    latest = latest_per_patient(LaboratoryResult, [first.id, second.id, empty.id])
+
+    # Newest first; the two results on day 5 fall back to the newer id
+    first_rows = latest[first.id]
+    assert [row.date.day for row in first_rows] == [5, 5, 3]
+    assert first_rows[0].id > first_rows[1].id
+    assert [row.date.day for row in latest[second.id]] == [7]
+    assert latest[empty.id] == []
+
+
+def test_latest_per_patient_joins_the_related_row(make_patients):
+    (patient,) = make_patients(1)
+    allergy = Allergy(name="Penicillin")
+    db.session.add(allergy)
+    db.session.flush()
+    for day in (1, 2):
+        db.session.add(
+            MedicalHistory(
+                patient_id=patient.id,
+                allergy_id=allergy.id,
+                description=f"Reaction {day}",
+                date=datetime(2025, 1, day),
+            )
+        )
+    db.session.commit()
+
+    rows = latest_per_patient(MedicalHistory, [patient.id], limit=1, related="allergy")
+    ((history, related),) = rows[patient.id]
+    assert history.description == "Reaction 2"
+    assert related.name == "Penicillin"
+
+
+def test_age_buckets_and_filters_agree_on_edge_dates(doctor, make_patients):
+    today = date(2025, 6, 15)
+    years = timedelta(days=365)
+    dates_of_birth = [
+        today + timedelta(days=30),  # not born yet: youngest group
+        today,
+        today - 18 * years,
+        today - 19 * years + timedelta(days=1),  # still 18
+        today - 19 * years,  # 19 today
+        today - 35 * years,
+        today - 36 * years,
+        today - 65 * years,
+        today - 66 * years,
+        None,
+    ]
+    patients = make_patients(len(dates_of_birth))
+    for patient, date_of_birth in zip(patients, dates_of_birth):
+        patient.date_of_birth = date_of_birth
+    db.session.commit()
+
+    stats = patient_demographics(doctor.id, today=today)
+    assert stats["total_patients"] == len(dates_of_birth)
+    assert stats["age_groups"] == {
+        "0-18": 4,
+        "19-35": 2,
+        "36-50": 1,
+        "51-65": 1,
+        "65+": 1,
+    }
+    for label in AGE_GROUPS:
+        matching = Patient.query.filter(age_group_filter(label, today=today)).count()
+        assert matching == stats["age_groups"][label], label
@@ -0,0 +1,56 @@
+import io
+import os
+from datetime import datetime
+
+import pytest
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+
+from models import RadiologyImaging
+from utils import radiology_batch
+from utils.radiology_batch import save_batch
+from utils.radiology_storage import temp_dir
+
+
+def _png(name):
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), name).save(buffer, "PNG")
+    buffer.seek(0)
+    return FileStorage(stream=buffer, filename=f"{name}.png")
+
+
+def _save(app, patient_id, uploads):
+    return save_batch(
+        app, patient_id, "Study", datetime(2026, 1, 1), uploads, 10 * 1024 * 1024
+    )
+
+
+class _BrokenStream(io.BytesIO):
+    def read(self, *args):
+        raise RuntimeError("connection reset")
+
+
+def test_one_failing_file_does_not_abort_the_batch(app, make_patients):
+    patient_id = make_patients(1)[0].id
+    broken = FileStorage(stream=_BrokenStream(), filename="broken.png")
+
+    report = _save(app, patient_id, [_png("red"), broken, _png("blue")])
+
+    assert (report.saved, report.failed) == (2, 1)
+    assert report.files[1]["error"] == "File could not be read"
+    assert RadiologyImaging.query.count() == 2
+    assert os.listdir(temp_dir()) == []
+
+
+def test_rollback_drops_unconsumed_temp_files(app, make_patients, monkeypatch):
+    patient_id = make_patients(1)[0].id
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(radiology_batch, "commit_blob", fail)
+    with pytest.raises(RuntimeError):
+        _save(app, patient_id, [_png(color) for color in ("red", "green", "blue")])
+
+    assert RadiologyImaging.query.count() == 0
+    assert os.listdir(temp_dir()) == []
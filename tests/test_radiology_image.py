@@ -0,0 +1,61 @@
+import io
+from datetime import datetime
+
+from PIL import Image
+
+from models import db, RadiologyImaging
+from utils.radiology_storage import content_etag, store_blob
+
+
+def _stored_image(patient_id):
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), "gray").save(buffer, "PNG")
+    data = buffer.getvalue()
+    content_key, _ = store_blob(io.BytesIO(data), ".png")
+    db.session.add(
+        RadiologyImaging(
+            patient_id=patient_id,
+            name="Chest",
+            date=datetime(2025, 1, 1),
+            image_filename=content_key,
+        )
+    )
+    db.session.commit()
+    return content_key, data
+
+
+def test_image_carries_validators_and_private_caching(client, make_patients):
+    content_key, data = _stored_image(make_patients(1)[0].id)
+
+    response = client.get(f"/radiology_image/{content_key}")
+
+    assert response.status_code == 200
+    assert response.data == data
+    assert response.headers["ETag"] == f'"{content_etag(content_key)}"'
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert "private" in response.headers["Cache-Control"]
+    assert "public" not in response.headers["Cache-Control"]
+
+
+def test_matching_etag_gets_304(client, make_patients):
+    content_key, _ = _stored_image(make_patients(1)[0].id)
+    etag = client.get(f"/radiology_image/{content_key}").headers["ETag"]
+
+    response = client.get(
+        f"/radiology_image/{content_key}", headers={"If-None-Match": etag}
+    )
+
+    assert response.status_code == 304
+    assert response.data == b""
+
+
+def test_range_request_gets_206(client, make_patients):
+    content_key, data = _stored_image(make_patients(1)[0].id)
+
+    response = client.get(
+        f"/radiology_image/{content_key}", headers={"Range": "bytes=10-19"}
+    )
+
+    assert response.status_code == 206
+    assert response.data == data[10:20]
+    assert response.headers["Content-Range"] == f"bytes 10-19/{len(data)}"
@@ -0,0 +1,35 @@
+import io
+import os
+
+from models import db, RadiologyBlob
+from utils import radiology_storage
+from utils.radiology_storage import blob_key, store_blob, temp_dir
+
+
+def test_duplicate_upload_is_not_written(app, monkeypatch):
+    data = b"\x89PNG" + b"scan" * 1000
+    first_key, created = store_blob(io.BytesIO(data), ".png")
+    db.session.commit()
+    assert created
+
+    def fail(*args, **kwargs):
+        raise AssertionError("a stored blob should not be written again")
+
+    monkeypatch.setattr(radiology_storage, "write_hashed", fail)
+    second_key, created = store_blob(io.BytesIO(data), ".png")
+    db.session.commit()
+
+    assert (second_key, created) == (first_key, False)
+    assert db.session.get(RadiologyBlob, first_key).ref_count == 2
+    assert os.listdir(temp_dir()) == []
+
+
+def test_extension_spellings_share_a_blob(app):
+    data = b"\xff\xd8\xff" + b"jpeg" * 100
+    jpg_key, _ = store_blob(io.BytesIO(data), ".jpg")
+    jpeg_key, created = store_blob(io.BytesIO(data), ".JPEG")
+    db.session.commit()
+
+    assert jpeg_key == jpg_key
+    assert not created
+    assert blob_key("ab" * 32, ".tif") == blob_key("ab" * 32, ".tiff")
@@ -0,0 +1,121 @@
+from datetime import datetime
+
+import pytest
+
+from models import db, LaboratoryResult, LabResultStatusEnum
+from utils.lab_values import backfill_statuses, status_is_derived
+from utils.reference_ranges import classify_result, classify_results
+
+NORMAL = LabResultStatusEnum.NORMAL
+LOW = LabResultStatusEnum.LOW
+HIGH = LabResultStatusEnum.HIGH
+CRITICAL = LabResultStatusEnum.CRITICAL
+
+
+@pytest.mark.parametrize(
+    "value, reference_range, test_name, unit, status",
+    [
+        (4.2, "3.5-5.0", "Potassium", "mmol/L", NORMAL),
+        (5.5, "3.5-5.0", "Potassium", "mmol/L", HIGH),
+        (7.0, "3.5-5.0", "Potassium", "mmol/L", CRITICAL),
+        (7.0, "3.5-5.0", "potassium", "", CRITICAL),
+        (2.0, "3.5-5.0", "K", "mEq/L", CRITICAL),
+        # No explicit limits for cholesterol: far out of range is only HIGH
+        (400, "<200", "Cholesterol", "mg/dL", HIGH),
+        # Glucose limits depend on the unit
+        (5.5, "70-100", "Glucose", "", LOW),
+        (30, "70-100", "Glucose", "mg/dL", CRITICAL),
+        (1.5, "3.9-5.6", "Glucose", "mmol/L", CRITICAL),
+        (2.5, "4.0-11.0", "WBC", "x10^9/L", LOW),
+        (45, "150-400", "Platelets", "x10^3/µL", LOW),
+        (6.2, "", "INR", "", CRITICAL),
+        (None, "3.5-5.0", "Potassium", "mmol/L", None),
+        (4.2, "see report", "Cholesterol", "", None),
+    ],
+)
+def test_classify_result(value, reference_range, test_name, unit, status):
+    assert classify_result(value, reference_range, test_name, unit) is status
+
+
+def test_classify_results_is_vectorized():
+    statuses = classify_results(
+        [4.2, 7.0, 400],
+        ["3.5-5.0", "3.5-5.0", "<200"],
+        ["Potassium", "Potassium", "Cholesterol"],
+        ["mmol/L", "mmol/L", "mg/dL"],
+    )
+    assert statuses == [NORMAL, CRITICAL, HIGH]
+
+
+def _lab_result(patient, **fields):
+    values = dict(
+        patient_id=patient.id,
+        test_name="Potassium",
+        date=datetime(2025, 1, 1),
+        result="4.2",
+        result_value=4.2,
+        unit="mmol/L",
+        reference_range="3.5-5.0",
+    )
+    values.update(fields)
+    row = LaboratoryResult(**values)
+    db.session.add(row)
+    db.session.commit()
+    return row
+
+
+def test_status_is_derived(make_patients):
+    patient = make_patients(1)[0]
+    assert status_is_derived(_lab_result(patient, status=NORMAL))
+    assert status_is_derived(_lab_result(patient, status=None))
+    assert not status_is_derived(_lab_result(patient, status=HIGH))
+    assert not status_is_derived(
+        _lab_result(patient, status=LabResultStatusEnum.PENDING)
+    )
+
+
+def test_editing_the_value_rederives_an_auto_status(client, make_patients):
+    row = _lab_result(make_patients(1)[0], status=NORMAL)
+    page = client.get(f"/edit_lab_result/{row.id}").get_data(as_text=True)
+    assert '<option value="" selected>' in page
+
+    client.post(
+        f"/edit_lab_result/{row.id}",
+        data={
+            "test_name": "Potassium",
+            "date": "2025-01-01T00:00",
+            "result": "7.0",
+            "unit": "mmol/L",
+            "reference_range": "3.5-5.0",
+            "status": "",
+        },
+    )
+    assert db.session.get(LaboratoryResult, row.id).status is CRITICAL
+
+
+def test_hand_set_status_stays_selected(client, make_patients):
+    row = _lab_result(make_patients(1)[0], status=HIGH)
+    page = client.get(f"/edit_lab_result/{row.id}").get_data(as_text=True)
+    assert '<option value="" >' in page
+    assert '<option value="high" selected>' in page
+
+
+def test_recompute_replaces_old_heuristic_statuses(make_patients):
+    patient = make_patients(1)[0]
+    cholesterol = _lab_result(
+        patient,
+        test_name="Cholesterol",
+        result="400",
+        result_value=400,
+        unit="mg/dL",
+        reference_range="<200",
+        status=CRITICAL,
+    )
+    potassium = _lab_result(patient, result="7.0", result_value=7.0, status=HIGH)
+    pending = _lab_result(patient, status=LabResultStatusEnum.PENDING)
+
+    assert backfill_statuses() == 0
+    assert backfill_statuses(recompute=True) == 2
+    assert db.session.get(LaboratoryResult, cholesterol.id).status is HIGH
+    assert db.session.get(LaboratoryResult, potassium.id).status is CRITICAL
+    assert db.session.get(LaboratoryResult, pending.id).status is LabResultStatusEnum.PENDING
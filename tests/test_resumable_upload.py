@@ -0,0 +1,119 @@
+import base64
+import fcntl
+import io
+import threading
+from datetime import datetime
+
+from PIL import Image
+
+from models import RadiologyImaging
+from utils import resumable_upload
+from utils.resumable_upload import (
+    UploadError,
+    append_chunk,
+    create_upload,
+    finish_upload,
+    part_path,
+)
+
+
+def _png():
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), "gray").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def _upload(doctor, patient_id, data):
+    return create_upload(
+        doctor.id, patient_id, "Scan", datetime(2026, 1, 1), "scan.png", len(data)
+    )
+
+
+def test_append_waits_for_a_lock_held_by_another_process(doctor, make_patients):
+    data = _png()
+    upload = _upload(doctor, make_patients(1)[0].id, data)
+
+    # A separate open file, as another worker process would hold
+    with open(part_path(upload.id), "ab") as other:
+        fcntl.flock(other.fileno(), fcntl.LOCK_EX)
+        done = threading.Event()
+        errors = []
+        app = resumable_upload.current_app._get_current_object()
+
+        def append():
+            with app.app_context():
+                try:
+                    append_chunk(upload, 0, io.BytesIO(data), len(data))
+                except UploadError as e:
+                    errors.append(str(e))
+            done.set()
+
+        worker = threading.Thread(target=append)
+        worker.start()
+        assert not done.wait(0.2)
+        other.write(b"x")
+        other.flush()
+    worker.join()
+
+    # The other writer won, so this chunk's offset no longer matched
+    assert errors == ["Upload-Offset 0 does not match 1"]
+
+
+def test_derivative_failure_after_commit_still_saves(doctor, make_patients, monkeypatch):
+    data = _png()
+    upload = _upload(doctor, make_patients(1)[0].id, data)
+    append_chunk(upload, 0, io.BytesIO(data), len(data))
+
+    def fail(content_key):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(resumable_upload, "generate_derivatives", fail)
+    imaging = finish_upload(upload)
+
+    assert RadiologyImaging.query.filter_by(id=imaging.id).count() == 1
+
+
+def test_invalid_upload_length_gets_a_fixed_message(client):
+    for value in (None, "", "12abc"):
+        headers = {"Tus-Resumable": resumable_upload.TUS_VERSION}
+        if value is not None:
+            headers["Upload-Length"] = value
+        response = client.post("/radiology_uploads", headers=headers)
+        assert response.status_code == 400
+        assert response.get_json() == {"error": "Invalid Upload-Length"}
+
+
+def test_finished_tus_upload_flashes_nothing(client, make_patients):
+    data = _png()
+    metadata = {
+        "filename": "scan.png",
+        "patient_id": str(make_patients(1)[0].id),
+        "imaging_name": "Scan",
+        "imaging_date": "2026-01-01T09:00",
+    }
+    created = client.post(
+        "/radiology_uploads",
+        headers={
+            "Tus-Resumable": resumable_upload.TUS_VERSION,
+            "Upload-Length": str(len(data)),
+            "Upload-Metadata": ",".join(
+                f"{key} {base64.b64encode(value.encode()).decode()}"
+                for key, value in metadata.items()
+            ),
+        },
+    )
+    assert created.status_code == 201
+
+    response = client.patch(
+        created.headers["Location"],
+        data=data,
+        headers={
+            "Tus-Resumable": resumable_upload.TUS_VERSION,
+            "Content-Type": resumable_upload.CHUNK_CONTENT_TYPE,
+            "Upload-Offset": "0",
+        },
+    )
+    assert response.status_code == 204
+    assert response.headers["Radiology-Imaging-Id"]
+    with client.session_transaction() as session:
+        assert not session.get("_flashes")
@@ -0,0 +1,42 @@
+from utils.dashboard_cache import dashboard_cache
+from utils.schema_helper import refresh_schema_capabilities, schema_supports
+
+CALLS = 200
+
+
+def test_capabilities_inspected_once(app, count_queries):
+    app.extensions.pop("schema_capabilities", None)
+
+    assert schema_supports("dashboard_lab_results")
+    cold = len(count_queries)
+    assert cold > 0
+
+    count_queries.clear()
+    for _ in range(CALLS):
+        assert schema_supports("dashboard_lab_results")
+    assert count_queries == []
+
+
+def test_refresh_reinspects(app, count_queries):
+    refresh_schema_capabilities()
+    assert count_queries
+    assert not schema_supports("unknown_feature")
+
+
+def _inspections(statements):
+    # SQLite answers schema inspection through PRAGMAs and sqlite_master
+    return [sql for sql in statements if "PRAGMA" in sql or "sqlite_master" in sql]
+
+
+def test_dashboard_inspects_the_schema_only_once(client, count_queries):
+    client.application.extensions.pop("schema_capabilities", None)
+
+    assert client.get("/dashboard").status_code == 200
+    assert _inspections(count_queries)
+
+    # Rebuild the widgets rather than serving them from the dashboard cache
+    dashboard_cache.clear()
+    count_queries.clear()
+    assert client.get("/dashboard").status_code == 200
+    assert count_queries
+    assert _inspections(count_queries) == []
@@ -0,0 +1,71 @@
+import io
+import os
+import time
+from datetime import datetime, timedelta
+
+from models import db, RadiologyUpload
+from utils.radiology_storage import TEMP_DIR, store_blob, upload_path
+from utils.resumable_upload import RESUMABLE_DIR, create_upload
+from utils.upload_reclaimer import ORPHAN_MIN_AGE_SECONDS, reclaim_orphans
+
+OLD = time.time() - ORPHAN_MIN_AGE_SECONDS - 60
+
+
+def _file(name, age=OLD):
+    path = upload_path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as handle:
+        handle.write(b"x" * 10)
+    if age is not None:
+        os.utime(path, (age, age))
+    return path
+
+
+def test_recent_orphans_are_left_alone(app):
+    recent = _file("patient_1/recent.png", age=None)
+    old = _file("patient_1/old.png")
+
+    report = reclaim_orphans()
+
+    assert os.path.exists(recent)
+    assert not os.path.exists(old)
+    assert (report["orphans"], report["files_removed"]) == (1, 1)
+    assert report["bytes_reclaimed"] == 10
+
+
+def test_temp_and_part_files_are_cleaned(doctor, make_patients):
+    patient_id = make_patients(1)[0].id
+    blob_key, _ = store_blob(io.BytesIO(b"kept"), ".png")
+    db.session.commit()
+    os.utime(upload_path(blob_key), (OLD, OLD))
+
+    temp = _file(f"{TEMP_DIR}/interrupted")
+    stray_part = _file(f"{RESUMABLE_DIR}/{'0' * 32}.part")
+    active = create_upload(
+        doctor.id, patient_id, "Scan", datetime(2025, 1, 1), "scan.png", 100
+    )
+    abandoned = create_upload(
+        doctor.id, patient_id, "Scan", datetime(2025, 1, 1), "scan.png", 100
+    )
+    abandoned.updated_at = datetime.utcnow() - timedelta(days=2)
+    db.session.commit()
+    active_part = _file(f"{RESUMABLE_DIR}/{active.id}.part")
+    abandoned_part = _file(f"{RESUMABLE_DIR}/{abandoned.id}.part")
+
+    report = reclaim_orphans()
+
+    assert report["uploads_expired"] == 1
+    assert db.session.get(RadiologyUpload, active.id) is not None
+    assert os.path.exists(upload_path(blob_key))
+    assert os.path.exists(active_part)
+    for path in (temp, stray_part, abandoned_part):
+        assert not os.path.exists(path)
+
+
+def test_dry_run_removes_nothing(app):
+    path = _file("patient_1/old.png")
+
+    report = reclaim_orphans(dry_run=True)
+
+    assert os.path.exists(path)
+    assert (report["orphans"], report["files_removed"]) == (1, 0)
@@ -0,0 +1,63 @@
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import func
+
+from models import db, Appointment, AppointmentStatusEnum
+
+# Time window filter value -> label shown in the filter dropdown
+TIME_WINDOWS = {
+    "upcoming": "Upcoming",
+    "today": "Today",
+    "week": "Next 7 Days",
+    "month": "Next 30 Days",
+    "past": "Past",
+}
+
+
+def time_window_filter(window: str, now: datetime = None):
+    """Translate a time window label into a range on Appointment.date"""
+    now = now or datetime.now()
+    if window == "upcoming":
+        return Appointment.date > now
+    if window == "past":
+        return Appointment.date <= now
+    if window == "today":
+        start = datetime.combine(now.date(), time.min)
+        return db.and_(
+            Appointment.date >= start, Appointment.date < start + timedelta(days=1)
+        )
+    days = {"week": 7, "month": 30}[window]
+    return db.and_(
+        Appointment.date >= now, Appointment.date <= now + timedelta(days=days)
+    )
+
+
+def appointment_stats(doctor_id: int, now: datetime = None) -> dict:
+    """Status breakdown and upcoming count for a doctor in one GROUP BY query"""
+    now = now or datetime.now()
+    rows = (
+        db.session.query(
+            Appointment.status,
+            func.count(),
+            func.sum(db.case((Appointment.date > now, 1), else_=0)),
+        )
+        .filter(Appointment.doctor_id == doctor_id)
+        .group_by(Appointment.status)
+        .all()
+    )
+
+    by_status = dict.fromkeys(AppointmentStatusEnum, 0)
+    upcoming = 0
+    for status, total, status_upcoming in rows:
+        by_status[status] = total
+        # MySQL returns SUM() as a Decimal
+        upcoming += int(status_upcoming or 0)
+
+    return {
+        "total_appointments": sum(by_status.values()),
+        "upcoming_appointments": upcoming,
+        "completed_appointments": by_status[AppointmentStatusEnum.COMPLETED],
+        "scheduled_appointments": by_status[AppointmentStatusEnum.SCHEDULED],
+        "cancelled_appointments": by_status[AppointmentStatusEnum.CANCELLED],
+        "no_show_appointments": by_status[AppointmentStatusEnum.NO_SHOW],
+    }
@@ -0,0 +1,228 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime, time, timedelta
+
+from models import db, Appointment, AppointmentStatusEnum, Doctor
+
+DEFAULT_DURATION_MINUTES = 30
+# Upper bound on a single appointment; lets overlap lookups stay a plain
+# range scan on (doctor_id, date) instead of needing date + duration
+MAX_DURATION_MINUTES = 8 * 60
+
+# Recurring series: repeat unit -> days per unit, and a cap on occurrences
+REPEAT_UNITS = {"days": 1, "weeks": 7}
+MAX_SERIES_OCCURRENCES = 104
+
+# Cancelled appointments free their slot; everything else holds it
+BLOCKING_STATUSES = (
+    AppointmentStatusEnum.SCHEDULED,
+    AppointmentStatusEnum.COMPLETED,
+    AppointmentStatusEnum.NO_SHOW,
+)
+
+
+class IntervalSchedule:
+    """Busy time kept as sorted, merged, non-overlapping [start, end) intervals.
+
+    Because the intervals are disjoint and sorted, an overlap check is a
+    single bisect (O(log n)) and free gaps fall out of a linear walk.
+    """
+
+    def __init__(self, intervals=()):
+        self._starts = []
+        self._ends = []
+        for start, end in sorted(intervals):
+            if self._ends and start <= self._ends[-1]:
+                self._ends[-1] = max(self._ends[-1], end)
+            else:
+                self._starts.append(start)
+                self._ends.append(end)
+
+    def __len__(self):
+        return len(self._starts)
+
+    def overlaps(self, start, end) -> bool:
+        """True if [start, end) intersects any busy interval"""
+        # Last busy interval that starts before the candidate ends
+        i = bisect_left(self._starts, end) - 1
+        return i >= 0 and self._ends[i] > start
+
+    def add(self, start, end):
+        """Mark [start, end) busy, merging with any intervals it touches"""
+        lo = bisect_left(self._ends, start)
+        hi = bisect_right(self._starts, end)
+        if lo < hi:
+            start = min(start, self._starts[lo])
+            end = max(end, self._ends[hi - 1])
+        self._starts[lo:hi] = [start]
+        self._ends[lo:hi] = [end]
+
+    def busy(self, window_start=None, window_end=None):
+        """Busy intervals, optionally clipped to a window"""
+        intervals = []
+        for start, end in zip(self._starts, self._ends):
+            if window_start is not None and end <= window_start:
+                continue
+            if window_end is not None and start >= window_end:
+                break
+            intervals.append(
+                (
+                    start if window_start is None else max(start, window_start),
+                    end if window_end is None else min(end, window_end),
+                )
+            )
+        return intervals
+
+    def free(self, window_start, window_end):
+        """Gaps between busy intervals inside [window_start, window_end)"""
+        gaps = []
+        cursor = window_start
+        for start, end in self.busy(window_start, window_end):
+            if start > cursor:
+                gaps.append((cursor, start))
+            cursor = max(cursor, end)
+        if cursor < window_end:
+            gaps.append((cursor, window_end))
+        return gaps
+
+
+def _booked(doctor_id: int, start: datetime, end: datetime, exclude_id=None):
+    # Only appointments starting in [start - MAX_DURATION, end) can overlap
+    query = db.session.query(Appointment.date, Appointment.duration_minutes).filter(
+        Appointment.doctor_id == doctor_id,
+        Appointment.date >= start - timedelta(minutes=MAX_DURATION_MINUTES),
+        Appointment.date < end,
+        Appointment.status.in_(BLOCKING_STATUSES),
+    )
+    if exclude_id is not None:
+        query = query.filter(Appointment.id != exclude_id)
+    return query
+
+
+def load_schedule(
+    doctor_id: int, start: datetime, end: datetime, exclude_id=None, locking=False
+):
+    """Build the doctor's busy schedule for [start, end) from one range query.
+
+    The lookup is an index range scan on (doctor_id, date). With ``locking``
+    it is a shared locking read, which sees the latest committed
+    bookings rather than the transaction's snapshot; booking checks need it.
+    """
+    query = _booked(doctor_id, start, end, exclude_id)
+    if locking:
+        query = query.with_for_update(read=True)
+
+    return IntervalSchedule(
+        (
+            appointment_start,
+            appointment_start
+            + timedelta(minutes=duration or DEFAULT_DURATION_MINUTES),
+        )
+        for appointment_start, duration in query
+    )
+
+
+def lock_calendar(doctor_id: int):
+    """Serialise bookings for one doctor until the transaction ends.
+
+    Overlaps cannot be expressed as a unique constraint, so the check and the
+    insert that follows it must not interleave with another booking for the
+    same doctor. SELECT ... FOR UPDATE on the doctor row makes a concurrent
+    booking wait at this point until the caller commits or rolls back.
+
+    Waiting alone is not enough under MySQL's REPEATABLE READ: a plain SELECT
+    afterwards still reads the snapshot taken by the request's earlier
+    queries and misses the booking just committed. The overlap lookup that
+    follows must therefore be a locking read (load_schedule(locking=True)).
+    SQLite, used only in development, ignores both.
+    """
+    db.session.execute(
+        db.select(Doctor.id).where(Doctor.id == doctor_id).with_for_update()
+    )
+
+
+def has_conflict(doctor_id: int, start: datetime, duration_minutes: int, exclude_id=None):
+    """Check whether a new or moved appointment overlaps existing bookings.
+
+    Takes the doctor's calendar lock first (see lock_calendar), so the caller
+    should insert or update the appointment and commit in the same
+    transaction.
+    """
+    lock_calendar(doctor_id)
+    end = start + timedelta(minutes=duration_minutes)
+    schedule = load_schedule(doctor_id, start, end, exclude_id, locking=True)
+    return schedule.overlaps(start, end)
+
+
+def free_slots(
+    schedule: IntervalSchedule,
+    first_day,
+    last_day,
+    duration_minutes: int,
+    open_hour: int,
+    close_hour: int,
+    not_before: datetime = None,
+):
+    """Bookable slot start times between opening hours on each day.
+
+    Slots are laid out back to back from the start of every free gap.
+    """
+    length = timedelta(minutes=duration_minutes)
+    slots = []
+    day = first_day
+    while day <= last_day:
+        window_start = datetime.combine(day, time(open_hour))
+        window_end = datetime.combine(day, time(close_hour))
+        if not_before and window_start < not_before:
+            window_start = min(max(window_start, not_before), window_end)
+        for gap_start, gap_end in schedule.free(window_start, window_end):
+            slot = gap_start
+            while slot + length <= gap_end:
+                slots.append(slot)
+                slot += length
+        day += timedelta(days=1)
+    return slots
+
+
+def count_occurrences(first_start: datetime, every: int, unit: str, until) -> int:
+    """Number of occurrences expand_series would produce, without expanding"""
+    if first_start.date() > until:
+        return 0
+    return (until - first_start.date()).days // (every * REPEAT_UNITS[unit]) + 1
+
+
+def expand_series(first_start: datetime, every: int, unit: str, until):
+    """Occurrence start times every ``every`` days/weeks up to ``until`` (a date).
+
+    Raises ValueError if the series is longer than MAX_SERIES_OCCURRENCES
+    rather than quietly booking only the first ones.
+    """
+    total = count_occurrences(first_start, every, unit, until)
+    if total > MAX_SERIES_OCCURRENCES:
+        raise ValueError(
+            f"This series has {total} occurrences; at most "
+            f"{MAX_SERIES_OCCURRENCES} can be scheduled at once. "
+            "Choose an earlier end date or a longer interval."
+        )
+    step = timedelta(days=every * REPEAT_UNITS[unit])
+    return [first_start + step * i for i in range(total)]
+
+
+def plan_series(doctor_id: int, starts, duration_minutes: int):
+    """Split series occurrences into (bookable, conflicting) start times.
+
+    Existing bookings for the whole span come from one range query; each
+    accepted occurrence is added to the schedule so the series cannot
+    overlap itself either. The calendar lock is held until the caller's
+    commit and bookings are read with a locking read, as in has_conflict.
+    """
+    lock_calendar(doctor_id)
+    length = timedelta(minutes=duration_minutes)
+    schedule = load_schedule(doctor_id, starts[0], starts[-1] + length, locking=True)
+    accepted, skipped = [], []
+    for start in starts:
+        if schedule.overlaps(start, start + length):
+            skipped.append(start)
+        else:
+            schedule.add(start, start + length)
+            accepted.append(start)
+    return accepted, skipped
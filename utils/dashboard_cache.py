@@ -0,0 +1,186 @@
+import threading
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from models import Appointment, LaboratoryResult, Patient
+
+_PENDING_KEY = "dashboard_cache_pending"
+_ALL_DOCTORS = object()
+
+
+class DashboardCache:
+    """Per-doctor cache of the dashboard widgets with a TTL and an LRU bound.
+
+    Entries are plain snapshots, not ORM instances, so they can be served
+    after the session that loaded them has closed. Writes that touch a
+    doctor's lab results, appointments or patients invalidate that doctor's
+    entry when the transaction commits (see init_dashboard_cache). The cache
+    lives in each worker process; other workers catch up within the TTL.
+    """
+
+    def __init__(self, ttl=60, max_entries=256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def get(self, doctor_id):
+        """Return the cached widgets for a doctor, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(doctor_id)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(doctor_id)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[doctor_id]
+            self.misses += 1
+            return None
+
+    def get_or_load(self, doctor_id, loader):
+        """Return cached widgets, calling ``loader()`` and caching on a miss"""
+        value = self.get(doctor_id)
+        if value is not None:
+            return value
+
+        with self._lock:
+            generation = (self._epoch, self._generations.get(doctor_id, 0))
+        value = loader()
+        with self._lock:
+            # Skip the store if a commit invalidated this doctor mid-load
+            if (self._epoch, self._generations.get(doctor_id, 0)) == generation:
+                self._entries[doctor_id] = (time.monotonic() + self.ttl, value)
+                self._entries.move_to_end(doctor_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, *doctor_ids):
+        with self._lock:
+            for doctor_id in doctor_ids:
+                self._generations[doctor_id] = self._generations.get(doctor_id, 0) + 1
+                if self._entries.pop(doctor_id, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+            }
+
+
+dashboard_cache = DashboardCache()
+
+
+def snapshot(obj, *fields, **related):
+    """Copy ``fields`` of an ORM object into a detached, read-only namespace"""
+    values = {field: getattr(obj, field) for field in fields}
+    for name, related_fields in related.items():
+        values[name] = snapshot(getattr(obj, name), *related_fields)
+    return SimpleNamespace(**values)
+
+
+def _old_and_new(obj, attribute):
+    """Values of ``attribute`` before and after this flush.
+
+    Reassigning a row to another doctor or patient changes two dashboards,
+    so the value it had before the flush counts as well as the new one.
+    The owner columns are mapped with active_history (see models.py), so the
+    old value is loaded even when the attribute had been expired.
+    """
+    history = inspect(obj).attrs[attribute].history
+    return {*history.added, *history.unchanged, *history.deleted}
+
+
+def _affected_doctor_ids(session):
+    """Doctors whose dashboard widgets may change with this flush"""
+    doctor_ids = set()
+    patient_ids = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, (Appointment, Patient)):
+            doctor_ids.update(_old_and_new(obj, "doctor_id"))
+        elif isinstance(obj, LaboratoryResult):
+            patient_ids.update(_old_and_new(obj, "patient_id"))
+
+    patient_ids.discard(None)
+    if patient_ids:
+        rows = session.connection().execute(
+            select(Patient.doctor_id).where(Patient.id.in_(patient_ids))
+        )
+        doctor_ids.update(doctor_id for (doctor_id,) in rows)
+    doctor_ids.discard(None)
+    return doctor_ids
+
+
+def _after_flush(session, flush_context):
+    doctor_ids = _affected_doctor_ids(session)
+    if doctor_ids:
+        session.info.setdefault(_PENDING_KEY, set()).update(doctor_ids)
+
+
+def _do_orm_execute(orm_execute_state):
+    """Catch bulk INSERT/UPDATE/DELETE statements, which never reach a flush"""
+    if not (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+    ):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ not in (Appointment, LaboratoryResult, Patient):
+        return
+
+    pending = orm_execute_state.session.info.setdefault(_PENDING_KEY, set())
+    params = orm_execute_state.parameters
+    rows = params if isinstance(params, list) else [params or {}]
+    if mapper.class_ is Appointment and all("doctor_id" in row for row in rows):
+        pending.update(row["doctor_id"] for row in rows)
+    else:
+        # Affected doctors are not known up front; drop every entry
+        pending.add(_ALL_DOCTORS)
+
+
+def _after_commit(session):
+    doctor_ids = session.info.pop(_PENDING_KEY, None)
+    if not doctor_ids:
+        return
+    if _ALL_DOCTORS in doctor_ids:
+        dashboard_cache.clear()
+    else:
+        dashboard_cache.invalidate(*doctor_ids)
+
+
+def _after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def init_dashboard_cache(app):
+    dashboard_cache.ttl = app.config.get("DASHBOARD_CACHE_TTL", 60)
+    dashboard_cache.max_entries = app.config.get("DASHBOARD_CACHE_SIZE", 256)
+    if not event.contains(Session, "after_flush", _after_flush):
+        event.listen(Session, "after_flush", _after_flush)
+        event.listen(Session, "do_orm_execute", _do_orm_execute)
+        event.listen(Session, "after_commit", _after_commit)
+        event.listen(Session, "after_rollback", _after_rollback)
@@ -0,0 +1,163 @@
+import mmap
+import struct
+from datetime import date
+
+# (group, element) -> DicomMetadata column
+DICOM_TAGS = {
+    (0x0008, 0x0020): "study_date",
+    (0x0008, 0x0060): "modality",
+    (0x0008, 0x1030): "study_description",
+    (0x0008, 0x103E): "series_description",
+    (0x0018, 0x0015): "body_part",
+    (0x0020, 0x000D): "study_instance_uid",
+    (0x0020, 0x000E): "series_instance_uid",
+    (0x0028, 0x0010): "rows",
+    (0x0028, 0x0011): "columns",
+}
+# Top-level elements are stored in tag order, so parsing stops after this one
+# without ever reaching the pixel data at (7FE0,0010)
+_LAST_TAG = max(DICOM_TAGS)
+_TRANSFER_SYNTAX = (0x0002, 0x0010)
+
+_PREAMBLE_LENGTH = 128
+_UNDEFINED_LENGTH = 0xFFFFFFFF
+_ITEM = (0xFFFE, 0xE000)
+_ITEM_END = (0xFFFE, 0xE00D)
+_SEQUENCE_END = (0xFFFE, 0xE0DD)
+# Explicit VRs with a 2-byte reserved field and a 4-byte length
+_LONG_VRS = set(b"OB OD OF OL OV OW SQ SV UC UN UR UT UV".split())
+
+IMPLICIT_VR_LITTLE_ENDIAN = "1.2.840.10008.1.2"
+EXPLICIT_VR_BIG_ENDIAN = "1.2.840.10008.1.2.2"
+DEFLATED_EXPLICIT_VR = "1.2.840.10008.1.2.1.99"
+
+
+class DicomHeaderError(ValueError):
+    """The file is not DICOM Part 10 or its header cannot be walked"""
+
+
+class _Walker:
+    """Steps through data elements in a buffer without copying values"""
+
+    def __init__(self, buffer, explicit=True, little_endian=True):
+        self.buffer = buffer
+        self.explicit = explicit
+        self.endian = "<" if little_endian else ">"
+
+    def element(self, offset):
+        """Return (tag, vr, length, value_offset) of the element at offset"""
+        group, number = struct.unpack_from(self.endian + "HH", self.buffer, offset)
+        tag = (group, number)
+        # Item and delimiter tags never carry a VR
+        if group == 0xFFFE or not self.explicit:
+            (length,) = struct.unpack_from(self.endian + "I", self.buffer, offset + 4)
+            return tag, None, length, offset + 8
+
+        vr = self.buffer[offset + 4 : offset + 6]
+        if vr in _LONG_VRS:
+            (length,) = struct.unpack_from(self.endian + "I", self.buffer, offset + 8)
+            return tag, vr, length, offset + 12
+        (length,) = struct.unpack_from(self.endian + "H", self.buffer, offset + 6)
+        return tag, vr, length, offset + 8
+
+    def skip_until(self, offset, delimiter):
+        """Skip nested elements of undefined length up to and past delimiter"""
+        # An explicit stack of open delimiters, so deeply nested sequences in
+        # a hostile file cannot exhaust the interpreter's recursion limit
+        delimiters = [delimiter]
+        while True:
+            tag, _, length, value_offset = self.element(offset)
+            if tag == delimiters[-1]:
+                delimiters.pop()
+                if not delimiters:
+                    return value_offset
+                offset = value_offset
+            elif length == _UNDEFINED_LENGTH:
+                delimiters.append(_ITEM_END if tag == _ITEM else _SEQUENCE_END)
+                offset = value_offset
+            else:
+                offset = value_offset + length
+
+    def next_offset(self, tag, length, value_offset):
+        if length == _UNDEFINED_LENGTH:
+            return self.skip_until(value_offset, _SEQUENCE_END)
+        return value_offset + length
+
+
+def _text(raw: bytes) -> str:
+    # Multi-valued strings are backslash separated; keep the first value
+    return raw.split(b"\\")[0].strip(b" \x00").decode("latin-1")
+
+
+def _study_date(raw: bytes):
+    text = _text(raw)
+    try:
+        return date(int(text[:4]), int(text[4:6]), int(text[6:8]))
+    except ValueError:
+        return None
+
+
+def _decode(name, raw: bytes, endian: str):
+    if name in ("rows", "columns"):
+        return struct.unpack(endian + "H", raw[:2])[0] if len(raw) >= 2 else None
+    if name == "study_date":
+        return _study_date(raw)
+    return _text(raw) or None
+
+
+def parse_header(buffer) -> dict:
+    """Pull the indexed tags out of a DICOM Part 10 header.
+
+    Walks the file meta group and the top of the dataset element by element,
+    skipping sequences by their lengths, and stops at the last wanted tag.
+    Only the pages holding the header are ever touched.
+    """
+    if len(buffer) < _PREAMBLE_LENGTH + 4 or buffer[128:132] != b"DICM":
+        raise DicomHeaderError("Missing DICM prefix")
+
+    try:
+        # The file meta group is always explicit VR little endian
+        walker = _Walker(buffer)
+        offset = _PREAMBLE_LENGTH + 4
+        transfer_syntax = IMPLICIT_VR_LITTLE_ENDIAN
+        while offset < len(buffer):
+            tag, _, length, value_offset = walker.element(offset)
+            if tag[0] != 0x0002:
+                break
+            if tag == _TRANSFER_SYNTAX:
+                transfer_syntax = _text(buffer[value_offset : value_offset + length])
+            offset = walker.next_offset(tag, length, value_offset)
+
+        if transfer_syntax == DEFLATED_EXPLICIT_VR:
+            raise DicomHeaderError("Deflated datasets are not supported")
+        walker = _Walker(
+            buffer,
+            explicit=transfer_syntax != IMPLICIT_VR_LITTLE_ENDIAN,
+            little_endian=transfer_syntax != EXPLICIT_VR_BIG_ENDIAN,
+        )
+
+        values = {}
+        while offset < len(buffer):
+            tag, _, length, value_offset = walker.element(offset)
+            if tag > _LAST_TAG:
+                break
+            name = DICOM_TAGS.get(tag)
+            if name and length != _UNDEFINED_LENGTH:
+                raw = buffer[value_offset : value_offset + length]
+                values[name] = _decode(name, raw, walker.endian)
+            offset = walker.next_offset(tag, length, value_offset)
+        return values
+    except struct.error as e:
+        raise DicomHeaderError(f"Truncated header: {e}") from e
+
+
+def read_dicom_header(path: str) -> dict:
+    """Memory-map a file and parse its DICOM header; see parse_header"""
+    with open(path, "rb") as handle:
+        try:
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:
+            # Empty files cannot be mapped
+            raise DicomHeaderError(str(e)) from e
+        with mapped:
+            return parse_header(mapped)
@@ -0,0 +1,81 @@
+from models import db, DicomMetadata, Patient, RadiologyImaging
+from utils.dicom_header import DICOM_TAGS, DicomHeaderError, read_dicom_header
+from utils.radiology_storage import upload_path
+
+DICOM_EXTENSIONS = (".dcm", ".dicom")
+# Imaging records indexed per transaction by the backfill command
+INDEX_BATCH_SIZE = 200
+
+
+def is_dicom_filename(image_filename: str) -> bool:
+    return bool(image_filename) and image_filename.lower().endswith(DICOM_EXTENSIONS)
+
+
+def index_dicom(imaging: RadiologyImaging) -> bool:
+    """(Re)build the metadata row of an imaging record from its file header.
+
+    Only the header is read; non-DICOM files and unreadable headers leave
+    the record without metadata. Runs in the caller's transaction.
+    """
+    values = None
+    if is_dicom_filename(imaging.image_filename):
+        try:
+            values = read_dicom_header(upload_path(imaging.image_filename))
+        except (DicomHeaderError, OSError) as e:
+            print(f"Could not index DICOM header of {imaging.image_filename}: {e}")
+
+    if values is None:
+        imaging.dicom_metadata = None
+        return False
+
+    metadata = imaging.dicom_metadata
+    if metadata is None:
+        imaging.dicom_metadata = DicomMetadata(**values)
+    else:
+        # Updated in place: a replacement row would be inserted before the
+        # old one is deleted and trip the unique radiology_imaging_id
+        for name in DICOM_TAGS.values():
+            setattr(metadata, name, values.get(name))
+    return True
+
+
+def index_pending_dicom(batch_size: int = INDEX_BATCH_SIZE) -> int:
+    """Index DICOM uploads that have no metadata yet, one batch at a time"""
+    indexed = 0
+    last_id = 0
+    while True:
+        batch = (
+            RadiologyImaging.query.outerjoin(DicomMetadata)
+            .filter(
+                RadiologyImaging.id > last_id,
+                DicomMetadata.id.is_(None),
+                db.or_(
+                    *(
+                        RadiologyImaging.image_filename.ilike(f"%{extension}")
+                        for extension in DICOM_EXTENSIONS
+                    )
+                ),
+            )
+            .order_by(RadiologyImaging.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            return indexed
+
+        last_id = batch[-1].id
+        indexed += sum(index_dicom(imaging) for imaging in batch)
+        db.session.commit()
+
+
+def available_modalities(doctor_id: int):
+    """Modalities present among a doctor's indexed studies, for the filter"""
+    return [
+        modality
+        for (modality,) in db.session.query(DicomMetadata.modality)
+        .join(RadiologyImaging)
+        .join(Patient)
+        .filter(Patient.doctor_id == doctor_id, DicomMetadata.modality.isnot(None))
+        .distinct()
+        .order_by(DicomMetadata.modality)
+    ]
@@ -0,0 +1,164 @@
+import hashlib
+import secrets
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from models import db, Appointment, AppointmentStatusEnum, Patient
+from utils.pagination import seek_predicate
+
+# Past appointments older than this are left out of the feed
+FEED_HISTORY_DAYS = 365
+# Rows fetched per query while streaming
+FEED_BATCH_SIZE = 500
+
+PRODID = "-//VitalTrack EHR System//Appointments//EN"
+
+
+def new_feed_secret() -> str:
+    """Unguessable token for a doctor's feed URL"""
+    return secrets.token_urlsafe(32)
+
+
+def feed_window_start(now: datetime = None) -> datetime:
+    now = now or datetime.now()
+    return datetime.combine(now.date(), datetime.min.time()) - timedelta(
+        days=FEED_HISTORY_DAYS
+    )
+
+
+def feed_validators(doctor_id: int, since: datetime):
+    """ETag and Last-Modified for a doctor's feed from one aggregate query.
+
+    MAX(updated_at) of the appointments and of their patients moves on every
+    insert or edit, including a patient being renamed; COUNT(*) and the
+    window start are mixed in so deletions and the sliding history window
+    change the ETag too.
+    """
+    appointments_modified, patients_modified, total = (
+        db.session.query(
+            func.max(Appointment.updated_at),
+            func.max(Patient.updated_at),
+            func.count(),
+        )
+        .join(Patient, Appointment.patient_id == Patient.id)
+        .filter(Appointment.doctor_id == doctor_id, Appointment.date >= since)
+        .one()
+    )
+    raw = (
+        f"{doctor_id}:{since:%Y%m%d}:{total}:"
+        f"{appointments_modified}:{patients_modified}"
+    )
+    etag = hashlib.sha256(raw.encode()).hexdigest()[:32]
+    modified = [m for m in (appointments_modified, patients_modified) if m]
+    return etag, max(modified) if modified else None
+
+
+def _escape(text: str) -> str:
+    return (
+        text.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def _fold(line: str) -> str:
+    """Fold content lines to 75 octets as RFC 5545 requires"""
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts = []
+    while len(encoded) > 75:
+        cut = 75 if not parts else 74
+        # Never split inside a multi-byte UTF-8 sequence
+        while cut and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode())
+        encoded = encoded[cut:]
+    parts.append(encoded.decode())
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _format_local(value: datetime) -> str:
+    return value.strftime("%Y%m%dT%H%M%S")
+
+
+def _format_utc(value: datetime) -> str:
+    return value.strftime("%Y%m%dT%H%M%SZ")
+
+
+def _event(row, host: str) -> str:
+    """One VEVENT for an appointment row"""
+    kind = (
+        row.appointment_type.value.replace("_", " ").title()
+        if row.appointment_type
+        else "Appointment"
+    )
+    end = row.date + timedelta(minutes=row.duration_minutes or 30)
+    status = "CANCELLED" if row.status == AppointmentStatusEnum.CANCELLED else "CONFIRMED"
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:appointment-{row.id}@{host}",
+        f"DTSTAMP:{_format_utc(row.updated_at)}",
+        f"LAST-MODIFIED:{_format_utc(row.updated_at)}",
+        f"DTSTART:{_format_local(row.date)}",
+        f"DTEND:{_format_local(end)}",
+        f"SUMMARY:{_escape(f'{kind}: {row.first_name} {row.last_name}')}",
+        f"STATUS:{status}",
+    ]
+    if row.notes:
+        lines.append(f"DESCRIPTION:{_escape(row.notes)}")
+    lines.append("END:VEVENT")
+    return "".join(_fold(line) for line in lines)
+
+
+def generate_calendar(doctor_id: int, since: datetime, host: str):
+    """Yield an iCalendar document one VEVENT at a time.
+
+    Appointments are read FEED_BATCH_SIZE at a time, each batch seeking past
+    the last (date, id) through the (doctor_id, date) index, so only one
+    batch is held in memory however long the doctor's history is. Separate
+    queries are used rather than yield_per because mysql-connector buffers
+    the whole result set client-side.
+    """
+    yield (
+        "BEGIN:VCALENDAR\r\nVERSION:2.0\r\n"
+        f"PRODID:{PRODID}\r\nCALSCALE:GREGORIAN\r\nMETHOD:PUBLISH\r\n"
+    )
+
+    query = (
+        db.select(
+            Appointment.id,
+            Appointment.date,
+            Appointment.duration_minutes,
+            Appointment.status,
+            Appointment.appointment_type,
+            Appointment.notes,
+            Appointment.updated_at,
+            Patient.first_name,
+            Patient.last_name,
+        )
+        .join(Patient, Appointment.patient_id == Patient.id)
+        .where(Appointment.doctor_id == doctor_id, Appointment.date >= since)
+        .order_by(Appointment.date, Appointment.id)
+        .limit(FEED_BATCH_SIZE)
+    )
+    last = None
+    while True:
+        batch = query
+        if last is not None:
+            batch = batch.where(
+                seek_predicate((Appointment.date, Appointment.id), last, True)
+            )
+        rows = db.session.execute(batch).all()
+        if not rows:
+            break
+        last = (rows[-1].date, rows[-1].id)
+        for row in rows:
+            yield _event(row, host)
+        if len(rows) < FEED_BATCH_SIZE:
+            break
+
+    yield "END:VCALENDAR\r\n"
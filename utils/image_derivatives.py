@@ -0,0 +1,273 @@
+import math
+import os
+import shutil
+import threading
+
+from flask import current_app
+from PIL import Image, UnidentifiedImageError
+
+# Derivative name -> longest edge in pixels
+DERIVATIVE_SIZES = {
+    "thumb": 256,
+    "preview": 1024,
+}
+DERIVATIVE_FORMAT = "WEBP"
+DERIVATIVE_EXTENSION = ".webp"
+DERIVATIVE_QUALITY = 80
+
+# Derivatives live beside the patient_<id>/ folders under the upload root
+DERIVATIVES_DIR = "derivatives"
+
+# Empty marker files recording images Pillow could not decode, so later
+# requests skip straight to the fallback instead of retrying every time
+FAILED_KIND = "failed"
+
+# Errors meaning "this file cannot be turned into a derivative". Pillow raises
+# DecompressionBombError (not an OSError) for images with absurd pixel counts.
+UNDECODABLE_ERRORS = (
+    UnidentifiedImageError,
+    Image.DecompressionBombError,
+    OSError,
+    ValueError,
+)
+
+# Deep Zoom tile pyramids for images too large to send whole
+TILES_KIND = "tiles"
+TILE_SIZE = 256
+TILE_OVERLAP = 1
+# Images whose longest edge fits in a preview are never tiled
+TILE_MIN_EDGE = DERIVATIVE_SIZES["preview"]
+DZI_NAMESPACE = "http://schemas.microsoft.com/deepzoom/2008"
+
+# One pyramid build per image at a time within this process
+_tile_locks = {}
+_tile_locks_guard = threading.Lock()
+
+
+def derivative_path(image_filename: str, kind: str) -> str:
+    """Disk path of a derivative, e.g. derivatives/thumb/patient_3/<name>.webp"""
+    stem = os.path.splitext(image_filename)[0]
+    return os.path.join(
+        current_app.config["UPLOAD_FOLDER"],
+        DERIVATIVES_DIR,
+        kind,
+        stem + DERIVATIVE_EXTENSION,
+    )
+
+
+def _failure_marker(image_filename: str) -> str:
+    stem = os.path.splitext(image_filename)[0]
+    return os.path.join(
+        current_app.config["UPLOAD_FOLDER"], DERIVATIVES_DIR, FAILED_KIND, stem
+    )
+
+
+def derivatives_failed(image_filename: str) -> bool:
+    """True if an earlier attempt found the image undecodable"""
+    return os.path.exists(_failure_marker(image_filename))
+
+
+def _record_failure(image_filename: str):
+    marker = _failure_marker(image_filename)
+    try:
+        os.makedirs(os.path.dirname(marker), exist_ok=True)
+        open(marker, "a").close()
+    except OSError as e:
+        print(f"Could not record derivative failure for {image_filename}: {e}")
+
+
+def _render(source_path: str, target_path: str, size: int) -> bool:
+    try:
+        with Image.open(source_path) as image:
+            # JPEG can decode straight at a reduced scale, skipping most of
+            # the work for large scans
+            image.draft("RGB", (size, size))
+            image.thumbnail((size, size))
+            if image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            # Write to a temporary name first so readers never see half a file
+            temporary_path = f"{target_path}.{os.getpid()}.tmp"
+            image.save(
+                temporary_path, DERIVATIVE_FORMAT, quality=DERIVATIVE_QUALITY
+            )
+            os.replace(temporary_path, target_path)
+            return True
+    except UNDECODABLE_ERRORS as e:
+        # DICOM and other formats Pillow cannot decode have no derivatives
+        print(f"No derivative for {source_path}: {e}")
+        return False
+
+
+def generate_derivatives(image_filename: str):
+    """Render every derivative size for an uploaded image.
+
+    Never raises for a bad image: an undecodable one is recorded as failed
+    and False is returned, so callers that have already committed the upload
+    are not turned into errors.
+    """
+    if derivatives_failed(image_filename):
+        return False
+    source_path = os.path.join(current_app.config["UPLOAD_FOLDER"], image_filename)
+    for kind, size in DERIVATIVE_SIZES.items():
+        if not _render(source_path, derivative_path(image_filename, kind), size):
+            _record_failure(image_filename)
+            return False
+    return True
+
+
+def ensure_derivative(image_filename: str, kind: str):
+    """Path of a derivative, rendering it on first request; None if impossible"""
+    target_path = derivative_path(image_filename, kind)
+    if os.path.exists(target_path):
+        return target_path
+    if derivatives_failed(image_filename):
+        return None
+
+    source_path = os.path.join(current_app.config["UPLOAD_FOLDER"], image_filename)
+    if not os.path.exists(source_path):
+        return None
+    if _render(source_path, target_path, DERIVATIVE_SIZES[kind]):
+        return target_path
+    _record_failure(image_filename)
+    return None
+
+
+def delete_derivatives(image_filename: str):
+    """Remove every cached derivative of an image"""
+    for kind in DERIVATIVE_SIZES:
+        try:
+            os.remove(derivative_path(image_filename, kind))
+        except FileNotFoundError:
+            pass
+    shutil.rmtree(tiles_path(image_filename), ignore_errors=True)
+    try:
+        os.remove(_failure_marker(image_filename))
+    except FileNotFoundError:
+        pass
+
+
+def tiles_path(image_filename: str) -> str:
+    """Pyramid folder, laid out as <name>_files/<level>/<col>_<row>.webp"""
+    stem = os.path.splitext(image_filename)[0]
+    return os.path.join(
+        current_app.config["UPLOAD_FOLDER"],
+        DERIVATIVES_DIR,
+        TILES_KIND,
+        stem + "_files",
+    )
+
+
+def image_size(image_filename: str):
+    """(width, height) read from the file header, or None if undecodable"""
+    source_path = os.path.join(current_app.config["UPLOAD_FOLDER"], image_filename)
+    try:
+        with Image.open(source_path) as image:
+            return image.size
+    except UNDECODABLE_ERRORS:
+        return None
+
+
+def is_tileable(size) -> bool:
+    return size is not None and max(size) > TILE_MIN_EDGE
+
+
+def max_level(size) -> int:
+    """Deep Zoom level holding the full-resolution image"""
+    return math.ceil(math.log2(max(size)))
+
+
+def dzi_descriptor(size) -> str:
+    width, height = size
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<Image xmlns="{DZI_NAMESPACE}" TileSize="{TILE_SIZE}" '
+        f'Overlap="{TILE_OVERLAP}" Format="{DERIVATIVE_EXTENSION[1:]}">'
+        f'<Size Width="{width}" Height="{height}"/></Image>'
+    )
+
+
+def _tile_box(column: int, row: int, level_size):
+    width, height = level_size
+    left = column * TILE_SIZE - (TILE_OVERLAP if column else 0)
+    top = row * TILE_SIZE - (TILE_OVERLAP if row else 0)
+    right = min(width, (column + 1) * TILE_SIZE + TILE_OVERLAP)
+    bottom = min(height, (row + 1) * TILE_SIZE + TILE_OVERLAP)
+    return left, top, right, bottom
+
+
+def _build_pyramid(source_path: str, target_dir: str) -> bool:
+    """Cut every level of the pyramid, halving the image between levels.
+
+    The full-resolution image is decoded once; each smaller level comes from
+    the previous one with Image.reduce, so the whole build costs about 4/3 of
+    a single pass over the pixels.
+    """
+    temporary_dir = f"{target_dir}.{os.getpid()}.tmp"
+    try:
+        with Image.open(source_path) as image:
+            if image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            level = max_level(image.size)
+            while level >= 0:
+                level_dir = os.path.join(temporary_dir, str(level))
+                os.makedirs(level_dir, exist_ok=True)
+                columns = math.ceil(image.width / TILE_SIZE)
+                rows = math.ceil(image.height / TILE_SIZE)
+                for column in range(columns):
+                    for row in range(rows):
+                        image.crop(_tile_box(column, row, image.size)).save(
+                            os.path.join(
+                                level_dir,
+                                f"{column}_{row}{DERIVATIVE_EXTENSION}",
+                            ),
+                            DERIVATIVE_FORMAT,
+                            quality=DERIVATIVE_QUALITY,
+                        )
+                if image.size != (1, 1):
+                    image = image.reduce(2)
+                level -= 1
+
+        # Publish the finished pyramid in one rename
+        os.makedirs(os.path.dirname(target_dir), exist_ok=True)
+        try:
+            os.rename(temporary_dir, target_dir)
+        except OSError:
+            # Another process published it first
+            pass
+        return True
+    except UNDECODABLE_ERRORS as e:
+        print(f"No tile pyramid for {source_path}: {e}")
+        return False
+    finally:
+        shutil.rmtree(temporary_dir, ignore_errors=True)
+
+
+def ensure_tile(image_filename: str, level: int, column: int, row: int):
+    """Path of one pyramid tile, building the pyramid on first request.
+
+    Returns None for tiles outside the pyramid or images that cannot be
+    tiled.
+    """
+    target_dir = tiles_path(image_filename)
+    tile_path = os.path.join(
+        target_dir, str(level), f"{column}_{row}{DERIVATIVE_EXTENSION}"
+    )
+    if os.path.exists(tile_path):
+        return tile_path
+    if os.path.isdir(target_dir) or derivatives_failed(image_filename):
+        return None
+
+    with _tile_locks_guard:
+        lock = _tile_locks.setdefault(image_filename, threading.Lock())
+    with lock:
+        if not os.path.isdir(target_dir) and is_tileable(image_size(image_filename)):
+            source_path = os.path.join(
+                current_app.config["UPLOAD_FOLDER"], image_filename
+            )
+            _build_pyramid(source_path, target_dir)
+    with _tile_locks_guard:
+        _tile_locks.pop(image_filename, None)
+
+    return tile_path if os.path.exists(tile_path) else None
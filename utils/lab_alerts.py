@@ -0,0 +1,60 @@
+from datetime import datetime
+
+from models import db, LaboratoryResult, LabResultStatusEnum, Patient
+
+# Open alerts shown on the dashboard before "and more" kicks in
+MAX_DASHBOARD_ALERTS = 20
+
+
+def open_alerts_filter():
+    """Critical results nobody has acknowledged yet.
+
+    Matches the predicate of the partial ix_lab_result_open_critical index,
+    so the lookup only touches open alerts however large the table grows.
+    """
+    return db.and_(
+        LaboratoryResult.status == LabResultStatusEnum.CRITICAL,
+        LaboratoryResult.acknowledged_at.is_(None),
+    )
+
+
+def open_critical_alerts(doctor_id: int, limit: int = MAX_DASHBOARD_ALERTS):
+    """Newest unacknowledged critical results for a doctor, plus a more flag.
+
+    One query: limit + 1 rows are fetched to tell whether more alerts wait
+    beyond the ones shown.
+    """
+    rows = (
+        db.session.query(LaboratoryResult, Patient)
+        .join(Patient, LaboratoryResult.patient_id == Patient.id)
+        .filter(open_alerts_filter(), Patient.doctor_id == doctor_id)
+        .order_by(LaboratoryResult.date.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    return rows[:limit], len(rows) > limit
+
+
+def acknowledge_alert(lab_result_id: int, doctor_id: int) -> bool:
+    """Mark one of the doctor's open alerts acknowledged with a single UPDATE.
+
+    Returns False if the result does not exist, belongs to another doctor or
+    was already acknowledged. Runs against the table rather than the ORM
+    model: acknowledging changes nothing the dashboard cache holds, and an
+    ORM bulk UPDATE would invalidate every doctor's entry.
+    """
+    table = LaboratoryResult.__table__
+    result = db.session.execute(
+        table.update()
+        .where(
+            table.c.id == lab_result_id,
+            table.c.status == LabResultStatusEnum.CRITICAL.name,
+            table.c.acknowledged_at.is_(None),
+            table.c.patient_id.in_(
+                db.select(Patient.id).where(Patient.doctor_id == doctor_id)
+            ),
+        )
+        .values(acknowledged_at=datetime.utcnow())
+    )
+    db.session.commit()
+    return result.rowcount == 1
@@ -0,0 +1,279 @@
+import csv
+import re
+import time
+from datetime import datetime
+
+from models import db, LaboratoryResult, LabResultStatusEnum, Patient
+from utils.lab_values import parse_result_value
+from utils.reference_ranges import classify_results
+
+# Rows written and committed per transaction
+LAB_IMPORT_BATCH_SIZE = 1000
+# Rejected rows kept for the report; the rest are only counted
+MAX_REPORTED_REJECTS = 200
+
+IMPORT_FORMATS = ("csv", "hl7")
+
+# Accepted date layouts, CSV style first, then HL7 timestamps
+_DATE_FORMATS = (
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%dT%H:%M",
+    "%Y-%m-%d",
+    "%Y%m%d%H%M%S",
+    "%Y%m%d%H%M",
+    "%Y%m%d",
+)
+
+# Fractional seconds and a trailing UTC offset ("+0200", "-0500", "+02:00",
+# "Z") are dropped; the recorded wall-clock time is kept
+_DATE_SUFFIX = re.compile(r"(?<=\d)(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?$")
+
+# HL7 OBX-8 abnormal flags -> status
+_HL7_FLAGS = {
+    "N": "normal",
+    "L": "low",
+    "H": "high",
+    "LL": "critical",
+    "HH": "critical",
+    "A": "abnormal",
+    "AA": "critical",
+}
+
+_STATUS_VALUES = {status.value for status in LabResultStatusEnum}
+
+# Patient lookup value for an email shared by more than one patient
+AMBIGUOUS_PATIENT = object()
+
+
+class LabImportReport:
+    """Outcome of one import run"""
+
+    def __init__(self):
+        self.imported = 0
+        self.rejected = 0
+        self.rejected_rows = []
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def reject(self, line_number: int, reason: str):
+        self.rejected += 1
+        if len(self.rejected_rows) < MAX_REPORTED_REJECTS:
+            self.rejected_rows.append((line_number, reason))
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    @property
+    def rows_per_second(self):
+        processed = self.imported + self.rejected
+        return round(processed / self.elapsed) if self.elapsed else processed
+
+    def as_dict(self):
+        return {
+            "imported": self.imported,
+            "rejected": self.rejected,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "rows_per_second": self.rows_per_second,
+            "rejected_rows": [
+                {"line": line, "reason": reason} for line, reason in self.rejected_rows
+            ],
+        }
+
+
+def detect_format(filename: str) -> str:
+    """Guess the import format from a file name"""
+    return "hl7" if filename.lower().endswith((".hl7", ".txt")) else "csv"
+
+
+def build_patient_lookup(doctor_id: int = None) -> dict:
+    """Map patient ids and lowercase emails to patient ids with one query.
+
+    Emails are not unique, least of all across doctors; one held by several
+    patients maps to AMBIGUOUS_PATIENT so its rows are rejected rather than
+    attached to whichever patient came last.
+    """
+    query = db.session.query(Patient.id, Patient.email)
+    if doctor_id is not None:
+        query = query.filter(Patient.doctor_id == doctor_id)
+
+    lookup = {}
+    emails = {}
+    for patient_id, email in query:
+        lookup[str(patient_id)] = patient_id
+        if email:
+            key = email.strip().lower()
+            emails[key] = AMBIGUOUS_PATIENT if key in emails else patient_id
+    # Ids win over an email that happens to look like one
+    for key, patient_id in emails.items():
+        lookup.setdefault(key, patient_id)
+    return lookup
+
+
+def read_csv_rows(lines):
+    """Yield (line_number, fields) from a CSV file with a header row.
+
+    Patients are identified by a ``patient_id`` or ``email`` column.
+    """
+    reader = csv.DictReader(lines)
+    for row in reader:
+        row = {
+            key.strip().lower(): (value or "").strip()
+            for key, value in row.items()
+            if key
+        }
+        yield reader.line_num, {
+            "patient": row.get("patient_id") or row.get("email", ""),
+            "test_name": row.get("test_name", ""),
+            "date": row.get("date", ""),
+            "result": row.get("result", ""),
+            "unit": row.get("unit", ""),
+            "reference_range": row.get("reference_range", ""),
+            "status": row.get("status", "").lower(),
+            "notes": row.get("notes", ""),
+        }
+
+
+def read_hl7_rows(lines):
+    """Yield (line_number, fields) for every OBX segment of an HL7 v2 file.
+
+    The patient comes from the first component of PID-3 and the observation
+    time from OBX-14, falling back to OBR-7.
+    """
+    patient = ""
+    observed_at = ""
+    for line_number, line in enumerate(lines, start=1):
+        fields = line.strip().split("|")
+        segment = fields[0]
+        if segment == "PID":
+            patient = _component(fields, 3)
+            observed_at = ""
+        elif segment == "OBR":
+            observed_at = _component(fields, 7)
+        elif segment == "OBX":
+            # OBX-3 is code^text; prefer the human-readable text
+            code, _, text = _field(fields, 3).partition("^")
+            yield line_number, {
+                "patient": patient,
+                "test_name": (text.split("^")[0] or code).strip(),
+                "date": _component(fields, 14) or observed_at,
+                "result": _field(fields, 5),
+                "unit": _component(fields, 6),
+                "reference_range": _field(fields, 7),
+                "status": _HL7_FLAGS.get(_field(fields, 8).upper(), ""),
+                "notes": "",
+            }
+
+
+def _field(fields, index: int) -> str:
+    return fields[index].strip() if index < len(fields) else ""
+
+
+def _component(fields, index: int) -> str:
+    return _field(fields, index).split("^")[0].strip()
+
+
+def _parse_date(value: str):
+    value = _DATE_SUFFIX.sub("", value, count=1)
+    for date_format in _DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+    return None
+
+
+def _validate(fields: dict, patient_lookup: dict):
+    """Return (mapping, None) for a valid row or (None, reason)"""
+    patient_id = patient_lookup.get(fields["patient"].lower())
+    if patient_id is None:
+        return None, f"Unknown patient '{fields['patient']}'"
+    if patient_id is AMBIGUOUS_PATIENT:
+        return None, (
+            f"'{fields['patient']}' matches several patients; "
+            "identify the patient by id"
+        )
+    if not fields["test_name"]:
+        return None, "Test name is required"
+    if len(fields["test_name"]) > 100:
+        return None, "Test name is too long"
+    if not fields["result"]:
+        return None, "Result is required"
+    if len(fields["result"]) > 200:
+        return None, "Result is too long"
+    test_date = _parse_date(fields["date"])
+    if test_date is None:
+        return None, f"Invalid date '{fields['date']}'"
+    if fields["status"] and fields["status"] not in _STATUS_VALUES:
+        return None, f"Invalid status '{fields['status']}'"
+
+    return {
+        "patient_id": patient_id,
+        "test_name": fields["test_name"],
+        "date": test_date,
+        "result": fields["result"],
+        "result_value": parse_result_value(fields["result"]),
+        "unit": fields["unit"][:50] or None,
+        "reference_range": fields["reference_range"][:100] or None,
+        "status": LabResultStatusEnum(fields["status"]) if fields["status"] else None,
+        "notes": fields["notes"] or None,
+    }, None
+
+
+def import_lab_results(
+    lines,
+    file_format: str = "csv",
+    doctor_id: int = None,
+    batch_size: int = LAB_IMPORT_BATCH_SIZE,
+) -> LabImportReport:
+    """Stream lab results from ``lines`` into the database.
+
+    Rows are read one at a time and written with a bulk INSERT every
+    ``batch_size`` valid rows, each batch in its own transaction, so memory
+    stays flat whatever the file size. Patients are resolved through a lookup
+    built once up front; with ``doctor_id`` only that doctor's patients
+    match. A failing batch is rolled back and the error re-raised; batches
+    already committed stay in place.
+    """
+    report = LabImportReport()
+    patient_lookup = build_patient_lookup(doctor_id)
+    reader = read_hl7_rows if file_format == "hl7" else read_csv_rows
+
+    batch = []
+    try:
+        for line_number, fields in reader(lines):
+            mapping, reason = _validate(fields, patient_lookup)
+            if reason:
+                report.reject(line_number, reason)
+                continue
+            batch.append(mapping)
+            if len(batch) >= batch_size:
+                _write_batch(batch)
+                report.imported += len(batch)
+                batch = []
+        if batch:
+            _write_batch(batch)
+            report.imported += len(batch)
+    except Exception:
+        db.session.rollback()
+        raise
+    return report.finish()
+
+
+def _write_batch(batch):
+    # Rows without a status from the file get one from their reference range
+    unclassified = [row for row in batch if row["status"] is None]
+    if unclassified:
+        statuses = classify_results(
+            [row["result_value"] for row in unclassified],
+            [row["reference_range"] for row in unclassified],
+            [row["test_name"] for row in unclassified],
+            [row["unit"] for row in unclassified],
+        )
+        for row, status in zip(unclassified, statuses):
+            row["status"] = status
+
+    db.session.execute(db.insert(LaboratoryResult), batch)
+    db.session.commit()
@@ -0,0 +1,75 @@
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import func
+
+from models import db, LaboratoryResult, Patient
+from utils.patient_stats import escape_like, patient_name_filter
+
+# Date window filter value -> (label, days back from today)
+LAB_DATE_WINDOWS = {
+    "today": ("Today", 0),
+    "week": ("This Week", 7),
+    "month": ("This Month", 30),
+    "year": ("This Year", 365),
+}
+
+# Results newer than this count as "recent" on the lab results page
+RECENT_LAB_DAYS = 7
+
+
+def lab_date_filter(window: str, now: datetime = None):
+    """Translate a date window into a range on LaboratoryResult.date"""
+    now = now or datetime.now()
+    days = LAB_DATE_WINDOWS[window][1]
+    start = datetime.combine(now.date(), time.min) - timedelta(days=days)
+    return LaboratoryResult.date >= start
+
+
+def lab_search_filter(search: str):
+    """Match the patient's name, or a test name containing ``search``"""
+    return db.or_(
+        patient_name_filter(search),
+        LaboratoryResult.test_name.ilike(f"%{escape_like(search)}%", escape="\\"),
+    )
+
+
+def doctor_lab_results(doctor_id: int, *columns):
+    """Query of ``columns`` over a doctor's lab results joined to their patients"""
+    return (
+        db.session.query(*columns)
+        .select_from(LaboratoryResult)
+        .join(Patient, LaboratoryResult.patient_id == Patient.id)
+        .filter(Patient.doctor_id == doctor_id)
+    )
+
+
+def lab_result_stats(doctor_id: int, now: datetime = None) -> dict:
+    """Totals and test types for a doctor's lab results, computed in SQL"""
+    now = now or datetime.now()
+    recent_since = now - timedelta(days=RECENT_LAB_DAYS)
+
+    # Both counts read only (patient_id, date) from ix_lab_result_patient_date;
+    # the recent one is a date-bounded range per patient, not a pass over
+    # every result
+    total = doctor_lab_results(doctor_id, func.count()).scalar()
+    recent = (
+        doctor_lab_results(doctor_id, func.count())
+        .filter(LaboratoryResult.date >= recent_since)
+        .scalar()
+    )
+
+    test_types = [
+        test_name
+        for (test_name,) in db.session.query(LaboratoryResult.test_name)
+        .join(Patient, LaboratoryResult.patient_id == Patient.id)
+        .filter(Patient.doctor_id == doctor_id)
+        .distinct()
+        .order_by(LaboratoryResult.test_name)
+    ]
+
+    return {
+        "total_results": total,
+        "recent_results": recent,
+        "test_types_count": len(test_types),
+        "test_types": test_types,
+    }
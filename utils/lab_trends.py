@@ -0,0 +1,107 @@
+import numpy as np
+
+DEFAULT_TREND_POINTS = 500
+MAX_TREND_POINTS = 5000
+DEFAULT_ROLLING_WINDOW = 7
+DOWNSAMPLE_METHODS = ("lttb", "minmax")
+
+_SECONDS_PER_DAY = 86400.0
+
+
+def series_arrays(points):
+    """Turn (date, value) rows into epoch-second and value float arrays"""
+    count = len(points)
+    x = np.fromiter(
+        (d.timestamp() for d, _ in points), dtype=np.float64, count=count
+    )
+    y = np.fromiter((v for _, v in points), dtype=np.float64, count=count)
+    return x, y
+
+
+def lttb(x, y, threshold: int):
+    """Indices kept by Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last points and, from each of ``threshold - 2``
+    equal-count buckets, the point forming the largest triangle with the
+    previously kept point and the mean of the next bucket. The loop is over
+    buckets only; the work inside each bucket is vectorized.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    keep = np.empty(threshold, dtype=np.intp)
+    keep[0] = 0
+    keep[-1] = n - 1
+
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+
+        # Twice the triangle area; the constant factor does not change argmax
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        keep[i + 1] = previous
+    return keep
+
+
+def minmax(x, y, threshold: int):
+    """Indices of the minimum and maximum of each time bucket.
+
+    Splits the time span into ``(threshold - 2) // 2`` equal-width buckets,
+    which preserves spikes that averaging would hide, and always keeps the
+    first and last points so the chart spans the whole series. Fully
+    vectorized.
+    """
+    n = len(x)
+    buckets = max((threshold - 2) // 2, 1)
+    if threshold >= n or x[-1] == x[0]:
+        return np.arange(n)
+
+    bucket = np.minimum(
+        ((x - x[0]) / (x[-1] - x[0]) * buckets).astype(np.intp), buckets - 1
+    )
+    # Sort by bucket then value: each bucket's run starts at its min, ends at its max
+    order = np.lexsort((y, bucket))
+    sorted_bucket = bucket[order]
+    boundaries = np.flatnonzero(np.diff(sorted_bucket)) + 1
+    firsts = np.concatenate(([0], boundaries))
+    lasts = np.concatenate((boundaries - 1, [n - 1]))
+    return np.unique(np.concatenate(([0, n - 1], order[firsts], order[lasts])))
+
+
+def rolling_mean(y, window: int):
+    """Trailing mean over ``window`` points; shorter at the start of the series"""
+    if len(y) == 0:
+        return y
+    window = max(int(window), 1)
+    cumulative = np.cumsum(np.concatenate(([0.0], y)))
+    ends = np.arange(1, len(y) + 1)
+    starts = np.maximum(ends - window, 0)
+    return (cumulative[ends] - cumulative[starts]) / (ends - starts)
+
+
+def slope_per_day(x, y):
+    """Least-squares slope of value against time, in units per day"""
+    if len(x) < 2:
+        return None
+    days = (x - x[0]) / _SECONDS_PER_DAY
+    centered = days - days.mean()
+    denominator = np.dot(centered, centered)
+    if denominator == 0:
+        return None
+    return float(np.dot(centered, y - y.mean()) / denominator)
+
+
+def downsample(x, y, threshold: int, method: str = "lttb"):
+    """Indices to keep when reducing a series to about ``threshold`` points"""
+    if method == "minmax":
+        return minmax(x, y, threshold)
+    return lttb(x, y, threshold)
@@ -0,0 +1,169 @@
+import math
+import re
+
+from models import db, LaboratoryResult, LabResultStatusEnum
+from utils.reference_ranges import classify_result, classify_results
+
+# Rows handled per transaction when backfilling result_value
+BACKFILL_BATCH_SIZE = 1000
+
+# A result that is a single number, optionally behind a comparator
+# ("<0.5", ">= 1000"), with thousands separators, an exponent ("1e5",
+# "2.5E+3", common for counts) and a trailing unit ("4.5 mmol/L", "12%").
+# Ratios like "120/80" and text like "Positive" do not match.
+_NUMERIC_RESULT = re.compile(
+    r"""^\s*
+    (?:[<>]=?\s*)?
+    ((?:[-+]?(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?|[-+]?\.\d+)(?:[eE][-+]?\d+)?)
+    (?:\s*[a-zA-Z%µ].*)?
+    \s*$""",
+    re.VERBOSE,
+)
+
+
+def parse_result_value(result: str):
+    """Numeric value of a free-text lab result, or None if it is not a number"""
+    if not result:
+        return None
+    match = _NUMERIC_RESULT.match(result)
+    if not match:
+        return None
+    value = float(match.group(1).replace(",", ""))
+    # "1e999" overflows to inf, which JSON cannot carry
+    return value if math.isfinite(value) else None
+
+
+def status_is_derived(lab_result) -> bool:
+    """True unless the stored status differs from what the result would get.
+
+    The edit form uses this to leave such results on "Auto", so changing the
+    value re-derives the status instead of keeping the old one; a status
+    that disagrees with the derivation was chosen by hand and is kept.
+    """
+    return lab_result.status is None or lab_result.status == classify_result(
+        lab_result.result_value,
+        lab_result.reference_range,
+        lab_result.test_name,
+        lab_result.unit,
+    )
+
+
+def lab_series(patient_id: int, test_name: str, since=None):
+    """(date, value) points of one test for one patient, oldest first.
+
+    Served by a range scan on ix_lab_result_patient_test_date; results that
+    are not numeric are skipped.
+    """
+    query = db.session.query(
+        LaboratoryResult.date, LaboratoryResult.result_value
+    ).filter(
+        LaboratoryResult.patient_id == patient_id,
+        LaboratoryResult.test_name == test_name,
+        LaboratoryResult.result_value.isnot(None),
+    )
+    if since is not None:
+        query = query.filter(LaboratoryResult.date >= since)
+    return query.order_by(LaboratoryResult.date).all()
+
+
+def backfill_result_values(
+    batch_size: int = BACKFILL_BATCH_SIZE, recompute: bool = False
+) -> int:
+    """Fill result_value for rows written before the column existed.
+
+    Walks the table in primary key order and commits every ``batch_size``
+    rows, so locks stay short and an interrupted run can simply be restarted.
+    With ``recompute``, rows that already have a value are re-parsed too and
+    corrected where the parser now reads them differently. Returns the number
+    of rows updated.
+    """
+    filled = 0
+    last_id = 0
+    while True:
+        query = db.session.query(
+            LaboratoryResult.id, LaboratoryResult.result, LaboratoryResult.result_value
+        ).filter(LaboratoryResult.id > last_id)
+        if not recompute:
+            query = query.filter(LaboratoryResult.result_value.is_(None))
+        rows = query.order_by(LaboratoryResult.id).limit(batch_size).all()
+        if not rows:
+            return filled
+
+        last_id = rows[-1].id
+        updates = []
+        for row in rows:
+            value = parse_result_value(row.result)
+            if value != row.result_value:
+                updates.append({"id": row.id, "result_value": value})
+
+        if updates:
+            db.session.execute(db.update(LaboratoryResult), updates)
+            filled += len(updates)
+        db.session.commit()
+
+
+# Statuses classify_results can produce; PENDING and ABNORMAL only come
+# from a person or an instrument flag
+DERIVED_STATUSES = (
+    LabResultStatusEnum.NORMAL,
+    LabResultStatusEnum.LOW,
+    LabResultStatusEnum.HIGH,
+    LabResultStatusEnum.CRITICAL,
+)
+
+
+def backfill_statuses(
+    batch_size: int = BACKFILL_BATCH_SIZE, recompute: bool = False
+) -> int:
+    """Derive a status for rows that have none, one batch at a time.
+
+    Each batch is classified in a single vectorized pass. Rows whose value or
+    reference range cannot be interpreted keep a NULL status. With
+    ``recompute``, rows holding one of DERIVED_STATUSES are re-derived too,
+    replacing statuses from older classification rules (and any of those
+    statuses chosen by hand). Returns the number of rows updated.
+    """
+    classified = 0
+    last_id = 0
+    while True:
+        query = db.session.query(
+            LaboratoryResult.id,
+            LaboratoryResult.result_value,
+            LaboratoryResult.reference_range,
+            LaboratoryResult.test_name,
+            LaboratoryResult.unit,
+            LaboratoryResult.status,
+        ).filter(
+            LaboratoryResult.id > last_id,
+            LaboratoryResult.result_value.isnot(None),
+        )
+        if recompute:
+            query = query.filter(
+                db.or_(
+                    LaboratoryResult.status.is_(None),
+                    LaboratoryResult.status.in_(DERIVED_STATUSES),
+                )
+            )
+        else:
+            query = query.filter(LaboratoryResult.status.is_(None))
+        rows = query.order_by(LaboratoryResult.id).limit(batch_size).all()
+        if not rows:
+            return classified
+
+        last_id = rows[-1].id
+        statuses = classify_results(
+            [row.result_value for row in rows],
+            [row.reference_range for row in rows],
+            [row.test_name for row in rows],
+            [row.unit for row in rows],
+        )
+        updates = [
+            {"id": row.id, "status": status}
+            for row, status in zip(rows, statuses)
+            if status is not None and status != row.status
+        ]
+
+        if updates:
+            db.session.execute(db.update(LaboratoryResult), updates)
+            classified += len(updates)
+        db.session.commit()
@@ -0,0 +1,283 @@
+import unicodedata
+
+from sqlalchemy import delete, event, func, insert, inspect, select
+from sqlalchemy.orm import Session
+
+from models import db, Patient, RadiologyImaging, SearchDocument, SearchTrigram
+from utils.patient_stats import escape_like
+
+GRAM_SIZE = 3
+# Length of SearchDocument.text
+DOCUMENT_LENGTH = 255
+# Rows per statement when rebuilding the index
+REINDEX_BATCH_SIZE = 500
+
+# Searchable entity -> (model, attributes the document is built from)
+SEARCH_ENTITIES = {
+    "patient": (Patient, ("first_name", "last_name")),
+    "imaging": (RadiologyImaging, ("name",)),
+}
+
+
+def normalize(text: str) -> str:
+    """Lower-case, strip accents and collapse whitespace.
+
+    Grams are compared exactly, so this is what makes the index case and
+    accent insensitive like the ILIKE it replaces (and keeps MySQL's
+    case-insensitive collations from seeing duplicate keys).
+    """
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
+
+
+def trigrams(text: str) -> set:
+    """Distinct grams of a document, padded so word starts and ends count"""
+    padded = f" {normalize(text)} "
+    if len(padded) <= 2:
+        return set()
+    return {padded[i : i + GRAM_SIZE] for i in range(len(padded) - GRAM_SIZE + 1)}
+
+
+def _term_grams(term: str) -> set:
+    # Unpadded, so a term matches anywhere inside a word
+    term = normalize(term)
+    return {term[i : i + GRAM_SIZE] for i in range(len(term) - GRAM_SIZE + 1)}
+
+
+def _document(entity: str, obj) -> str:
+    _, attributes = SEARCH_ENTITIES[entity]
+    return " ".join(getattr(obj, name) or "" for name in attributes)
+
+
+def _entity_of(obj):
+    for entity, (model, _) in SEARCH_ENTITIES.items():
+        if isinstance(obj, model):
+            return entity
+    return None
+
+
+def _entity_of_model(cls):
+    for entity, (model, _) in SEARCH_ENTITIES.items():
+        if cls is model:
+            return entity
+    return None
+
+
+def drop_documents(connection, entity: str, entity_ids):
+    """Remove entities from the index; ``entity_ids`` may be a subquery"""
+    for table in (SearchTrigram, SearchDocument):
+        connection.execute(
+            delete(table).where(table.entity == entity, table.entity_id.in_(entity_ids))
+        )
+
+
+def write_trigrams(connection, entity: str, documents: dict):
+    """Replace the grams and text of {entity_id: text}; None drops the entity"""
+    if not documents:
+        return
+    drop_documents(connection, entity, list(documents))
+    texts = {
+        entity_id: normalize(text)
+        for entity_id, text in documents.items()
+        if text is not None
+    }
+    if not texts:
+        return
+    connection.execute(
+        insert(SearchDocument),
+        [
+            {"entity": entity, "entity_id": entity_id, "text": text[:DOCUMENT_LENGTH]}
+            for entity_id, text in texts.items()
+        ],
+    )
+    rows = [
+        {"entity": entity, "entity_id": entity_id, "gram": gram}
+        for entity_id, text in texts.items()
+        for gram in trigrams(text)
+    ]
+    if rows:
+        connection.execute(insert(SearchTrigram), rows)
+
+
+def _index_rows(connection, entity: str, where=None):
+    """Re-index the entity rows matching ``where`` from their stored names"""
+    model, attributes = SEARCH_ENTITIES[entity]
+    query = select(model.id, *(getattr(model, name) for name in attributes))
+    if where is not None:
+        query = query.where(where)
+    rows = connection.execute(query).all()
+    write_trigrams(
+        connection,
+        entity,
+        {row[0]: " ".join(value or "" for value in row[1:]) for row in rows},
+    )
+
+
+def search_filter(entity: str, term: str):
+    """Rows whose document contains ``term``, found through the trigram index.
+
+    Candidates must hold every gram of the term; a LIKE over their normalised
+    text then confirms those few rows, so matching stays accent insensitive.
+    Terms shorter than a gram are matched on the normalised text alone.
+    """
+    model, _ = SEARCH_ENTITIES[entity]
+    term = normalize(term)
+    matches = select(SearchDocument.entity_id).where(
+        SearchDocument.entity == entity,
+        SearchDocument.text.like(f"%{escape_like(term)}%", escape="\\"),
+    )
+    grams = _term_grams(term)
+    if grams:
+        candidates = (
+            select(SearchTrigram.entity_id)
+            .where(SearchTrigram.entity == entity, SearchTrigram.gram.in_(grams))
+            .group_by(SearchTrigram.entity_id)
+            .having(func.count() == len(grams))
+        )
+        matches = matches.where(SearchDocument.entity_id.in_(candidates))
+    return model.id.in_(matches)
+
+
+def search_rank(entity: str, term: str):
+    """Relevance of a match: exact 3, prefix 2, word start 1, elsewhere 0.
+
+    Ranked on the same normalised text search_filter matches against.
+    """
+    model, _ = SEARCH_ENTITIES[entity]
+    text = (
+        select(SearchDocument.text)
+        .where(SearchDocument.entity == entity, SearchDocument.entity_id == model.id)
+        .correlate(model)
+        .scalar_subquery()
+    )
+    term = normalize(term)
+    pattern = escape_like(term)
+    return db.case(
+        (text == term, 3),
+        (text.like(f"{pattern}%", escape="\\"), 2),
+        (text.like(f"% {pattern}%", escape="\\"), 1),
+        else_=0,
+    )
+
+
+def reindex_search(batch_size: int = REINDEX_BATCH_SIZE) -> dict:
+    """Rebuild the trigram index for every searchable entity"""
+    counts = {}
+    for entity, (model, attributes) in SEARCH_ENTITIES.items():
+        counts[entity] = 0
+        last_id = 0
+        while True:
+            rows = db.session.execute(
+                select(model.id, *(getattr(model, name) for name in attributes))
+                .where(model.id > last_id)
+                .order_by(model.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            write_trigrams(
+                db.session.connection(),
+                entity,
+                {row[0]: " ".join(value or "" for value in row[1:]) for row in rows},
+            )
+            db.session.commit()
+            counts[entity] += len(rows)
+    return counts
+
+
+def _after_flush(session, flush_context):
+    """Re-index names added, renamed or deleted in this flush"""
+    changed = {}
+    for obj in session.new:
+        entity = _entity_of(obj)
+        if entity:
+            changed.setdefault(entity, {})[obj.id] = _document(entity, obj)
+
+    for obj in session.dirty:
+        entity = _entity_of(obj)
+        if not entity or obj in session.deleted:
+            continue
+        state = inspect(obj)
+        _, attributes = SEARCH_ENTITIES[entity]
+        if any(state.attrs[name].history.has_changes() for name in attributes):
+            changed.setdefault(entity, {})[obj.id] = _document(entity, obj)
+
+    for obj in session.deleted:
+        entity = _entity_of(obj)
+        if entity:
+            changed.setdefault(entity, {})[obj.id] = None
+
+    if not changed:
+        return
+    connection = session.connection()
+    for entity, documents in changed.items():
+        write_trigrams(connection, entity, documents)
+
+
+def _index_insert(orm_execute_state, connection, entity, model):
+    statement = orm_execute_state.statement
+    dialect = connection.dialect
+    if isinstance(orm_execute_state.parameters, list):
+        supported = dialect.insert_executemany_returning
+    else:
+        supported = dialect.insert_returning
+    if supported and not statement.returning_column_descriptions:
+        # The caller asked for no rows, so the consumed result is handed back
+        result = orm_execute_state.invoke_statement(
+            statement=statement.returning(model.id)
+        )
+        _index_rows(connection, entity, model.id.in_(result.scalars().all()))
+        return result
+
+    # Fallback for backends without RETURNING (MySQL): index the ids past the
+    # highest one before the insert. Under concurrency this may also re-index
+    # rows another transaction added meanwhile, which is harmless, and
+    # `flask reindex-search` repairs anything missed.
+    last_id = connection.execute(select(func.max(model.id))).scalar() or 0
+    result = orm_execute_state.invoke_statement()
+    _index_rows(connection, entity, model.id > last_id)
+    return result
+
+
+def _do_orm_execute(orm_execute_state):
+    """Re-index rows touched by bulk statements, which never reach a flush"""
+    if not (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+    ):
+        return None
+    mapper = orm_execute_state.bind_mapper
+    entity = _entity_of_model(mapper.class_) if mapper is not None else None
+    if entity is None:
+        return None
+
+    model, _ = SEARCH_ENTITIES[entity]
+    connection = orm_execute_state.session.connection()
+    if orm_execute_state.is_insert:
+        return _index_insert(orm_execute_state, connection, entity, model)
+
+    where = orm_execute_state.statement.whereclause
+    params = orm_execute_state.parameters
+    if where is None and isinstance(params, list):
+        # Bulk UPDATE by primary key: the ids are in the parameter rows
+        where = model.id.in_([row["id"] for row in params])
+    affected = select(model.id)
+    if where is not None:
+        affected = affected.where(where)
+
+    if orm_execute_state.is_delete:
+        drop_documents(connection, entity, affected)
+        return None
+    ids = connection.execute(affected).scalars().all()
+    result = orm_execute_state.invoke_statement()
+    _index_rows(connection, entity, model.id.in_(ids))
+    return result
+
+
+def init_name_search(app):
+    if not event.contains(Session, "after_flush", _after_flush):
+        event.listen(Session, "after_flush", _after_flush)
+        event.listen(Session, "do_orm_execute", _do_orm_execute)
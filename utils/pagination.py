@@ -0,0 +1,114 @@
+import base64
+import json
+from datetime import date, datetime
+
+from sqlalchemy import and_, or_
+
+
+class KeysetPage:
+    """One page of rows plus the cursors needed to move around it"""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def encode_cursor(values) -> str:
+    """Pack the sort-key values of a row into an opaque URL-safe token"""
+    payload = [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, columns):
+    """Unpack a cursor token, restoring date/datetime values from the column types"""
+    raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    values = json.loads(raw)
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError("Malformed cursor")
+
+    decoded = []
+    for column, value in zip(columns, values):
+        python_type = column.type.python_type
+        if value is not None and python_type is datetime:
+            value = datetime.fromisoformat(value)
+        elif value is not None and python_type is date:
+            value = date.fromisoformat(value)
+        decoded.append(value)
+    return decoded
+
+
+def seek_predicate(columns, values, ascending):
+    """Row-value comparison (a, b, c) > (x, y, z) spelled out for every backend"""
+    clauses = []
+    for i, column in enumerate(columns):
+        equal_prefix = [c == v for c, v in zip(columns[:i], values[:i])]
+        step = column > values[i] if ascending else column < values[i]
+        clauses.append(and_(*equal_prefix, step))
+    return or_(*clauses)
+
+
+def keyset_paginate(
+    query,
+    columns,
+    per_page: int,
+    after: str = None,
+    before: str = None,
+    descending: bool = False,
+    key=None,
+):
+    """Fetch one page of ``query`` ordered on ``columns`` by seeking past a cursor.
+
+    Unlike OFFSET, the database jumps straight to the cursor position through
+    the index on ``columns``, so page 1 and page 1000 cost the same. ``columns``
+    must end with a unique column (usually the primary key) so the ordering is
+    total. ``key`` extracts the sort values from a result row; by default the
+    column attributes are read off the row itself.
+    """
+    if key is None:
+        def key(row):
+            return tuple(getattr(row, c.key) for c in columns)
+
+    backwards = bool(before) and not after
+    cursor = before if backwards else after
+    # Paging backwards flips the scan direction; it is reversed again below
+    ascending = descending == backwards
+
+    if cursor:
+        query = query.filter(
+            seek_predicate(columns, decode_cursor(cursor, columns), ascending)
+        )
+
+    order = [c.asc() if ascending else c.desc() for c in columns]
+    rows = query.order_by(*order).limit(per_page + 1).all()
+
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    if not rows:
+        return KeysetPage(rows)
+
+    first_cursor = encode_cursor(key(rows[0]))
+    last_cursor = encode_cursor(key(rows[-1]))
+    if backwards:
+        return KeysetPage(
+            rows,
+            next_cursor=last_cursor,
+            prev_cursor=first_cursor if has_more else None,
+        )
+    return KeysetPage(
+        rows,
+        next_cursor=last_cursor if has_more else None,
+        prev_cursor=first_cursor if cursor else None,
+    )
@@ -0,0 +1,242 @@
+from datetime import date, timedelta
+
+from sqlalchemy import func, literal, union_all
+from sqlalchemy.orm import aliased
+
+from models import (
+    db,
+    Appointment,
+    GenderEnum,
+    LaboratoryResult,
+    MedicalHistory,
+    Patient,
+    RadiologyImaging,
+)
+
+# Age group label -> inclusive (min, max) age in years; None means unbounded.
+# Ages are whole 365-day years, matching how the patients page has always
+# computed them.
+AGE_GROUPS = {
+    "0-18": (0, 18),
+    "19-35": (19, 35),
+    "36-50": (36, 50),
+    "51-65": (51, 65),
+    "65+": (66, None),
+}
+
+# Attribute set on each patient row -> child model whose rows are counted
+ACTIVITY_COUNT_MODELS = {
+    "appointment_count": Appointment,
+    "lab_result_count": LaboratoryResult,
+    "radiology_result_count": RadiologyImaging,
+    "medical_history_count": MedicalHistory,
+}
+
+
+def activity_counts(patient_ids: list[int]) -> dict[int, dict[str, int]]:
+    """Count every child record type for a set of patients in one round trip.
+
+    Each child table is grouped by patient_id and the four groupings are
+    glued together with UNION ALL, so the cost is one query no matter how
+    many patients are passed in. Patients without rows get zero counts.
+    """
+    counts = {pid: dict.fromkeys(ACTIVITY_COUNT_MODELS, 0) for pid in patient_ids}
+    if not counts:
+        return counts
+
+    grouped = [
+        db.select(
+            literal(attr).label("kind"),
+            model.patient_id,
+            func.count().label("total"),
+        )
+        .where(model.patient_id.in_(list(counts)))
+        .group_by(model.patient_id)
+        for attr, model in ACTIVITY_COUNT_MODELS.items()
+    ]
+    for kind, patient_id, total in db.session.execute(union_all(*grouped)):
+        counts[patient_id][kind] = total
+    return counts
+
+
+def attach_activity_counts(patients):
+    """Set appointment/lab/radiology/history counts on each patient row"""
+    counts = activity_counts([p.id for p in patients])
+    for patient in patients:
+        for attr, total in counts[patient.id].items():
+            setattr(patient, attr, total)
+    return patients
+
+
+def latest_per_patient(model, patient_ids: list[int], limit: int = 3, related=None):
+    """Load the ``limit`` newest rows of ``model`` for each patient in one query.
+
+    Rows are ranked with ROW_NUMBER() OVER (PARTITION BY patient_id ORDER BY
+    date DESC) and filtered on the rank, so the database returns exactly the
+    rows needed for every patient at once. ``model`` can be any child table
+    with ``patient_id`` and ``date`` columns. If ``related`` names a
+    many-to-one relationship (e.g. ``"allergy"``), the related object is
+    joined in and each entry is a ``(row, related_row)`` tuple.
+
+    Returns ``{patient_id: [rows, newest first]}`` with an entry per id.
+    """
+    latest = {pid: [] for pid in patient_ids}
+    if not latest:
+        return latest
+
+    rank = (
+        func.row_number()
+        .over(
+            partition_by=model.patient_id,
+            order_by=(model.date.desc(), model.id.desc()),
+        )
+        .label("rank")
+    )
+    ranked = (
+        db.select(model, rank).where(model.patient_id.in_(list(latest))).subquery()
+    )
+    row = aliased(model, ranked)
+
+    if related:
+        target = getattr(model, related).property.mapper.class_
+        query = db.session.query(row, target).join(getattr(row, related))
+    else:
+        query = db.session.query(row)
+    query = query.filter(ranked.c.rank <= limit).order_by(
+        ranked.c.patient_id, ranked.c.rank
+    )
+
+    for result in query:
+        record = result[0] if related else result
+        latest[record.patient_id].append(tuple(result) if related else result)
+    return latest
+
+
+def attach_recent_records(patients, limit: int = 3):
+    """Set recent medical histories, lab results and imaging on each patient row"""
+    patient_ids = [p.id for p in patients]
+    histories = latest_per_patient(MedicalHistory, patient_ids, limit, "allergy")
+    lab_results = latest_per_patient(LaboratoryResult, patient_ids, limit)
+    imaging = latest_per_patient(RadiologyImaging, patient_ids, limit)
+    for patient in patients:
+        patient.recent_medical_histories = histories[patient.id]
+        patient.recent_lab_results = lab_results[patient.id]
+        patient.recent_radiology_imaging = imaging[patient.id]
+    return patients
+
+
+def escape_like(value: str) -> str:
+    """Escape LIKE wildcards so user input matches literally"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def patient_name_filter(search: str):
+    """Every word of ``search`` must prefix-match the first or last name.
+
+    Prefix patterns (no leading wildcard) keep the name indexes usable.
+    """
+    conditions = []
+    for word in search.split():
+        pattern = escape_like(word) + "%"
+        conditions.append(
+            db.or_(
+                Patient.first_name.like(pattern, escape="\\"),
+                Patient.last_name.like(pattern, escape="\\"),
+            )
+        )
+    return db.and_(*conditions)
+
+
+def age_group_filter(label: str, today: date = None):
+    """Translate an age group label into an indexable date_of_birth range.
+
+    Matches the buckets of age_group_case, so the youngest group also takes
+    dates of birth in the future.
+    """
+    min_age, max_age = AGE_GROUPS[label]
+    today = today or date.today()
+
+    conditions = []
+    if min_age > 0:
+        # age >= n  <=>  (today - dob).days >= n * 365
+        conditions.append(
+            Patient.date_of_birth <= today - timedelta(days=min_age * 365)
+        )
+    if max_age is not None:
+        conditions.append(
+            Patient.date_of_birth > today - timedelta(days=(max_age + 1) * 365)
+        )
+    return db.and_(*conditions)
+
+
+def age_group_case(today: date = None):
+    """CASE expression bucketing Patient.date_of_birth into AGE_GROUPS labels.
+
+    The age boundaries are turned into cut-off dates in Python and bound as
+    parameters, so the SQL is plain date comparisons that behave the same on
+    SQLite and MySQL (no dialect-specific date arithmetic).
+    """
+    today = today or date.today()
+    whens = [(Patient.date_of_birth.is_(None), None)]
+    oldest_group = None
+    for label, (_, max_age) in AGE_GROUPS.items():
+        if max_age is None:
+            oldest_group = label
+            continue
+        # age <= n  <=>  (today - dob).days < (n + 1) * 365
+        cutoff = today - timedelta(days=(max_age + 1) * 365)
+        whens.append((Patient.date_of_birth > cutoff, label))
+    return db.case(*whens, else_=oldest_group)
+
+
+def patient_demographics(doctor_id: int, today: date = None) -> dict:
+    """Statistics header for the patients page, independent of any page slice.
+
+    Gender split, age-group histogram and the number of patients with medical
+    history all come from a single GROUP BY over (gender, age group), so no
+    patient rows are loaded into Python.
+    """
+    has_history = (
+        db.select(MedicalHistory.id)
+        .where(MedicalHistory.patient_id == Patient.id)
+        .exists()
+    )
+    bucketed = (
+        db.select(
+            Patient.gender.label("gender"),
+            age_group_case(today).label("age_group"),
+            db.case((has_history, 1), else_=0).label("has_history"),
+        )
+        .where(Patient.doctor_id == doctor_id)
+        .subquery()
+    )
+    rows = db.session.execute(
+        db.select(
+            bucketed.c.gender,
+            bucketed.c.age_group,
+            func.count(),
+            func.sum(bucketed.c.has_history),
+        ).group_by(bucketed.c.gender, bucketed.c.age_group)
+    )
+
+    stats = {
+        "total_patients": 0,
+        "male_patients": 0,
+        "female_patients": 0,
+        "other_patients": 0,
+        "age_groups": dict.fromkeys(AGE_GROUPS, 0),
+        "patients_with_history": 0,
+    }
+    for gender, age_group, total, with_history in rows:
+        stats["total_patients"] += total
+        # MySQL returns SUM() as a Decimal
+        stats["patients_with_history"] += int(with_history or 0)
+        if gender == GenderEnum.MALE:
+            stats["male_patients"] += total
+        elif gender == GenderEnum.FEMALE:
+            stats["female_patients"] += total
+        else:
+            stats["other_patients"] += total
+        if age_group is not None:
+            stats["age_groups"][age_group] += total
+    return stats
@@ -0,0 +1,206 @@
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from PIL import Image, UnidentifiedImageError
+
+from models import db, RadiologyImaging
+from utils.dicom_header import DicomHeaderError, read_dicom_header
+from utils.dicom_index import index_dicom, is_dicom_filename
+from utils.image_derivatives import generate_derivatives
+from utils.radiology_storage import (
+    commit_blob,
+    delete_stored_files,
+    temp_dir,
+    write_hashed,
+)
+
+# Files accepted in one batch upload
+MAX_BATCH_FILES = 200
+# Worker threads per batch; hashing, decoding and WebP encoding all release
+# the GIL, so threads scale across cores without a process pool
+MAX_BATCH_WORKERS = min(4, os.cpu_count() or 1)
+
+
+class BatchUploadReport:
+    """Per-file outcome and throughput of one batch upload"""
+
+    def __init__(self):
+        self.files = []
+        self.saved = 0
+        self.failed = 0
+        self.bytes = 0
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def add(self, filename: str, error: str = None, imaging=None, size=0):
+        self.files.append(
+            {
+                "filename": filename,
+                "error": error,
+                "imaging_id": imaging.id if imaging is not None else None,
+                "size": size,
+            }
+        )
+        if error:
+            self.failed += 1
+        else:
+            self.saved += 1
+            self.bytes += size
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    @property
+    def files_per_second(self):
+        processed = self.saved + self.failed
+        return round(processed / self.elapsed, 1) if self.elapsed else processed
+
+    @property
+    def megabytes_per_second(self):
+        megabytes = self.bytes / (1024 * 1024)
+        return round(megabytes / self.elapsed, 1) if self.elapsed else megabytes
+
+
+def _extension(upload) -> str:
+    return os.path.splitext(upload.filename)[1].lower()
+
+
+def validate_upload(path: str, extension: str):
+    """Reason a stored upload cannot be used, or None if it decodes"""
+    if os.path.getsize(path) == 0:
+        return "File is empty"
+    if is_dicom_filename(extension):
+        try:
+            read_dicom_header(path)
+        except DicomHeaderError as e:
+            return f"Not a readable DICOM file: {e}"
+        return None
+    try:
+        with Image.open(path) as image:
+            image.verify()
+    except Image.DecompressionBombError:
+        return "Image has too many pixels to decode"
+    except (UnidentifiedImageError, OSError, ValueError):
+        return "Not a readable image"
+    return None
+
+
+def _prepare(app, upload, extension: str, max_size: int):
+    """Copy one upload into the temp area, hashing and validating it.
+
+    Runs on a worker thread. Returns (temp_path, digest, size, error); any
+    failure is reported as that file's error rather than raised, so one bad
+    file cannot abort the rest of the batch.
+    """
+    temp_path = None
+    size = 0
+    with app.app_context():
+        try:
+            with tempfile.NamedTemporaryFile(dir=temp_dir(), delete=False) as handle:
+                temp_path = handle.name
+                digest, size = write_hashed(upload.stream, handle)
+
+            if size > max_size:
+                error = f"File is larger than {max_size // (1024 * 1024)}MB"
+            else:
+                error = validate_upload(temp_path, extension)
+        except Exception as e:
+            print(f"Error preparing upload {upload.filename}: {e}")
+            error = "File could not be read"
+
+        if error:
+            _remove_temp(temp_path)
+            return None, None, size, error
+        return temp_path, digest, size, None
+
+
+def _remove_temp(temp_path):
+    if temp_path and os.path.exists(temp_path):
+        os.remove(temp_path)
+
+
+def _discard(future):
+    """Stop a prepared upload that will not be committed and drop its file"""
+    if not future.cancel():
+        _remove_temp(future.result()[0])
+
+
+def _render_derivatives(app, content_key: str):
+    with app.app_context():
+        generate_derivatives(content_key)
+
+
+def save_batch(
+    app,
+    patient_id: int,
+    name: str,
+    imaging_date,
+    uploads,
+    max_size: int,
+    workers: int = MAX_BATCH_WORKERS,
+) -> BatchUploadReport:
+    """Store many uploads for one patient and add their records together.
+
+    Hashing and validation run on a bounded thread pool. The blobs and
+    RadiologyImaging rows are then written in the request's session and
+    committed once, so a failure leaves none of the batch behind.
+    Thumbnails for newly stored blobs are rendered on the pool after the
+    commit.
+    """
+    report = BatchUploadReport()
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(uploads)))) as pool:
+        futures = [
+            pool.submit(_prepare, app, upload, _extension(upload), max_size)
+            for upload in uploads
+        ]
+
+        created = []
+        consumed = 0
+        try:
+            for upload, future in zip(uploads, futures):
+                temp_path, digest, size, error = future.result()
+                if error:
+                    consumed += 1
+                    results.append((upload.filename, error, None, size))
+                    continue
+
+                content_key, is_new = commit_blob(
+                    temp_path, digest, size, _extension(upload)
+                )
+                consumed += 1
+                if is_new:
+                    created.append(content_key)
+
+                stem = os.path.splitext(os.path.basename(upload.filename))[0]
+                imaging = RadiologyImaging(
+                    patient_id=patient_id,
+                    name=(f"{name} - {stem}" if name else stem)[:100],
+                    date=imaging_date,
+                    image_filename=content_key,
+                )
+                index_dicom(imaging)
+                db.session.add(imaging)
+                results.append((upload.filename, None, imaging, size))
+
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            # Temp files not yet moved into the store would otherwise linger
+            for future in futures[consumed:]:
+                _discard(future)
+            # Files moved into the store for this batch are unreferenced now
+            for content_key in created:
+                delete_stored_files(content_key)
+            raise
+
+        for filename, error, imaging, size in results:
+            report.add(filename, error=error, imaging=imaging, size=size)
+
+        list(pool.map(partial(_render_derivatives, app), created))
+
+    return report.finish()
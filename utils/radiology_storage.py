@@ -0,0 +1,209 @@
+import hashlib
+import os
+import tempfile
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from models import db, RadiologyBlob
+from utils.image_derivatives import delete_derivatives
+
+# Content-addressed blobs live under blobs/<2 hex>/<2 hex>/<sha256><ext> so no
+# directory grows past a few hundred entries
+BLOBS_DIR = "blobs"
+# Uploads are streamed here first, on the same filesystem as the blobs so the
+# final move is an atomic rename
+TEMP_DIR = "tmp"
+HASH_CHUNK_SIZE = 1024 * 1024
+# Spellings of the same format share one blob key, so identical bytes
+# uploaded as .jpg and .jpeg are stored once
+EXTENSION_ALIASES = {".jpeg": ".jpg", ".tif": ".tiff", ".dicom": ".dcm"}
+
+
+def normalize_extension(extension: str) -> str:
+    extension = extension.lower()
+    return EXTENSION_ALIASES.get(extension, extension)
+
+
+def blob_key(digest: str, extension: str) -> str:
+    extension = normalize_extension(extension)
+    return f"{BLOBS_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+
+def is_blob_key(image_filename: str) -> bool:
+    return image_filename.startswith(BLOBS_DIR + "/")
+
+
+def upload_path(image_filename: str) -> str:
+    """Disk path of a stored upload, blob key or legacy patient path"""
+    return os.path.join(current_app.config["UPLOAD_FOLDER"], *image_filename.split("/"))
+
+
+def content_etag(image_filename: str, variant: str = ""):
+    """Strong ETag for a content-addressed file, None for legacy uploads"""
+    if not is_blob_key(image_filename):
+        return None
+    digest = os.path.splitext(image_filename.rsplit("/", 1)[-1])[0]
+    return f"{digest}-{variant}" if variant else digest
+
+
+def temp_dir() -> str:
+    path = os.path.join(current_app.config["UPLOAD_FOLDER"], TEMP_DIR)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def write_hashed(stream, handle):
+    """Copy ``stream`` into ``handle`` chunk by chunk, hashing as it goes"""
+    digest = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = stream.read(HASH_CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+        handle.write(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def hash_stream(stream):
+    """SHA-256 and size of a seekable stream, rewound to the start afterwards"""
+    digest = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = stream.read(HASH_CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+        size += len(chunk)
+    stream.seek(0)
+    return digest.hexdigest(), size
+
+
+def hash_file(path: str):
+    """SHA-256 and size of a file already on disk, read chunk by chunk"""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as handle:
+        while True:
+            chunk = handle.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def _retain(content_key: str) -> bool:
+    """Add a reference to an existing blob; False if there is no such blob"""
+    result = db.session.execute(
+        db.update(RadiologyBlob)
+        .where(RadiologyBlob.content_key == content_key)
+        .values(ref_count=RadiologyBlob.ref_count + 1)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def retain_stored(digest: str, extension: str):
+    """Reference an already stored blob by content; its key, or None if absent"""
+    content_key = blob_key(digest, extension)
+    # The file is checked first: a blob whose row we can still retain was not
+    # released, so its file is not about to be removed
+    if os.path.exists(upload_path(content_key)) and _retain(content_key):
+        return content_key
+    return None
+
+
+def commit_blob(temp_path: str, digest: str, size: int, extension: str):
+    """Move a hashed temp file into the store, or drop it if already stored.
+
+    Returns (content_key, created). The reference is counted in the current
+    transaction, so the caller's commit makes it durable. A blob that is
+    already referenced costs no further disk write: the temp copy is
+    discarded.
+    """
+    content_key = blob_key(digest, extension)
+    final_path = upload_path(content_key)
+    try:
+        retained = _retain(content_key)
+        if retained and os.path.exists(final_path):
+            return content_key, False
+
+        if not retained:
+            try:
+                # Savepoint, so losing an insert race to a concurrent upload
+                # of the same bytes does not roll back the caller's transaction
+                with db.session.begin_nested():
+                    db.session.add(
+                        RadiologyBlob(content_key=content_key, size_bytes=size)
+                    )
+            except IntegrityError:
+                _retain(content_key)
+
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(temp_path, final_path)
+        return content_key, True
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def store_blob(stream, extension: str):
+    """Store an upload by content; returns (content_key, created).
+
+    A seekable stream (werkzeug's spooled uploads are) is hashed in place
+    first, so a duplicate is never written to disk at all. Anything else is
+    streamed to a temp file once, hashing on the way; see commit_blob.
+    """
+    if getattr(stream, "seekable", None) and stream.seekable():
+        digest, _ = hash_stream(stream)
+        content_key = retain_stored(digest, extension)
+        if content_key:
+            return content_key, False
+
+    with tempfile.NamedTemporaryFile(dir=temp_dir(), delete=False) as handle:
+        digest, size = write_hashed(stream, handle)
+    return commit_blob(handle.name, digest, size, extension)
+
+
+def release_blob(image_filename: str) -> bool:
+    """Drop one reference to a stored upload.
+
+    Returns True when nothing references it any more and its files should be
+    deleted (after the caller commits). Legacy per-patient uploads were never
+    shared, so releasing one always frees it.
+    """
+    if not is_blob_key(image_filename):
+        return True
+
+    db.session.execute(
+        db.update(RadiologyBlob)
+        .where(RadiologyBlob.content_key == image_filename)
+        .values(ref_count=RadiologyBlob.ref_count - 1)
+        .execution_options(synchronize_session=False)
+    )
+    result = db.session.execute(
+        db.delete(RadiologyBlob)
+        .where(
+            RadiologyBlob.content_key == image_filename,
+            RadiologyBlob.ref_count <= 0,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def delete_stored_files(image_filename: str) -> bool:
+    """Remove an unreferenced upload and its derivatives from disk"""
+    # A new upload of the same bytes may have revived the blob since release
+    if is_blob_key(image_filename) and db.session.get(RadiologyBlob, image_filename):
+        return False
+
+    delete_derivatives(image_filename)
+    try:
+        os.remove(upload_path(image_filename))
+        return True
+    except FileNotFoundError:
+        return False
@@ -0,0 +1,177 @@
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+
+from models import LabResultStatusEnum
+
+# Explicit critical (panic) limits: test names, units they apply to (""
+# when the unit was not recorded and every common unit shares one scale),
+# then critical low and high (None for no limit). A result strictly beyond
+# a limit is CRITICAL. Tests or units not listed here are never derived as
+# CRITICAL; the reference range alone does not say how dangerous a value is.
+# Commonly published adult limits; align them with the laboratory's own list.
+_CELL_COUNT_UNITS = ("x10^9/l", "10^9/l", "x10^3/ul", "10^3/ul", "k/ul")
+CRITICAL_LIMIT_TABLE = (
+    (("potassium", "k"), ("mmol/l", "meq/l", ""), 2.5, 6.5),
+    (("sodium", "na"), ("mmol/l", "meq/l", ""), 120.0, 160.0),
+    (("glucose",), ("mg/dl",), 40.0, 500.0),
+    (("glucose",), ("mmol/l",), 2.2, 27.8),
+    (("calcium", "ca"), ("mg/dl",), 6.0, 13.0),
+    (("calcium", "ca"), ("mmol/l",), 1.5, 3.25),
+    (("hemoglobin", "haemoglobin", "hgb", "hb"), ("g/dl",), 6.0, 20.0),
+    (("hemoglobin", "haemoglobin", "hgb", "hb"), ("g/l",), 60.0, 200.0),
+    (("platelets", "platelet count", "plt"), _CELL_COUNT_UNITS, 20.0, 1000.0),
+    (("wbc", "white blood cells", "white blood cell count"), _CELL_COUNT_UNITS, 2.0, 30.0),
+    (("inr",), ("",), None, 5.0),
+)
+# (normalized test name, normalized unit) -> (critical low, critical high)
+CRITICAL_LIMITS = {
+    (name, unit): (low, high)
+    for names, units, low, high in CRITICAL_LIMIT_TABLE
+    for name in names
+    for unit in units
+}
+
+_NUMBER = r"[-+]?(?:\d+(?:\.\d+)?|\.\d+)"
+# "3.5-5.0", "3.5 - 5.0 mmol/L", "-1.0 to 2.0", "3.5–5.0"
+_BETWEEN = re.compile(
+    rf"^\s*({_NUMBER})\s*(?:-|–|to)\s*({_NUMBER})(?:\s*[a-zA-Z%µ/].*)?\s*$"
+)
+# "<200", "<= 200", ">=60", "≥ 60 mL/min"
+_ONE_SIDED = re.compile(
+    rf"^\s*(<=|>=|<|>|≤|≥)\s*({_NUMBER})(?:\s*[a-zA-Z%µ/].*)?\s*$"
+)
+
+# Status codes used by the vectorized classifier
+_UNKNOWN, _NORMAL, _LOW, _HIGH, _CRITICAL = -1, 0, 1, 2, 3
+_CODE_STATUS = {
+    _NORMAL: LabResultStatusEnum.NORMAL,
+    _LOW: LabResultStatusEnum.LOW,
+    _HIGH: LabResultStatusEnum.HIGH,
+    _CRITICAL: LabResultStatusEnum.CRITICAL,
+}
+
+
+class ReferenceInterval(NamedTuple):
+    """Normal range with optional open ends (None means unbounded)"""
+
+    low: float = None
+    high: float = None
+    low_inclusive: bool = True
+    high_inclusive: bool = True
+
+
+@lru_cache(maxsize=4096)
+def parse_reference_range(text: str):
+    """Compile a reference range string into a ReferenceInterval, or None.
+
+    Lab files repeat a handful of distinct ranges millions of times, so the
+    parsed intervals are cached by their source text.
+    """
+    if not text:
+        return None
+
+    match = _BETWEEN.match(text)
+    if match:
+        low, high = float(match.group(1)), float(match.group(2))
+        if low > high:
+            return None
+        return ReferenceInterval(low, high)
+
+    match = _ONE_SIDED.match(text)
+    if match:
+        operator, limit = match.group(1), float(match.group(2))
+        if operator in ("<", "<=", "≤"):
+            return ReferenceInterval(high=limit, high_inclusive=operator != "<")
+        return ReferenceInterval(low=limit, low_inclusive=operator != ">")
+    return None
+
+
+def critical_limits(test_name: str, unit: str):
+    """(critical low, critical high) for a test in a unit, or None"""
+    unit = (unit or "").lower().replace(" ", "").replace("µ", "u")
+    return CRITICAL_LIMITS.get((" ".join((test_name or "").lower().split()), unit))
+
+
+def _critical_arrays(test_names, units):
+    """Critical low/high per row; rows without explicit limits get NaN"""
+    keys = np.array(
+        [f"{name or ''}\x1f{unit or ''}" for name, unit in zip(test_names, units)],
+        dtype=str,
+    )
+    unique, inverse = np.unique(keys, return_inverse=True)
+
+    limits = np.full((len(unique), 2), np.nan, dtype=np.float64)
+    for i, key in enumerate(unique):
+        found = critical_limits(*key.split("\x1f"))
+        if found is not None:
+            limits[i] = (
+                -np.inf if found[0] is None else found[0],
+                np.inf if found[1] is None else found[1],
+            )
+    limits = limits[inverse]
+    return limits[:, 0], limits[:, 1]
+
+
+def _interval_arrays(reference_ranges):
+    """Bounds and inclusive flags per row, parsing each distinct range once"""
+    texts = np.array([text or "" for text in reference_ranges], dtype=str)
+    unique, inverse = np.unique(texts, return_inverse=True)
+
+    bounds = np.empty((len(unique), 4), dtype=np.float64)
+    for i, text in enumerate(unique):
+        interval = parse_reference_range(text)
+        if interval is None:
+            bounds[i] = (np.nan, np.nan, 1.0, 1.0)
+        else:
+            bounds[i] = (
+                -np.inf if interval.low is None else interval.low,
+                np.inf if interval.high is None else interval.high,
+                interval.low_inclusive,
+                interval.high_inclusive,
+            )
+    bounds = bounds[inverse]
+    return bounds[:, 0], bounds[:, 1], bounds[:, 2] > 0, bounds[:, 3] > 0
+
+
+def classify_codes(values, reference_ranges, test_names, units):
+    """Vectorized status codes for parallel sequences of results.
+
+    A value beyond the explicit critical limits for its test and unit (see
+    CRITICAL_LIMIT_TABLE) is _CRITICAL; otherwise the reference range gives
+    _LOW, _HIGH or _NORMAL. ``values`` may hold None/NaN for non-numeric
+    results; those rows, and rows whose range cannot be parsed and that are
+    not critical, get _UNKNOWN.
+    """
+    # NumPy turns None into NaN when building a float array
+    values = np.asarray(values, dtype=np.float64)
+    low, high, low_inclusive, high_inclusive = _interval_arrays(reference_ranges)
+    critical_low, critical_high = _critical_arrays(test_names, units)
+
+    with np.errstate(invalid="ignore"):
+        below = np.where(low_inclusive, values < low, values <= low)
+        above = np.where(high_inclusive, values > high, values >= high)
+        # Comparisons with NaN are False, so rows without limits never match
+        critical = (values < critical_low) | (values > critical_high)
+
+    unknown = np.isnan(values) | np.isnan(low)
+    return np.select(
+        [critical, unknown, below, above],
+        [_CRITICAL, _UNKNOWN, _LOW, _HIGH],
+        default=_NORMAL,
+    )
+
+
+def classify_results(values, reference_ranges, test_names, units):
+    """LabResultStatusEnum (or None when undeterminable) for each result"""
+    return [
+        _CODE_STATUS.get(code)
+        for code in classify_codes(values, reference_ranges, test_names, units).tolist()
+    ]
+
+
+def classify_result(value, reference_range, test_name, unit):
+    """Status for a single result; see classify_results"""
+    return classify_results([value], [reference_range], [test_name], [unit])[0]
@@ -0,0 +1,194 @@
+import base64
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock applies
+    fcntl = None
+import uuid
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from models import db, RadiologyImaging, RadiologyUpload
+from utils.dicom_index import index_dicom
+from utils.image_derivatives import generate_derivatives
+from utils.radiology_batch import validate_upload
+from utils.radiology_storage import commit_blob, hash_file
+
+# Protocol version spoken by the radiology upload endpoints (tus core +
+# creation + termination)
+TUS_VERSION = "1.0.0"
+TUS_EXTENSIONS = "creation,termination"
+CHUNK_CONTENT_TYPE = "application/offset+octet-stream"
+
+# Partial uploads live here, named <upload id>.part
+RESUMABLE_DIR = "resumable"
+# Bytes copied from the request to disk per write
+APPEND_BUFFER_SIZE = 1024 * 1024
+# Clients send chunks a little under MAX_CONTENT_LENGTH
+CLIENT_CHUNK_SIZE = 8 * 1024 * 1024
+
+# One chunk written per upload at a time within this process; an flock on the
+# part file serialises appends across worker processes
+_upload_locks = {}
+_upload_locks_guard = threading.Lock()
+
+
+class UploadError(ValueError):
+    """A resumable upload request that cannot be honoured"""
+
+
+def part_path(upload_id: str) -> str:
+    return os.path.join(
+        current_app.config["UPLOAD_FOLDER"], RESUMABLE_DIR, f"{upload_id}.part"
+    )
+
+
+def upload_offset(upload_id: str) -> int:
+    """Bytes received so far; the file on disk is the source of truth"""
+    try:
+        return os.path.getsize(part_path(upload_id))
+    except FileNotFoundError:
+        return 0
+
+
+def parse_metadata(header: str) -> dict:
+    """Decode an Upload-Metadata header: comma-separated "key base64value" pairs"""
+    metadata = {}
+    for pair in (header or "").split(","):
+        pair = pair.strip()
+        if not pair:
+            continue
+        key, _, value = pair.partition(" ")
+        try:
+            metadata[key] = base64.b64decode(value, validate=True).decode()
+        except (ValueError, UnicodeDecodeError) as e:
+            raise UploadError(f"Invalid Upload-Metadata value for {key}") from e
+    return metadata
+
+
+def create_upload(doctor_id, patient_id, name, date, filename, upload_length):
+    """Register a new upload and create its empty part file"""
+    upload = RadiologyUpload(
+        id=uuid.uuid4().hex,
+        doctor_id=doctor_id,
+        patient_id=patient_id,
+        name=name,
+        date=date,
+        filename=filename,
+        upload_length=upload_length,
+    )
+    path = part_path(upload.id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "wb").close()
+    db.session.add(upload)
+    db.session.commit()
+    return upload
+
+
+def _upload_lock(upload_id: str):
+    with _upload_locks_guard:
+        return _upload_locks.setdefault(upload_id, threading.Lock())
+
+
+def append_chunk(upload: RadiologyUpload, offset: int, stream, length: int) -> int:
+    """Append one PATCH body at ``offset`` and return the new offset.
+
+    The body is copied in APPEND_BUFFER_SIZE pieces, so memory stays flat
+    however large the chunk. If the client drops mid-chunk, whatever
+    arrived is kept and the next HEAD reports it.
+    """
+    with _upload_lock(upload.id), open(part_path(upload.id), "ab") as handle:
+        if fcntl is not None:
+            # Held until the file is closed
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        current = os.fstat(handle.fileno()).st_size
+        if offset != current:
+            raise UploadError(f"Upload-Offset {offset} does not match {current}")
+        if current + length > upload.upload_length:
+            raise UploadError("Chunk would exceed Upload-Length")
+
+        remaining = length
+        try:
+            while remaining:
+                data = stream.read(min(APPEND_BUFFER_SIZE, remaining))
+                if not data:
+                    break
+                handle.write(data)
+                remaining -= len(data)
+        finally:
+            handle.flush()
+            os.fsync(handle.fileno())
+
+        upload.updated_at = datetime.utcnow()
+        db.session.commit()
+        return os.fstat(handle.fileno()).st_size
+
+
+def finish_upload(upload: RadiologyUpload):
+    """Turn a fully received upload into a radiology record.
+
+    The part file is hashed once, validated and renamed into the blob store
+    by commit_blob; the record and the removal of the upload row commit
+    together. Returns the new RadiologyImaging. Raises UploadError (after
+    discarding the upload) if the file is not a usable image; nothing
+    after the commit raises, since the upload is saved by then.
+    """
+    path = part_path(upload.id)
+    extension = os.path.splitext(upload.filename)[1].lower()
+
+    error = validate_upload(path, extension)
+    if error:
+        discard_upload(upload)
+        raise UploadError(error)
+
+    digest, size = hash_file(path)
+    content_key, created = commit_blob(path, digest, size, extension)
+    imaging = RadiologyImaging(
+        patient_id=upload.patient_id,
+        name=upload.name,
+        date=upload.date,
+        image_filename=content_key,
+    )
+    index_dicom(imaging)
+    db.session.add(imaging)
+    db.session.delete(upload)
+    db.session.commit()
+
+    with _upload_locks_guard:
+        _upload_locks.pop(upload.id, None)
+    if created:
+        try:
+            generate_derivatives(content_key)
+        except Exception as e:
+            # Pages render missing derivatives on demand
+            print(f"Error rendering derivatives for {content_key}: {e}")
+    return imaging
+
+
+def discard_upload(upload: RadiologyUpload):
+    """Drop an upload and whatever bytes it received"""
+    upload_id = upload.id
+    db.session.delete(upload)
+    db.session.commit()
+    try:
+        os.remove(part_path(upload_id))
+    except FileNotFoundError:
+        pass
+    with _upload_locks_guard:
+        _upload_locks.pop(upload_id, None)
+
+
+def expire_uploads(max_age_seconds: int) -> int:
+    """Forget uploads with no chunk for max_age_seconds.
+
+    Their part files become unreferenced and go with the next orphan sweep.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=max_age_seconds)
+    expired = RadiologyUpload.query.filter(RadiologyUpload.updated_at < cutoff).delete(
+        synchronize_session=False
+    )
+    db.session.commit()
+    return expired
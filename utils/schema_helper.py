@@ -0,0 +1,57 @@
+from flask import current_app
+
+from models import db
+
+# Feature -> {table: [columns that must exist]}
+FEATURE_REQUIREMENTS = {
+    "dashboard_lab_results": {
+        "laboratory_result": [],
+        "patient": ["email"],
+    },
+}
+
+
+def _inspect_capabilities() -> dict:
+    """Inspect the live schema once and report which features it supports"""
+    inspector = db.inspect(db.engine)
+    tables = set(inspector.get_table_names())
+    columns = {}
+
+    capabilities = {}
+    for feature, requirements in FEATURE_REQUIREMENTS.items():
+        supported = True
+        for table, required_columns in requirements.items():
+            if table not in tables:
+                print(f"Schema missing table {table} - disabling {feature}")
+                supported = False
+                break
+            if table not in columns:
+                columns[table] = {c["name"] for c in inspector.get_columns(table)}
+            missing = set(required_columns) - columns[table]
+            if missing:
+                print(f"Table {table} missing columns {missing} - disabling {feature}")
+                supported = False
+                break
+        capabilities[feature] = supported
+    return capabilities
+
+
+def schema_supports(feature: str) -> bool:
+    """Return whether the database schema supports ``feature``.
+
+    The schema is introspected on first use and cached on the app, so request
+    handlers pay for the information_schema round trips once per process
+    rather than on every hit. Call refresh_schema_capabilities() after
+    migrating a running process.
+    """
+    capabilities = current_app.extensions.get("schema_capabilities")
+    if capabilities is None:
+        capabilities = refresh_schema_capabilities()
+    return capabilities.get(feature, False)
+
+
+def refresh_schema_capabilities() -> dict:
+    """Re-inspect the schema and replace the cached capabilities"""
+    capabilities = _inspect_capabilities()
+    current_app.extensions["schema_capabilities"] = capabilities
+    return capabilities
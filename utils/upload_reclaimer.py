@@ -0,0 +1,197 @@
+import os
+import queue
+import threading
+import time
+
+from flask import current_app
+
+from models import db, RadiologyBlob, RadiologyImaging, RadiologyUpload
+from utils.image_derivatives import DERIVATIVES_DIR, delete_derivatives
+from utils.radiology_storage import TEMP_DIR, delete_stored_files
+from utils.resumable_upload import RESUMABLE_DIR, expire_uploads
+
+# Stored names looked up per IN (...) query while sweeping the upload tree
+RECLAIM_BATCH_SIZE = 1000
+# Files younger than this are never swept: an upload moves its file into
+# place before its transaction commits
+ORPHAN_MIN_AGE_SECONDS = 60 * 60
+# Resumable uploads with no new chunk for this long are abandoned
+UPLOAD_EXPIRY_SECONDS = 24 * 60 * 60
+
+
+class FileReclaimer:
+    """Deletes released uploads on a background thread, off the request path.
+
+    The worker starts on first use, so each worker process gets its own
+    after forking. Anything still queued when the process exits is picked up
+    by the next ``flask reclaim-uploads`` sweep.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def schedule(self, *image_filenames):
+        """Queue unreferenced uploads for deletion once the caller commits"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="file-reclaimer", daemon=True
+                )
+                self._thread.start()
+        for image_filename in image_filenames:
+            if image_filename:
+                self._queue.put(image_filename)
+
+    def wait(self):
+        """Block until every queued deletion has been attempted"""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            image_filename = self._queue.get()
+            try:
+                with self.app.app_context():
+                    delete_stored_files(image_filename)
+            except Exception as e:
+                print(f"Error deleting file {image_filename}: {e}")
+            finally:
+                self._queue.task_done()
+
+
+file_reclaimer = FileReclaimer()
+
+
+def init_file_reclaimer(app):
+    file_reclaimer.app = app
+
+
+def walk_uploads(root: str):
+    """Yield (image_filename, path) for every stored upload under root.
+
+    Uses os.scandir so directory entries are classified without a stat call
+    per file. Derivatives are skipped; they go with their source image.
+    """
+    pending = [("", root)]
+    while pending:
+        prefix, directory = pending.pop()
+        try:
+            entries = os.scandir(directory)
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                name = prefix + entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if name != DERIVATIVES_DIR:
+                        pending.append((name + "/", entry.path))
+                elif entry.is_file(follow_symlinks=False):
+                    yield name, entry.path
+
+
+def _referenced(image_filenames):
+    """The subset of image_filenames still referenced by a record or blob"""
+    # Partial uploads are referenced by their radiology_upload row
+    prefix = RESUMABLE_DIR + "/"
+    part_files = {
+        name[len(prefix) : -len(".part")]: name
+        for name in image_filenames
+        if name.startswith(prefix) and name.endswith(".part")
+    }
+    referenced = set()
+    if part_files:
+        referenced.update(
+            part_files[upload_id]
+            for (upload_id,) in db.session.query(RadiologyUpload.id).filter(
+                RadiologyUpload.id.in_(list(part_files))
+            )
+        )
+    referenced.update(
+        name
+        for (name,) in db.session.query(RadiologyImaging.image_filename).filter(
+            RadiologyImaging.image_filename.in_(image_filenames)
+        )
+    )
+    referenced.update(
+        key
+        for (key,) in db.session.query(RadiologyBlob.content_key).filter(
+            RadiologyBlob.content_key.in_(image_filenames)
+        )
+    )
+    return referenced
+
+
+def find_orphans(root: str, batch_size: int = RECLAIM_BATCH_SIZE):
+    """Yield (image_filename, path) for files no database row refers to"""
+    batch = []
+    for item in walk_uploads(root):
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield from _unreferenced(batch)
+            batch = []
+    if batch:
+        yield from _unreferenced(batch)
+
+
+def _unreferenced(batch):
+    temp_prefix = TEMP_DIR + "/"
+    # Interrupted uploads leave temp files that no row ever refers to
+    candidates = [name for name, _ in batch if not name.startswith(temp_prefix)]
+    referenced = _referenced(candidates) if candidates else set()
+    for name, path in batch:
+        if name not in referenced:
+            yield name, path
+
+
+def reclaim_orphans(
+    root: str = None,
+    min_age_seconds: int = ORPHAN_MIN_AGE_SECONDS,
+    dry_run: bool = False,
+    batch_size: int = RECLAIM_BATCH_SIZE,
+    upload_expiry_seconds: int = UPLOAD_EXPIRY_SECONDS,
+) -> dict:
+    """Delete uploads that no record references and report what was freed.
+
+    Only orphans are stat'ed, so a sweep costs one directory walk plus a few
+    indexed IN queries per batch, however many files are stored. Abandoned
+    resumable uploads are expired first so their partial files go too.
+    """
+    root = root or current_app.config["UPLOAD_FOLDER"]
+    started = time.perf_counter()
+    cutoff = time.time() - min_age_seconds
+    report = {"orphans": 0, "files_removed": 0, "bytes_reclaimed": 0}
+    if not dry_run:
+        report["uploads_expired"] = expire_uploads(upload_expiry_seconds)
+
+    for image_filename, path in find_orphans(root, batch_size):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        # Recent files may belong to an upload that has not committed yet
+        if stat.st_mtime > cutoff:
+            continue
+
+        report["orphans"] += 1
+        if dry_run:
+            report["bytes_reclaimed"] += stat.st_size
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+        delete_derivatives(image_filename)
+        report["files_removed"] += 1
+        report["bytes_reclaimed"] += stat.st_size
+        # Legacy per-patient folders go once their last upload does
+        directory = os.path.dirname(path)
+        if os.path.normpath(directory) != os.path.normpath(root):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                pass
+
+    report["seconds"] = round(time.perf_counter() - started, 2)
+    return report